@@ -3,13 +3,14 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from fastapi.responses import FileResponse
 from typing import Union
  
-from models.po_models import ProcessPDFResponse, BlobProcessRequest, ManualRedactionResponse
-from process_po import process_pdf
+from models.po_models import ProcessPDFResponse, BlobProcessRequest, BatchProcessRequest, ManualRedactionResponse
 from utils.logging.logger import get_logger
-from utils.azure.blob_reader import download_blob_as_bytes
+from utils.jobs.pdf_job_queue import pdf_job_queue, JobQueueFullError
+from process_po import normalize_guid
 from models.po_models import HospitalCreate, HospitalUpdate, ProductInsert
 from db.insert.hospital_insert import insert_hospital
 from db.update.hospital_update import update_hospital_by_rcno
+from db.select.product_catalog import product_catalog
 logger = get_logger(__name__)
 router = APIRouter(prefix="/pdf", tags=["PDF"])
  
@@ -61,8 +62,12 @@ router = APIRouter(prefix="/pdf", tags=["PDF"])
 #         logger.exception("Blob processing trigger failed")
 #         raise HTTPException(status_code=500, detail="Blob processing failed")
 
-@router.post("/process-blob")
+@router.post("/process-blob", status_code=202)
 async def process_blob_pdf(req: BlobProcessRequest):
+    """
+    Queues the blob for processing and returns immediately with a job id.
+    Poll GET /pdf/jobs/{job_id} for progress.
+    """
  
     storage_account = req.storage_account
     container_name = req.container_name
@@ -77,7 +82,8 @@ async def process_blob_pdf(req: BlobProcessRequest):
             "container_name": container_name,
             "blob_file_name": blob_file_name,
             "file_id": file_id,
-            "ingestion_id": ingestion_id
+            "ingestion_id": ingestion_id,
+            "force": req.force
         }
     )
  
@@ -95,48 +101,126 @@ async def process_blob_pdf(req: BlobProcessRequest):
         )
  
     try:
-        # ---- your processing logic will go here later ----
-        # For now, just confirm receipt
-        pdf_stream = download_blob_as_bytes(
-            storage_account=req.storage_account,
-            container_name=req.container_name,
-            blob_file_name=req.blob_file_name
-        )
- 
-        pdf_bytes = pdf_stream.getvalue()
- 
-        result = process_pdf(
-            pdf_bytes=pdf_bytes,
-            file_name=blob_file_name,
-            file_id=file_id,
-            ingestion_id=ingestion_id
-        )
- 
-        logger.info(
-            "Blob processing completed successfully",
+        # Download + process_pdf run on the job worker pool,
+        # never on the event loop
+        job = pdf_job_queue.submit(req.model_dump())
+
+    except JobQueueFullError as e:
+        logger.warning(
+            "Blob processing rejected — job queue full",
             extra={
-                "file_id": file_id,
+                "blob_file_name": blob_file_name,
                 "ingestion_id": ingestion_id
             }
         )
+        raise HTTPException(status_code=503, detail=str(e))
  
-        return {
-            "storage_account": storage_account,
-            "container_name": container_name,
-            "blob_file_name": blob_file_name,
-            "file_id": file_id,
-            "ingestion_id": ingestion_id
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "status_url": f"/pdf/jobs/{job.job_id}",
+        "storage_account": storage_account,
+        "container_name": container_name,
+        "blob_file_name": blob_file_name,
+        "file_id": file_id,
+        "ingestion_id": ingestion_id
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_pdf_job(job_id: str):
+    job = pdf_job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/process-batch", status_code=202)
+async def process_batch_pdf(req: BatchProcessRequest):
+    """
+    Queues every blob of the batch (e.g. all attachments of one Ingestion)
+    on the job worker pool and returns one aggregate handle.
+    dbo.Ingestion status is updated once per ingestion, not per file.
+    Poll GET /pdf/batches/{batch_id} for progress.
+    """
+
+    items = [item.model_dump() for item in req.items]
+
+    logger.info(
+        "Batch processing trigger received",
+        extra={
+            "item_count": len(items),
+            "ingestion_ids": sorted({item["ingestion_id"] for item in items if item["ingestion_id"]})
         }
- 
-    except Exception as e:
-        logger.exception(
-            "Blob processing trigger failed",
-            extra={
-                "blob_file_name": blob_file_name,
-                "ingestion_id": ingestion_id
-            }
+    )
+
+    missing = [
+        index for index, item in enumerate(items)
+        if not item["file_id"] or not item["ingestion_id"]
+    ]
+    if missing:
+        logger.error(
+            "Missing mandatory identifiers in batch",
+            extra={"item_indexes": missing}
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(
+            status_code=400,
+            detail=f"file_id and ingestion_id are mandatory for every item (missing in items {missing})"
+        )
+
+    # Batches group files per ingestion, so ids must compare equal
+    # whatever their case / brace formatting
+    invalid = []
+    for index, item in enumerate(items):
+        try:
+            item["file_id"] = normalize_guid(item["file_id"], "FileID")
+            item["ingestion_id"] = normalize_guid(item["ingestion_id"], "IngestionID")
+        except ValueError:
+            invalid.append(index)
+    if invalid:
+        logger.error(
+            "Invalid identifiers in batch",
+            extra={"item_indexes": invalid}
+        )
+        raise HTTPException(
+            status_code=422,
+            detail=f"file_id and ingestion_id must be valid GUIDs (invalid in items {invalid})"
+        )
+
+    try:
+        batch = pdf_job_queue.submit_batch(items)
+
+    except JobQueueFullError as e:
+        logger.warning(
+            "Batch processing rejected — job queue full",
+            extra={"item_count": len(items)}
+        )
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {
+        "batch_id": batch.batch_id,
+        "status": batch.status,
+        "status_url": f"/pdf/batches/{batch.batch_id}",
+        "job_count": len(batch.jobs),
+        "jobs": [
+            {
+                "job_id": job.job_id,
+                "status_url": f"/pdf/jobs/{job.job_id}",
+                "blob_file_name": job.request["blob_file_name"],
+                "file_id": job.request["file_id"],
+                "ingestion_id": job.request["ingestion_id"]
+            }
+            for job in batch.jobs
+        ]
+    }
+
+
+@router.get("/batches/{batch_id}")
+async def get_pdf_batch(batch_id: str):
+    batch = pdf_job_queue.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
     
 
 @router.post("/hospitals", status_code=201)
@@ -180,9 +264,19 @@ def update_hospital_by_rc(
         "updatedFields": updated_fields
     }
 
+@router.post("/products/cache/invalidate")
+def invalidate_product_cache():
+    """
+    Reloads the product catalog on the next lookup. Call after writing
+    dbo.Product outside this process (seed script, direct SQL).
+    """
+    product_catalog.invalidate()
+    return {"status": "invalidated"}
+
 # @router.post("/productsinsert/by-injestion-id and po-id/{ingestion_id}/{po_id}")
 # def insert_products_by_ingestion_and_po(ingestion_id: str, po_id: str, payload: ProductInsert):
 #     product_id = insert_product(payload)
+#     product_catalog.invalidate()
 #     return {
 #         "status": "created",
 #         "ProductID": str(product_id)
@@ -1,11 +1,16 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 # from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 # from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+from contextlib import asynccontextmanager
 
 from api import pdf_api, manual_api
+from utils.jobs.outbox_dispatcher import OUTBOX_DISPATCHER_ENABLED, outbox_dispatcher
+from utils.metrics.metrics import PROMETHEUS_CONTENT_TYPE, render_metrics
+from utils.stage5_find_row_col_idx.redaction import shutdown_redaction_workers
 
 # from backend.utils.logging.middleware import RequestContextMiddleware
 # from backend.utils.logging.error_handler import log_error_to_db
@@ -46,6 +51,20 @@ def api_auth(
 
 
 
+# ======================================================
+# Background workers
+# ======================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Power Automate notifications are delivered from dbo.NotificationOutbox
+    if OUTBOX_DISPATCHER_ENABLED:
+        outbox_dispatcher.start()
+    yield
+    outbox_dispatcher.stop()
+    # Redaction worker processes are started on first use
+    shutdown_redaction_workers()
+
+
 # ======================================================
 # FastAPI App (Swagger ENABLED)
 # ======================================================
@@ -53,7 +72,8 @@ app = FastAPI(
     title="GSK PO Masking API",
     docs_url="/docs",
     redoc_url=None,
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 
@@ -89,6 +109,12 @@ async def health():
     return {"status": "ok"}
 
 
+# Prometheus scrape endpoint (stage timings, external calls, job gauges)
+@app.get("/metrics", tags=["Health Check"])
+def metrics():
+    return Response(content=render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # ======================================================
 
 
@@ -0,0 +1,194 @@
+import os
+import threading
+from io import RawIOBase, SEEK_CUR, SEEK_END, SEEK_SET
+
+from azure.storage.blob import BlobServiceClient, ContainerClient, ContentSettings
+from dotenv import load_dotenv
+from utils.logging.logger import get_logger
+from utils.metrics.metrics import external_call
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+_MB = 1024 * 1024
+
+# Parallel range requests per download / upload
+BLOB_MAX_CONCURRENCY = int(os.getenv("BLOB_MAX_CONCURRENCY", "4"))
+# Blobs up to this size are fetched with one GET, larger ones in chunks
+BLOB_MAX_SINGLE_GET_SIZE = int(os.getenv("BLOB_MAX_SINGLE_GET_MB", "8")) * _MB
+BLOB_MAX_CHUNK_GET_SIZE = int(os.getenv("BLOB_MAX_CHUNK_GET_MB", "4")) * _MB
+# Uploads up to this size are one PUT, larger ones are staged in blocks
+BLOB_MAX_SINGLE_PUT_SIZE = int(os.getenv("BLOB_MAX_SINGLE_PUT_MB", "8")) * _MB
+BLOB_MAX_BLOCK_SIZE = int(os.getenv("BLOB_MAX_BLOCK_MB", "4")) * _MB
+
+
+# ---------------------------------------------------------------
+# Process-wide client cache
+# ---------------------------------------------------------------
+_lock = threading.Lock()
+_service_clients: dict[str, BlobServiceClient] = {}
+_container_clients: dict[tuple[str, str], ContainerClient] = {}
+
+
+def get_blob_service_client(connection_string: str | None = None) -> BlobServiceClient:
+    """
+    One BlobServiceClient (and so one HTTP connection pool) per storage
+    account, created on first use and shared by every job.
+    """
+    connection_string = connection_string or os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    if not connection_string:
+        raise RuntimeError("AZURE_STORAGE_CONNECTION_STRING not found in .env")
+
+    with _lock:
+        client = _service_clients.get(connection_string)
+        if client is None:
+            client = BlobServiceClient.from_connection_string(
+                connection_string,
+                max_single_get_size=BLOB_MAX_SINGLE_GET_SIZE,
+                max_chunk_get_size=BLOB_MAX_CHUNK_GET_SIZE,
+                max_single_put_size=BLOB_MAX_SINGLE_PUT_SIZE,
+                max_block_size=BLOB_MAX_BLOCK_SIZE,
+            )
+            _service_clients[connection_string] = client
+            logger.info(
+                "Blob service client created",
+                extra={"storage_account": client.account_name}
+            )
+        return client
+
+
+def get_container_client(container_name: str,
+                         connection_string: str | None = None) -> ContainerClient:
+    """Cached ContainerClient per (storage account, container)."""
+    service_client = get_blob_service_client(connection_string)
+    key = (service_client.account_name, container_name)
+
+    with _lock:
+        client = _container_clients.get(key)
+        if client is None:
+            client = service_client.get_container_client(container_name)
+            _container_clients[key] = client
+        return client
+
+
+# ---------------------------------------------------------------
+# Zero-copy streams
+# ---------------------------------------------------------------
+class _SeekableBuffer(RawIOBase):
+    """
+    Seekable, writable view over a pre-sized bytearray.
+    Parallel chunk downloads seek + write straight into the final buffer.
+    """
+
+    def __init__(self, buffer: bytearray):
+        self._view = memoryview(buffer)
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        if whence == SEEK_CUR:
+            offset += self._pos
+        elif whence == SEEK_END:
+            offset += len(self._view)
+        self._pos = offset
+        return self._pos
+
+    def write(self, data) -> int:
+        end = self._pos + len(data)
+        if end > len(self._view):
+            raise ValueError("Blob is larger than its reported size")
+        self._view[self._pos:end] = data
+        self._pos = end
+        return len(data)
+
+
+class _MemoryViewReader(RawIOBase):
+    """Seekable reader over a memoryview; read() copies one chunk at a time."""
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        if whence == SEEK_CUR:
+            offset += self._pos
+        elif whence == SEEK_END:
+            offset += len(self._view)
+        self._pos = offset
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        chunk = self._view[self._pos:end].tobytes()
+        self._pos = end
+        return chunk
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+
+# ---------------------------------------------------------------
+# Download / upload
+# ---------------------------------------------------------------
+def download_blob_to_buffer(container_name: str, blob_name: str,
+                            max_concurrency: int = BLOB_MAX_CONCURRENCY) -> bytearray:
+    """
+    Downloads a blob into ONE bytearray sized from the blob properties.
+    Large blobs are fetched as parallel ranged GETs written in place,
+    so no intermediate BytesIO / bytes copy is made.
+    """
+    blob_client = get_container_client(container_name).get_blob_client(blob_name)
+
+    with external_call("blob", "download"):
+        downloader = blob_client.download_blob(max_concurrency=max_concurrency)
+
+        buffer = bytearray(downloader.size)
+        downloader.readinto(_SeekableBuffer(buffer))
+
+    return buffer
+
+
+def upload_blob_from_buffer(container_name: str, blob_name: str, data,
+                            content_type: str = "application/pdf",
+                            max_concurrency: int = BLOB_MAX_CONCURRENCY) -> str:
+    """
+    Uploads bytes / bytearray / memoryview without copying the payload;
+    blobs larger than the single-put size are staged as parallel blocks.
+    """
+    blob_client = get_container_client(container_name).get_blob_client(blob_name)
+    reader = _MemoryViewReader(data)
+
+    with external_call("blob", "upload"):
+        blob_client.upload_blob(
+            reader,
+            length=len(reader),
+            overwrite=True,
+            max_concurrency=max_concurrency,
+            content_settings=ContentSettings(content_type=content_type)
+        )
+
+    return blob_name
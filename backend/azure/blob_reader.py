@@ -1,6 +1,4 @@
-import os
-from io import BytesIO
-from azure.storage.blob import BlobServiceClient
+from utils.azure.blob_io import download_blob_to_buffer
 from utils.logging.logger import get_logger
 
 logger = get_logger(__name__)
@@ -9,10 +7,14 @@ def download_blob_as_bytes(
     storage_account: str,
     container_name: str,
     blob_file_name: str
-) -> BytesIO:
+) -> bytearray:
     """
-    Downloads a blob directly into memory as BytesIO.
+    Downloads a blob directly into memory.
     No filesystem usage.
+
+    Returns the pre-sized bytearray filled by the (parallel, chunked)
+    download; it is passed on as-is, without a BytesIO / getvalue() copy.
+    The connection comes from the shared client cache in blob_io.
     """
 
     logger.info(
@@ -24,21 +26,11 @@ def download_blob_as_bytes(
         }
     )
 
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-    )
-
-    blob_client = blob_service_client.get_blob_client(
-        container=container_name,
-        blob=blob_file_name
-    )
-
-    stream = blob_client.download_blob()
-    pdf_bytes = stream.readall()
+    pdf_bytes = download_blob_to_buffer(container_name, blob_file_name)
 
     logger.info(
         "Blob downloaded successfully",
         extra={"byte_size": len(pdf_bytes)}
     )
 
-    return BytesIO(pdf_bytes)
+    return pdf_bytes
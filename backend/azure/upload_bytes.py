@@ -1,30 +1,18 @@
-from azure.storage.blob import BlobServiceClient
-import os
-from azure.storage.blob import ContentSettings
+from utils.azure.blob_io import upload_blob_from_buffer
 
 def upload_bytes_to_blob(
     *,
     container_name: str,
     blob_name: str,
-    data: bytes,
+    data: bytes | bytearray | memoryview,
     content_type: str = "application/pdf"
 ):
-    blob_service_client = BlobServiceClient.from_connection_string(
-        os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-    )
-
-    blob_client = blob_service_client.get_blob_client(
-        container=container_name,
-        blob=blob_name
-    )
-
-    blob_client.upload_blob(
-        data,
-        overwrite=True,
-        content_settings=ContentSettings(
-            content_type="application/pdf"
-        )
+    # Shared cached client; data is streamed from a memoryview (no copy)
+    upload_blob_from_buffer(
+        container_name=container_name,
+        blob_name=blob_name,
+        data=data,
+        content_type=content_type
     )
 
     return blob_name  # acts as URL/reference
- 
\ No newline at end of file
@@ -0,0 +1,361 @@
+"""
+Local stand-ins for Azure Document Intelligence, Azure OpenAI,
+Blob Storage and Azure SQL.
+
+Replay : FakeADIClient / FakeLLMClient serve recorded payloads, so the
+         pipeline runs with no network access.
+Record : RecordingADIClient / RecordingLLMClient wrap the real clients
+         and capture every payload for later replay.
+Load   : FakeBlobStore and fake_sql_connect stand in for Blob Storage and
+         pyodbc; FakeADIClient can inject latency and 429 throttling.
+
+Corpus layout (one directory per document):
+
+    <corpus>/<document>/input.pdf
+    <corpus>/<document>/adi_result.json       AnalyzeResult.as_dict()
+    <corpus>/<document>/llm_responses.json    {request key: response content}
+"""
+import json
+import time
+import uuid
+import base64
+import random
+import hashlib
+import threading
+from types import SimpleNamespace
+
+from azure.ai.documentintelligence.models import AnalyzeResult
+from azure.core.exceptions import HttpResponseError
+from utils.stage0.adi_cache import content_hash
+
+ADI_FIXTURE = "adi_result.json"
+LLM_FIXTURE = "llm_responses.json"
+PDF_FIXTURE = "input.pdf"
+
+
+class MissingFixtureError(KeyError):
+    """A request was made that the recorded fixtures do not cover."""
+
+
+def llm_request_key(messages: list, response_format, temperature=None, max_tokens=None) -> str:
+    """Stable key of one chat request (schema name, sampling params, messages)."""
+    if isinstance(response_format, dict):
+        schema = response_format
+    else:
+        schema = getattr(response_format, "__name__", str(response_format))
+
+    payload = json.dumps(
+        {
+            "schema": schema,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _usage(content: str) -> SimpleNamespace:
+    # Rough token count so "LLM call completed" logs keep their shape
+    completion_tokens = max(1, len(content) // 4)
+    return SimpleNamespace(
+        prompt_tokens=0,
+        completion_tokens=completion_tokens,
+        total_tokens=completion_tokens,
+    )
+
+
+def _response(content: str, parsed=None) -> SimpleNamespace:
+    message = SimpleNamespace(content=content, parsed=parsed)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message)],
+        usage=_usage(content),
+    )
+
+
+# ======================================================
+# Azure Document Intelligence
+# ======================================================
+class _Poller:
+    def __init__(self, result):
+        self._result = result
+
+    def result(self):
+        return self._result
+
+
+class FakeADIClient:
+    """
+    Returns the recorded AnalyzeResult of the submitted PDF.
+
+    results    : {content_hash(pdf_bytes): AnalyzeResult.as_dict()}
+    latency    : seconds per analysis
+    throttle_rate / retry_after / max_retries :
+                 each attempt is answered with 429 at throttle_rate; like
+                 the SDK retry policy the client waits retry_after and
+                 tries again, raising HttpResponseError after max_retries.
+    """
+
+    def __init__(self, results: dict[str, dict], latency: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0,
+                 max_retries: int = 3):
+        self._results = results
+        self._latency = latency
+        self._throttle_rate = throttle_rate
+        self._retry_after = retry_after
+        self._max_retries = max_retries
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttled = 0
+
+    def begin_analyze_document(self, model_id: str, body=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+        pdf_bytes = body.bytes_source
+        if isinstance(pdf_bytes, str):
+            pdf_bytes = base64.b64decode(pdf_bytes)
+
+        key = content_hash(bytes(pdf_bytes))
+        if key not in self._results:
+            raise MissingFixtureError(f"No recorded AnalyzeResult for document {key}")
+
+        for attempt in range(self._max_retries + 1):
+            if random.random() >= self._throttle_rate:
+                break
+            with self._lock:
+                self.throttled += 1
+            if attempt == self._max_retries:
+                error = HttpResponseError(message="Too Many Requests (simulated)")
+                error.status_code = 429
+                raise error
+            time.sleep(self._retry_after)
+
+        if self._latency:
+            time.sleep(self._latency)
+        # Fresh object per call, like a real response
+        return _Poller(AnalyzeResult(json.loads(json.dumps(self._results[key]))))
+
+
+class RecordingADIClient:
+    """Wraps the real client and keeps the last result payload."""
+
+    def __init__(self, client):
+        self._client = client
+        self.payload = None
+
+    def begin_analyze_document(self, model_id: str, body=None, **kwargs):
+        result = self._client.begin_analyze_document(model_id=model_id, body=body, **kwargs).result()
+        self.payload = result.as_dict()
+        return _Poller(result)
+
+
+# ======================================================
+# Azure OpenAI
+# ======================================================
+class _FakeCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def parse(self, model: str, messages: list, response_format, **kwargs):
+        content = self._owner.lookup(messages, response_format, **kwargs)
+        return _response(content, parsed=response_format.model_validate_json(content))
+
+    def create(self, model: str, messages: list, response_format=None, **kwargs):
+        content = self._owner.lookup(messages, response_format, **kwargs)
+        return _response(content)
+
+
+class FakeLLMClient:
+    """
+    Serves recorded chat responses by request key.
+    Unknown requests raise MissingFixtureError (re-record the document).
+    """
+
+    def __init__(self, responses: dict[str, str], latency: float = 0.0):
+        self._responses = responses
+        self._latency = latency
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    def lookup(self, messages, response_format, temperature=None, max_tokens=None, **_):
+        with self._lock:
+            self.calls += 1
+        if self._latency:
+            time.sleep(self._latency)
+
+        key = llm_request_key(messages, response_format, temperature, max_tokens)
+        try:
+            return self._responses[key]
+        except KeyError:
+            raise MissingFixtureError(f"No recorded LLM response for request {key}") from None
+
+
+class _RecordingCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def parse(self, model: str, messages: list, response_format, **kwargs):
+        response = self._owner.client.chat.completions.parse(
+            model=model, messages=messages, response_format=response_format, **kwargs
+        )
+        parsed = response.choices[0].message.parsed
+        if parsed is not None:
+            self._owner.record(messages, response_format, parsed.model_dump_json(), **kwargs)
+        return response
+
+    def create(self, model: str, messages: list, response_format=None, **kwargs):
+        response = self._owner.client.chat.completions.create(
+            model=model, messages=messages, response_format=response_format, **kwargs
+        )
+        self._owner.record(messages, response_format, response.choices[0].message.content, **kwargs)
+        return response
+
+
+class RecordingLLMClient:
+    """Wraps the real AzureOpenAI client and captures every response."""
+
+    def __init__(self, client):
+        self.client = client
+        self.responses: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=_RecordingCompletions(self))
+
+    def record(self, messages, response_format, content: str,
+               temperature=None, max_tokens=None, **_):
+        key = llm_request_key(messages, response_format, temperature, max_tokens)
+        with self._lock:
+            self.responses[key] = content
+
+
+# ======================================================
+# Blob Storage
+# ======================================================
+class _FakeDownloader:
+    def __init__(self, data: bytes):
+        self._data = data
+        self.size = len(data)
+
+    def readinto(self, stream) -> int:
+        return stream.write(self._data)
+
+
+class _FakeBlobClient:
+    def __init__(self, store, container_name: str, blob_name: str):
+        self._store = store
+        self._key = (container_name, blob_name)
+
+    def download_blob(self, max_concurrency: int = 1, **kwargs):
+        self._store.wait()
+        try:
+            return _FakeDownloader(self._store.blobs[self._key])
+        except KeyError:
+            raise FileNotFoundError(f"Blob {self._key[1]} not found in {self._key[0]}") from None
+
+    def upload_blob(self, data, length=None, overwrite=False, **kwargs):
+        self._store.wait()
+        payload = data.read() if hasattr(data, "read") else bytes(data)
+        with self._store.lock:
+            if not overwrite and self._key in self._store.blobs:
+                raise FileExistsError(self._key[1])
+            self._store.blobs[self._key] = payload
+
+
+class _FakeContainerClient:
+    def __init__(self, store, container_name: str):
+        self._store = store
+        self._container_name = container_name
+
+    def get_blob_client(self, blob_name: str) -> _FakeBlobClient:
+        return _FakeBlobClient(self._store, self._container_name, blob_name)
+
+
+class FakeBlobStore:
+    """
+    In-memory containers; get_container_client is a drop-in for
+    utils.azure.blob_io.get_container_client.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.blobs: dict[tuple[str, str], bytes] = {}
+        self.lock = threading.Lock()
+        self._latency = latency
+
+    def wait(self):
+        if self._latency:
+            time.sleep(self._latency)
+
+    def put(self, container_name: str, blob_name: str, data: bytes):
+        with self.lock:
+            self.blobs[(container_name, blob_name)] = bytes(data)
+
+    def get_container_client(self, container_name: str, connection_string: str | None = None):
+        return _FakeContainerClient(self, container_name)
+
+
+# ======================================================
+# Azure SQL (pyodbc)
+# ======================================================
+class _FakeCursor:
+    """
+    Accepts any statement. INSERT ... OUTPUT returns one generated id per
+    inserted row; SELECTs return no rows.
+    """
+
+    def __init__(self, latency: float):
+        self._latency = latency
+        self._rows: list[tuple] = []
+
+    def execute(self, sql: str, *params):
+        if self._latency:
+            time.sleep(self._latency)
+
+        self._rows = []
+        if "OUTPUT" in sql.upper():
+            values = sql[sql.upper().rindex("VALUES"):]
+            row_count = values.count("), (") + 1
+            self._rows = [(str(uuid.uuid4()).upper(),) for _ in range(row_count)]
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        for params in seq_of_params:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self) -> list:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeSQLConnection:
+    def __init__(self, latency: float = 0.0, autocommit: bool = False):
+        self._latency = latency
+        self.autocommit = autocommit
+
+    def cursor(self) -> _FakeCursor:
+        return _FakeCursor(self._latency)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def fake_sql_connect(latency: float = 0.0):
+    """Drop-in for pyodbc.connect returning FakeSQLConnection objects."""
+    def connect(conn_str: str = "", autocommit: bool = False, **kwargs):
+        return FakeSQLConnection(latency=latency, autocommit=autocommit)
+    return connect
@@ -0,0 +1,329 @@
+"""
+Load test of POST /pdf/process-blob against local service stand-ins.
+
+Fires N requests shaped like Power Automate's BlobProcessRequest at the
+FastAPI app (in-process, httpx ASGI transport), polls each job to the
+end and reports throughput, p50 / p95 / p99 latencies, error rates and
+job queue depth. Blob Storage, Document Intelligence, Azure OpenAI and
+SQL are replaced by benchmarks/fakes.py, fed from the replay corpus
+(see benchmarks/replay.py for recording it).
+
+    # 40 jobs, all submitted at once, 4 job workers, ADI at 8s with 10% 429s
+    python -m benchmarks.loadtest --corpus benchmarks/corpus --requests 40 \\
+        --job-workers 4 --adi-latency 8 --adi-throttle-rate 0.1 --output load.json
+"""
+import os
+import math
+import time
+import uuid
+import json
+import asyncio
+import argparse
+import platform
+import statistics
+from datetime import datetime, timezone
+
+INPUT_CONTAINER = "loadtest-input"
+
+_FINISHED = ("COMPLETED", "FAILED")
+
+
+def _prepare_environment(args):
+    # Must run before the app (and so every pipeline module) is imported
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    os.environ.update({
+        "ENV": "local",
+        "LOG_LEVEL": args.log_level,
+        "PDF_JOB_WORKERS": str(args.job_workers),
+        "PDF_JOB_MAX_PENDING": str(args.max_pending),
+        # Keep every job of the run pollable until the end
+        "PDF_JOB_HISTORY": str(args.requests + 1000),
+        "DB_POOL_SIZE": str(args.db_pool_size),
+        "ADI_CACHE_ENABLED": "false",
+        "LLM_CACHE_ENABLED": "false",
+        # Stand-ins only: nothing may reach the real services
+        "AZURE_OPENAI_ENDPOINT": "https://loadtest.invalid",
+        "AZURE_OPENAI_API_KEY": "loadtest",
+        "AZURE_SQL_CONN": "loadtest",
+        "POWER_AUTOMATE_WEBHOOK_URL": "",
+        "POWER_AUTOMATE_ERROR_WEBHOOK_URL": "",
+        "OUTBOX_DISPATCHER_ENABLED": "false",
+    })
+    if args.stage_workers:
+        os.environ["PIPELINE_STAGE_WORKERS"] = str(args.stage_workers)
+
+
+def install_stand_ins(corpus: str, documents: list[str], args) -> dict:
+    """Wires the fakes into the already imported app modules."""
+    import pyodbc
+    from db import db_connection
+    from utils.azure import blob_io
+    from utils.stage0 import document_analysis
+    from utils.stage0.adi_cache import content_hash
+    from benchmarks.fakes import FakeADIClient, FakeBlobStore, FakeLLMClient, fake_sql_connect
+    from benchmarks.replay import load_document, swap_llm_client
+
+    blob_store = FakeBlobStore(latency=args.blob_latency)
+    adi_results = {}
+    llm_responses = {}
+
+    for name in documents:
+        pdf_bytes, adi_payload, responses = load_document(os.path.join(corpus, name))
+        blob_store.put(INPUT_CONTAINER, f"{name}.pdf", pdf_bytes)
+        adi_results[content_hash(pdf_bytes)] = adi_payload
+        llm_responses.update(responses)
+
+    adi = FakeADIClient(
+        adi_results,
+        latency=args.adi_latency,
+        throttle_rate=args.adi_throttle_rate,
+        retry_after=args.adi_retry_after,
+        max_retries=args.adi_max_retries,
+    )
+    llm = FakeLLMClient(llm_responses, latency=args.llm_latency)
+
+    pyodbc.connect = fake_sql_connect(latency=args.sql_latency)
+    db_connection._pool = None
+    blob_io.get_container_client = blob_store.get_container_client
+    document_analysis._client = adi
+    document_analysis.ADI_CACHE_ENABLED = False
+    swap_llm_client(llm)
+
+    return {"adi": adi, "llm": llm, "blob": blob_store}
+
+
+# ======================================================
+# Load generation
+# ======================================================
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+async def _submit_and_wait(client, index: int, documents: list[str], args) -> dict:
+    payload = {
+        "storage_account": "loadtest",
+        "container_name": INPUT_CONTAINER,
+        "blob_file_name": f"{documents[index % len(documents)]}.pdf",
+        "file_id": str(uuid.uuid4()).upper(),
+        "ingestion_id": str(uuid.uuid4()).upper(),
+        # The corpus repeats documents; without force identical PDFs coalesce
+        "force": not args.dedupe,
+    }
+
+    started = time.perf_counter()
+    response = await client.post("/pdf/process-blob", json=payload)
+    sample = {
+        "http_status": response.status_code,
+        "submit_s": time.perf_counter() - started,
+    }
+
+    if response.status_code != 202:
+        sample["outcome"] = "REJECTED" if response.status_code == 503 else "HTTP_ERROR"
+        return sample
+
+    status_url = response.json()["status_url"]
+    deadline = started + args.job_timeout
+
+    while True:
+        await asyncio.sleep(args.poll_interval)
+        job = (await client.get(status_url)).json()
+
+        if job["status"] in _FINISHED:
+            break
+        if time.perf_counter() > deadline:
+            sample["outcome"] = "TIMEOUT"
+            return sample
+
+    created_at = _parse_time(job["created_at"])
+    started_at = _parse_time(job["started_at"])
+    finished_at = _parse_time(job["finished_at"])
+
+    sample.update({
+        "outcome": job["status"],
+        "process_status": (job.get("result") or {}).get("status"),
+        "end_to_end_s": time.perf_counter() - started,
+        "queue_wait_s": (started_at - created_at).total_seconds() if started_at else None,
+        "processing_s": (finished_at - started_at).total_seconds() if started_at else None,
+    })
+    return sample
+
+
+async def _sample_queue(samples: list[dict], interval: float):
+    from utils.jobs.pdf_job_queue import pdf_job_queue
+    from utils.metrics.metrics import JOBS_IN_FLIGHT
+
+    started = time.perf_counter()
+    while True:
+        samples.append({
+            "t": round(time.perf_counter() - started, 2),
+            "queued": JOBS_IN_FLIGHT.get(state="queued"),
+            "running": JOBS_IN_FLIGHT.get(state="running"),
+            "pending": pdf_job_queue.pending_count(),
+        })
+        await asyncio.sleep(interval)
+
+
+async def run_load(app, documents: list[str], args) -> tuple[list[dict], list[dict], float]:
+    import httpx
+
+    samples: list[dict] = []
+    depth: list[dict] = []
+    semaphore = asyncio.Semaphore(args.concurrency or args.requests)
+
+    async def one(index: int):
+        # A client slot is held until its job finishes (closed loop)
+        async with semaphore:
+            samples.append(await _submit_and_wait(client, index, documents, args))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        sampler = asyncio.create_task(_sample_queue(depth, args.sample_interval))
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one(i) for i in range(args.requests)))
+        finally:
+            elapsed = time.perf_counter() - started
+            sampler.cancel()
+
+    return samples, depth, elapsed
+
+
+# ======================================================
+# Report
+# ======================================================
+def percentiles(values: list[float]) -> dict:
+    """Nearest-rank p50 / p95 / p99 plus mean and max."""
+    if not values:
+        return {}
+
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 4),
+        "p50": round(rank(50), 4),
+        "p95": round(rank(95), 4),
+        "p99": round(rank(99), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+def build_report(samples: list[dict], depth: list[dict], elapsed: float,
+                 stand_ins: dict, args) -> dict:
+    from utils.metrics.metrics import EXTERNAL_CALL_SECONDS, PIPELINE_STAGE_SECONDS
+    from benchmarks.replay import git_commit
+
+    outcomes: dict[str, int] = {}
+    for sample in samples:
+        outcomes[sample["outcome"]] = outcomes.get(sample["outcome"], 0) + 1
+
+    completed = [s for s in samples if s["outcome"] == "COMPLETED"]
+    duplicates = sum(1 for s in completed if s.get("process_status") == "DUPLICATE")
+    finished = [s for s in samples if s["outcome"] in _FINISHED]
+
+    def totals(histogram):
+        return [
+            {**row, "mean_s": round(row["sum"] / row["count"], 4) if row["count"] else None}
+            for row in histogram.totals()
+        ]
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {
+            key: value for key, value in vars(args).items()
+            if key not in ("corpus", "output")
+        },
+        "duration_s": round(elapsed, 3),
+        "requests": len(samples),
+        "throughput_jobs_per_s": round(len(completed) / elapsed, 4) if elapsed else None,
+        "outcomes": outcomes,
+        "deduplicated": duplicates,
+        "error_rate": round(1 - len(completed) / len(samples), 4) if samples else None,
+        "latency_s": {
+            "submit": percentiles([s["submit_s"] for s in samples]),
+            "end_to_end": percentiles([s["end_to_end_s"] for s in finished]),
+            "queue_wait": percentiles([s["queue_wait_s"] for s in finished if s["queue_wait_s"] is not None]),
+            "processing": percentiles([s["processing_s"] for s in finished if s["processing_s"] is not None]),
+        },
+        "queue_depth": {
+            "max_queued": max((d["queued"] for d in depth), default=0),
+            "mean_queued": round(statistics.fmean(d["queued"] for d in depth), 2) if depth else 0,
+            "max_running": max((d["running"] for d in depth), default=0),
+            "samples": depth,
+        },
+        "stand_ins": {
+            "adi_calls": stand_ins["adi"].calls,
+            "adi_throttled": stand_ins["adi"].throttled,
+            "llm_calls": stand_ins["llm"].calls,
+        },
+        "external_calls": totals(EXTERNAL_CALL_SECONDS),
+        "pipeline_stages": totals(PIPELINE_STAGE_SECONDS),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test of /pdf/process-blob with local stand-ins")
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="jobs in flight at once (default: all requests at once)")
+    parser.add_argument("--job-workers", type=int, default=2, help="PDF_JOB_WORKERS")
+    parser.add_argument("--max-pending", type=int, default=50, help="PDF_JOB_MAX_PENDING")
+    parser.add_argument("--stage-workers", type=int, default=0,
+                        help="PIPELINE_STAGE_WORKERS (default: app default)")
+    parser.add_argument("--db-pool-size", type=int, default=5, help="DB_POOL_SIZE")
+    parser.add_argument("--adi-latency", type=float, default=5.0)
+    parser.add_argument("--adi-throttle-rate", type=float, default=0.0,
+                        help="probability that an ADI attempt is answered with 429")
+    parser.add_argument("--adi-retry-after", type=float, default=1.0)
+    parser.add_argument("--adi-max-retries", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=2.0)
+    parser.add_argument("--blob-latency", type=float, default=0.05)
+    parser.add_argument("--sql-latency", type=float, default=0.01)
+    parser.add_argument("--dedupe", action="store_true",
+                        help="let repeated documents coalesce / short-circuit (default: force every run)")
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--job-timeout", type=float, default=900.0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    _prepare_environment(args)
+
+    from benchmarks.replay import list_documents
+
+    documents = list_documents(args.corpus)
+    if not documents:
+        raise SystemExit(f"No recorded documents found under {args.corpus}")
+
+    from app import app
+
+    stand_ins = install_stand_ins(args.corpus, documents, args)
+    samples, depth, elapsed = asyncio.run(run_load(app, documents, args))
+    report = build_report(samples, depth, elapsed, stand_ins, args)
+
+    print(
+        f"{report['requests']} requests in {report['duration_s']}s: "
+        f"{report['throughput_jobs_per_s']} jobs/s, outcomes {report['outcomes']}, "
+        f"end-to-end p95 {report['latency_s']['end_to_end'].get('p95')}s, "
+        f"max queued {report['queue_depth']['max_queued']}"
+    )
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Offline replay benchmark of process_pdf.
+
+Runs the full pipeline over a corpus of recorded POs with ADI and
+OpenAI served by local fakes (benchmarks/fakes.py); no DB / Blob access
+happens because documents run without ingestion / file ids.
+
+    # replay, 3 runs per document, JSON for trend comparison
+    python -m benchmarks.replay --corpus benchmarks/corpus --repeat 3 \\
+        --output bench.json --compare bench_main.json
+
+    # (re)record fixtures for every <corpus>/<doc>/input.pdf (live Azure)
+    python -m benchmarks.replay --corpus benchmarks/corpus --record
+
+Per stage: wall time, CPU time, RSS / peak RSS, tracemalloc peak and net
+allocated bytes / blocks. Stages run one at a time by default so the
+process-wide CPU / memory numbers belong to a single stage.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tracemalloc
+import dataclasses
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+def _prepare_environment(args):
+    # Must run before any pipeline module reads its settings
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    os.environ["PIPELINE_STAGE_WORKERS"] = str(args.stage_workers)
+    os.environ["ADI_CACHE_ENABLED"] = "false"
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+
+    if not args.record:
+        # The OpenAI client is built at import time; replay never uses it
+        os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://replay.invalid")
+        os.environ.setdefault("AZURE_OPENAI_API_KEY", "replay")
+
+
+# ======================================================
+# Measurements
+# ======================================================
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class StageProfiler:
+    """Wraps Stage.func to record wall / CPU / memory per stage run."""
+
+    def __init__(self, track_allocations: bool = True):
+        self.track_allocations = track_allocations
+        self.results: dict[str, dict] = {}
+
+    def wrap(self, stage):
+        def run(**kwargs):
+            if self.track_allocations:
+                tracemalloc.reset_peak()
+                traced_before, _ = tracemalloc.get_traced_memory()
+            blocks_before = sys.getallocatedblocks()
+            wall_before = time.perf_counter()
+            cpu_before = time.process_time()
+            outcome = "error"
+
+            try:
+                result = stage.func(**kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                metrics = {
+                    "outcome": outcome,
+                    "wall_s": round(time.perf_counter() - wall_before, 4),
+                    "cpu_s": round(time.process_time() - cpu_before, 4),
+                    "rss_mb": _rss_mb(),
+                    "peak_rss_mb": _peak_rss_mb(),
+                    "net_blocks": sys.getallocatedblocks() - blocks_before,
+                }
+                if self.track_allocations:
+                    traced_after, traced_peak = tracemalloc.get_traced_memory()
+                    metrics["alloc_peak_mb"] = round((traced_peak - traced_before) / 1024 / 1024, 2)
+                    metrics["alloc_net_mb"] = round((traced_after - traced_before) / 1024 / 1024, 2)
+                self.results[stage.name] = metrics
+
+        return dataclasses.replace(stage, func=run)
+
+
+# ======================================================
+# Fixture installation
+# ======================================================
+def swap_llm_client(new_client):
+    """Points the gateway (and modules that imported its client) at new_client."""
+    from utils.llm import llm_gateway
+
+    original = llm_gateway.client
+    for module in list(sys.modules.values()):
+        if getattr(module, "client", None) is original:
+            module.client = new_client
+    return original
+
+
+def load_document(doc_dir: str) -> tuple[bytes, dict, dict]:
+    from benchmarks.fakes import ADI_FIXTURE, LLM_FIXTURE, PDF_FIXTURE
+
+    with open(os.path.join(doc_dir, PDF_FIXTURE), "rb") as f:
+        pdf_bytes = f.read()
+    with open(os.path.join(doc_dir, ADI_FIXTURE), encoding="utf-8") as f:
+        adi_payload = json.load(f)
+    with open(os.path.join(doc_dir, LLM_FIXTURE), encoding="utf-8") as f:
+        llm_responses = json.load(f)
+
+    return pdf_bytes, adi_payload, llm_responses
+
+
+def list_documents(corpus: str, require_fixtures: bool = True) -> list[str]:
+    from benchmarks.fakes import ADI_FIXTURE, LLM_FIXTURE, PDF_FIXTURE
+
+    required = [PDF_FIXTURE] + ([ADI_FIXTURE, LLM_FIXTURE] if require_fixtures else [])
+    documents = []
+    for name in sorted(os.listdir(corpus)):
+        doc_dir = os.path.join(corpus, name)
+        if os.path.isdir(doc_dir) and all(os.path.exists(os.path.join(doc_dir, f)) for f in required):
+            documents.append(name)
+    return documents
+
+
+# ======================================================
+# Record / replay
+# ======================================================
+def record_document(doc_dir: str):
+    import process_po
+    from utils.stage0 import document_analysis
+    from utils.llm import llm_gateway
+    from benchmarks.fakes import (
+        ADI_FIXTURE, LLM_FIXTURE, PDF_FIXTURE, RecordingADIClient, RecordingLLMClient,
+    )
+
+    with open(os.path.join(doc_dir, PDF_FIXTURE), "rb") as f:
+        pdf_bytes = f.read()
+
+    adi = RecordingADIClient(document_analysis.get_adi_client())
+    llm = RecordingLLMClient(llm_gateway.client)
+
+    document_analysis._client = adi
+    original_llm = swap_llm_client(llm)
+    try:
+        process_po.process_pdf(pdf_bytes, file_name=os.path.basename(doc_dir))
+    finally:
+        document_analysis._client = adi._client
+        swap_llm_client(original_llm)
+
+    with open(os.path.join(doc_dir, ADI_FIXTURE), "w", encoding="utf-8") as f:
+        json.dump(adi.payload, f)
+    with open(os.path.join(doc_dir, LLM_FIXTURE), "w", encoding="utf-8") as f:
+        json.dump(llm.responses, f, indent=1, sort_keys=True)
+
+    print(f"Recorded {doc_dir}: {len(llm.responses)} LLM responses")
+
+
+def replay_document(doc_dir: str, track_allocations: bool = True,
+                    adi_latency: float = 0.0, llm_latency: float = 0.0) -> dict:
+    import process_po
+    from utils.stage0 import document_analysis
+    from utils.stage0.adi_cache import content_hash
+    from benchmarks.fakes import FakeADIClient, FakeLLMClient
+
+    pdf_bytes, adi_payload, llm_responses = load_document(doc_dir)
+
+    adi = FakeADIClient({content_hash(pdf_bytes): adi_payload}, latency=adi_latency)
+    llm = FakeLLMClient(llm_responses, latency=llm_latency)
+    profiler = StageProfiler(track_allocations=track_allocations)
+
+    original_graph = process_po.PIPELINE_GRAPH
+    original_adi = document_analysis._client
+
+    document_analysis._client = adi
+    original_llm = swap_llm_client(llm)
+    process_po.PIPELINE_GRAPH = [profiler.wrap(stage) for stage in original_graph]
+
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    error = None
+    try:
+        process_po.process_pdf(pdf_bytes, file_name=os.path.basename(doc_dir))
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    finally:
+        process_po.PIPELINE_GRAPH = original_graph
+        document_analysis._client = original_adi
+        swap_llm_client(original_llm)
+
+    return {
+        "outcome": "error" if error else "ok",
+        "error": error,
+        "wall_s": round(time.perf_counter() - started, 4),
+        "cpu_s": round(time.process_time() - cpu_started, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+        "adi_calls": adi.calls,
+        "llm_calls": llm.calls,
+        "stages": profiler.results,
+    }
+
+
+def _median_stages(runs: list[dict]) -> dict[str, dict]:
+    samples: dict[str, dict[str, list]] = {}
+    for run in runs:
+        for stage, metrics in run["stages"].items():
+            for name, value in metrics.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    samples.setdefault(stage, {}).setdefault(name, []).append(value)
+
+    return {
+        stage: {name: round(statistics.median(values), 4) for name, values in metrics.items()}
+        for stage, metrics in samples.items()
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(corpus: str, repeat: int = 3, warmup: int = 1,
+                  track_allocations: bool = True, stage_workers: int = 1,
+                  adi_latency: float = 0.0, llm_latency: float = 0.0) -> dict:
+    documents = list_documents(corpus)
+    if not documents:
+        raise SystemExit(f"No recorded documents found under {corpus}")
+
+    if track_allocations:
+        tracemalloc.start()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "repeat": repeat,
+            "warmup": warmup,
+            "stage_workers": stage_workers,
+            "tracemalloc": track_allocations,
+            "adi_latency_s": adi_latency,
+            "llm_latency_s": llm_latency,
+        },
+        "documents": {},
+    }
+
+    all_runs = []
+    for name in documents:
+        doc_dir = os.path.join(corpus, name)
+
+        # Warm-up runs fill import-time / first-call caches and are not reported
+        for _ in range(warmup):
+            replay_document(doc_dir, track_allocations, adi_latency, llm_latency)
+
+        runs = [
+            replay_document(doc_dir, track_allocations, adi_latency, llm_latency)
+            for _ in range(repeat)
+        ]
+        all_runs.extend(runs)
+
+        report["documents"][name] = {
+            "runs": runs,
+            "median_wall_s": round(statistics.median(r["wall_s"] for r in runs), 4),
+            "median_stages": _median_stages(runs),
+        }
+        print(f"{name}: median {report['documents'][name]['median_wall_s']}s over {repeat} runs")
+
+    report["median_stages"] = _median_stages(all_runs)
+
+    if track_allocations:
+        tracemalloc.stop()
+
+    return report
+
+
+def compare_reports(current: dict, baseline: dict, metric: str = "wall_s") -> list[str]:
+    """Per-stage median `metric` of current vs baseline, as printable lines."""
+    lines = [f"{'stage':<32} {'baseline':>10} {'current':>10} {'delta':>8}"]
+    base = baseline.get("median_stages", {})
+
+    for stage, metrics in current.get("median_stages", {}).items():
+        now = metrics.get(metric)
+        before = base.get(stage, {}).get(metric)
+        if now is None or before is None:
+            continue
+        delta = f"{(now - before) / before:+.1%}" if before else "n/a"
+        lines.append(f"{stage:<32} {before:>10.4f} {now:>10.4f} {delta:>8}")
+
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline replay benchmark of process_pdf")
+    parser.add_argument("--corpus", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--stage-workers", type=int, default=1,
+                        help="PIPELINE_STAGE_WORKERS; >1 overlaps stages and blurs per-stage CPU / memory")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="skip allocation tracking (lower overhead)")
+    parser.add_argument("--adi-latency", type=float, default=0.0,
+                        help="simulated seconds per ADI call")
+    parser.add_argument("--llm-latency", type=float, default=0.0,
+                        help="simulated seconds per LLM call")
+    parser.add_argument("--record", action="store_true",
+                        help="record fixtures with the live Azure services instead of replaying")
+    args = parser.parse_args(argv)
+
+    _prepare_environment(args)
+
+    if args.record:
+        for name in list_documents(args.corpus, require_fixtures=False):
+            record_document(os.path.join(args.corpus, name))
+        return
+
+    report = run_benchmark(
+        args.corpus,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        track_allocations=not args.no_tracemalloc,
+        stage_workers=args.stage_workers,
+        adi_latency=args.adi_latency,
+        llm_latency=args.llm_latency,
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare_reports(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,235 @@
 import os
 import time
+import random
+import threading
+from contextlib import contextmanager
+
 import pyodbc
 pyodbc.pooling = True
 from dotenv import load_dotenv
+from utils.metrics.metrics import external_call
 
 load_dotenv()
 
+# =========================
+# Pool settings
+# =========================
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Idle seconds after which a pooled connection is re-checked with SELECT 1
+DB_POOL_VALIDATE_AFTER = float(os.getenv("DB_POOL_VALIDATE_AFTER", "300"))
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", "5"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "1"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "10"))
 
-def get_connection(max_retries=5, delay=5, first_try_delay=5):
-    """
-    Establish connection to Azure SQL with enhanced retry handling.
-    """
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection became free within DB_POOL_TIMEOUT."""
+
+
+def _get_conn_str() -> str:
     conn_str = os.getenv("AZURE_SQL_CONN")
     if not conn_str:
         raise ValueError(" AZURE_SQL_CONN environment variable not set.")
-    
-    print(" Waiting a few seconds before first connection attempt...")
-    time.sleep(first_try_delay)
-    
+    return conn_str
+
+
+def _connect_with_retry(conn_str: str, max_retries: int = DB_CONNECT_RETRIES,
+                        base_delay: float = DB_RETRY_BASE_DELAY,
+                        max_delay: float = DB_RETRY_MAX_DELAY):
+    """
+    Opens a new connection. Sleeps ONLY after a failed attempt,
+    using exponential backoff with jitter.
+    """
     last_error = None  # Store the last error to raise if all attempts fail
-    
+
     for attempt in range(max_retries):
         try:
-            print(f" Attempting connection (try {attempt+1}/{max_retries})...")
-            
             # Remove timeout parameter - it's already in connection string
-            conn = pyodbc.connect(conn_str, autocommit=True)
-            
-            # Test the connection with a simple query
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            
-            print(" Connection established successfully.")
-            return conn
-            
-        except (pyodbc.InterfaceError, pyodbc.OperationalError, pyodbc.Error) as e:
-            print(f" Connection Error: {e}")
+            return pyodbc.connect(conn_str, autocommit=True)
+
+        except pyodbc.Error as e:
+            print(f" Connection Error (try {attempt+1}/{max_retries}): {e}")
             last_error = e
-        
+
         if attempt < max_retries - 1:
-            print(f" Retrying in {delay} seconds...")
-            time.sleep(delay)
-    
+            backoff = min(max_delay, base_delay * (2 ** attempt))
+            time.sleep(random.uniform(backoff / 2, backoff))
+
     print(" All connection attempts failed.")
     if last_error:
         raise last_error
-    else:
-        raise Exception("Connection failed after all retries")
- 
\ No newline at end of file
+    raise Exception("Connection failed after all retries")
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """True when the error means the connection itself is unusable."""
+    if isinstance(exc, (pyodbc.InterfaceError, pyodbc.OperationalError)):
+        return True
+    # SQLSTATE class 08 = connection exception
+    sqlstate = exc.args[0] if getattr(exc, "args", None) else ""
+    return isinstance(sqlstate, str) and sqlstate.startswith("08")
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of pyodbc connections to Azure SQL.
+
+    - Connections are opened on demand, up to max_size.
+    - A connection is validated (SELECT 1) only when it has been idle
+      longer than validate_after; broken ones are replaced.
+    - Waiting for a free connection is bounded by timeout.
+    """
+
+    def __init__(self, conn_str: str, max_size: int = DB_POOL_SIZE,
+                 timeout: float = DB_POOL_TIMEOUT,
+                 validate_after: float = DB_POOL_VALIDATE_AFTER):
+        self._conn_str = conn_str
+        self._max_size = max_size
+        self._timeout = timeout
+        self._validate_after = validate_after
+
+        self._idle: list[tuple[pyodbc.Connection, float]] = []  # (conn, last_used)
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self._timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self._max_size:
+                    # Reserve a slot; connect outside the lock
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No DB connection available within {self._timeout}s "
+                        f"(pool size {self._max_size})"
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and time.monotonic() - last_used > self._validate_after:
+                if not self._is_alive(conn):
+                    self._close_quietly(conn)
+                    conn = None
+
+            if conn is None:
+                conn = _connect_with_retry(self._conn_str)
+
+        except BaseException:
+            self._release_slot()
+            raise
+
+        return conn
+
+    def _release(self, conn, broken: bool):
+        if not broken:
+            try:
+                if not conn.autocommit:
+                    conn.rollback()
+                    conn.autocommit = True
+            except pyodbc.Error:
+                broken = True
+
+        if broken:
+            self._close_quietly(conn)
+            self._release_slot()
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_alive(conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        # sql/pool_acquire = waiting for a free connection,
+        # sql/connection   = time the caller held it (all its statements)
+        with external_call("sql", "pool_acquire"):
+            conn = self._acquire()
+        broken = False
+        try:
+            with external_call("sql", "connection"):
+                yield conn
+        except pyodbc.Error as e:
+            broken = _is_connection_error(e)
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_get_conn_str())
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Borrow a connection from the process-wide pool:
+
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            ...
+
+    The connection goes back to the pool on exit (do NOT close it).
+    """
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def get_connection(max_retries=DB_CONNECT_RETRIES, delay=DB_RETRY_BASE_DELAY, first_try_delay=0):
+    """
+    Establish a dedicated (non-pooled) connection to Azure SQL.
+    Used by seed / maintenance scripts; request paths use pooled_connection().
+    """
+    conn_str = _get_conn_str()
+
+    if first_try_delay:
+        time.sleep(first_try_delay)
+
+    return _connect_with_retry(conn_str, max_retries=max_retries, base_delay=delay)
@@ -2,7 +2,7 @@ import os
 import pyodbc
 from dotenv import load_dotenv
 # from db_insert_operations import get_connection
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 
 
 load_dotenv()
@@ -36,47 +36,37 @@ def delete_all_data(delete_products=False):
         print(" Cancelled.")
         return
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    print("\n Deleting ALL data in correct FK order...\n")
+        print("\n Deleting ALL data in correct FK order...\n")
 
-    delete_order = [
-        "POItem",
-        "Invoice",
-        "MaskedFile",
-        "POHeader",
-        "FileUpload",
-        "Ingestion",
-        "Hospital"
-    ]
+        delete_order = [
+            "POItem",
+            "Invoice",
+            "MaskedFile",
+            "POHeader",
+            "FileUpload",
+            "Ingestion",
+            "Hospital"
+        ]
 
-    # Product delete is optional
-    if delete_products:
-        delete_order.append("Product")
+        # Product delete is optional
+        if delete_products:
+            delete_order.append("Product")
 
-    for table in delete_order:
-        cursor.execute(f"DELETE FROM dbo.{table}")
-        print(f" Cleared → {table}")
+        for table in delete_order:
+            cursor.execute(f"DELETE FROM dbo.{table}")
+            print(f" Cleared → {table}")
 
-    print("\n All data deleted successfully!\n")
+        print("\n All data deleted successfully!\n")
 
 
 # ============================================================
 #  DELETE BY FileID
 # ============================================================
-def delete_by_file_id(file_id):
-    """
-    Deletes a single FILE + ALL related records:
-    - MaskedFile
-    - POItem
-    - Invoice
-    - POHeader
-    - FileUpload
-    """
-    conn = get_connection()
-    cursor = conn.cursor()
-
+def _delete_by_file_id(cursor, file_id):
+    # Runs on the caller's cursor / transaction
     print(f"\nDeleting records linked to FileID = {file_id}\n")
 
     # Delete related Masked Files
@@ -103,7 +93,24 @@ def delete_by_file_id(file_id):
     cursor.execute("DELETE FROM dbo.FileUpload WHERE FileID = ?", file_id)
     print(" Deleted → FileUpload")
 
-    print("\n All records linked to FileID deleted!\n")
+
+def delete_by_file_id(file_id):
+    """
+    Deletes a single FILE + ALL related records (one transaction):
+    - MaskedFile
+    - POItem
+    - Invoice
+    - POHeader
+    - FileUpload
+    """
+    with pooled_connection() as conn:
+        conn.autocommit = False
+        cursor = conn.cursor()
+
+        _delete_by_file_id(cursor, file_id)
+
+        conn.commit()
+        print("\n All records linked to FileID deleted!\n")
 
 
 # ============================================================
@@ -114,21 +121,21 @@ def delete_by_po_id(po_id):
     Deletes 1 Purchase Order + POItems + Invoices.
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    print(f"\n Deleting PO and linked items → POID = {po_id}\n")
+        print(f"\n Deleting PO and linked items → POID = {po_id}\n")
 
-    cursor.execute("DELETE FROM dbo.POItem WHERE POID = ?", po_id)
-    print("Deleted → POItem")
+        cursor.execute("DELETE FROM dbo.POItem WHERE POID = ?", po_id)
+        print("Deleted → POItem")
 
-    cursor.execute("DELETE FROM dbo.Invoice WHERE POID = ?", po_id)
-    print(" Deleted → Invoice")
+        cursor.execute("DELETE FROM dbo.Invoice WHERE POID = ?", po_id)
+        print(" Deleted → Invoice")
 
-    cursor.execute("DELETE FROM dbo.POHeader WHERE POID = ?", po_id)
-    print(" Deleted → POHeader")
+        cursor.execute("DELETE FROM dbo.POHeader WHERE POID = ?", po_id)
+        print(" Deleted → POHeader")
 
-    print("\n PO deletion completed!\n")
+        print("\n PO deletion completed!\n")
 
 
 # ============================================================
@@ -136,7 +143,8 @@ def delete_by_po_id(po_id):
 # ============================================================
 def delete_by_ingestion_id(ingestion_id):
     """
-    Deletes everything under one Ingestion:
+    Deletes everything under one Ingestion (one transaction, one
+    pooled connection):
     - MaskedFile
     - FileUpload
     - POHeader
@@ -145,23 +153,28 @@ def delete_by_ingestion_id(ingestion_id):
     - Ingestion
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        conn.autocommit = False
+        cursor = conn.cursor()
+
+        print(f"\nDeleting all data for IngestionID = {ingestion_id}\n")
 
-    print(f"\nDeleting all data for IngestionID = {ingestion_id}\n")
+        # First fetch all FileIDs for this ingestion
+        cursor.execute("SELECT FileID FROM dbo.FileUpload WHERE IngestionID = ?", ingestion_id)
+        file_ids = [row[0] for row in cursor.fetchall()]
 
-    # First fetch all FileIDs for this ingestion
-    cursor.execute("SELECT FileID FROM dbo.FileUpload WHERE IngestionID = ?", ingestion_id)
-    file_ids = [row[0] for row in cursor.fetchall()]
+        # Same cursor: borrowing a second pooled connection here could
+        # wait on (or starve) the pool this connection came from
+        for file_id in file_ids:
+            _delete_by_file_id(cursor, file_id)
 
-    for file_id in file_ids:
-        delete_by_file_id(file_id)
+        # Delete the ingestion record after its children are deleted
+        cursor.execute("DELETE FROM dbo.Ingestion WHERE IngestionID = ?", ingestion_id)
+        print(" Deleted → Ingestion")
 
-    # Delete the ingestion record after its children are deleted
-    cursor.execute("DELETE FROM dbo.Ingestion WHERE IngestionID = ?", ingestion_id)
-    print(" Deleted → Ingestion")
+        conn.commit()
 
-    print("\n Completed deletion for the specified IngestionID!\n")
+        print("\n Completed deletion for the specified IngestionID!\n")
 
 
 # ============================================================
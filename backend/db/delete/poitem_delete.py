@@ -1,16 +1,15 @@
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 
 def delete_po_items_by_poid(po_id: str):
-    conn = get_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute(
-        "DELETE FROM dbo.POItem WHERE POID = ?",
-        [po_id]
-    )
-    rows_deleted = cursor.rowcount
-    print(f"Rows deleted for POID {po_id}: {rows_deleted}")
+        cursor.execute(
+            "DELETE FROM dbo.POItem WHERE POID = ?",
+            [po_id]
+        )
+        rows_deleted = cursor.rowcount
+        print(f"Rows deleted for POID {po_id}: {rows_deleted}")
     
-    conn.commit()
-    conn.close()
+        conn.commit()
     print(f" POItems deleted for POID: {po_id}")
\ No newline at end of file
@@ -0,0 +1,68 @@
+from utils.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# SQL Server accepts at most 2100 parameters per request
+# and 1000 row constructors per VALUES clause
+SQL_SERVER_MAX_PARAMS = 2100
+SQL_SERVER_MAX_VALUES_ROWS = 1000
+
+
+def rows_per_statement(column_count: int) -> int:
+    """Largest number of rows one multi-row INSERT can carry."""
+    return max(1, min(SQL_SERVER_MAX_VALUES_ROWS, (SQL_SERVER_MAX_PARAMS - 1) // column_count))
+
+
+def bulk_insert(cursor, table: str, columns: list[str], rows: list[tuple],
+                output_column: str | None = None,
+                sql_values: dict[str, str] | None = None) -> list:
+    """
+    Set-based insert of many rows with multi-row
+        INSERT INTO <table> (...) OUTPUT inserted.<col> VALUES (...), (...)
+    statements, so a whole document is written in as few round-trips as
+    the 2100-parameter limit allows (usually one).
+
+    columns      : bound columns, one "?" per column per row
+    sql_values   : columns filled by a SQL expression instead of a
+                   parameter, e.g. {"CreatedAt": "SYSUTCDATETIME()"}
+    output_column: generated column returned for every inserted row
+                   (SQL Server does not guarantee OUTPUT row order)
+
+    Runs on the caller's cursor; committing is the caller's job.
+    Returns the OUTPUT values (empty list without output_column).
+    """
+    if not rows:
+        return []
+
+    sql_values = sql_values or {}
+    all_columns = ", ".join([*columns, *sql_values])
+    row_sql = "(" + ", ".join(["?"] * len(columns) + list(sql_values.values())) + ")"
+    output_sql = f"OUTPUT inserted.{output_column}" if output_column else ""
+
+    chunk_size = rows_per_statement(len(columns))
+    output = []
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+
+        sql = (
+            f"INSERT INTO {table} ({all_columns}) {output_sql} "
+            f"VALUES {', '.join([row_sql] * len(chunk))}"
+        )
+        params = [value for row in chunk for value in row]
+
+        cursor.execute(sql, params)
+
+        if output_column:
+            output.extend(r[0] for r in cursor.fetchall())
+
+    logger.info(
+        "Bulk insert completed",
+        extra={
+            "table": table,
+            "row_count": len(rows),
+            "statements": -(-len(rows) // chunk_size)
+        }
+    )
+
+    return output
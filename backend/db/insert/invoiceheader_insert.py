@@ -1,5 +1,5 @@
 # db/insert/invoiceheader_insert.py
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 
 def insert_invoice_header(*, po_number, file_id, invoice_number=None, header_data=None, ingestion_id=None, hospital_id=None):
     """
@@ -9,29 +9,28 @@ def insert_invoice_header(*, po_number, file_id, invoice_number=None, header_dat
     if header_data and hasattr(header_data, "model_dump"):
         header_data = header_data.model_dump()
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("""
-        INSERT INTO dbo.InvoiceHeader 
-        (IngestionID, FileID, PONumber, InvoiceNumber, HospitalName, HospitalID, AWDName, AWDCERPSCode, InvoiceDate)
-        OUTPUT inserted.InvoiceHeaderID
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        ingestion_id,
-        file_id,
-        po_number,
-        invoice_number,
-        header_data.get("HospitalName") if header_data else None,
-        hospital_id,
-        header_data.get("AWDName") if header_data else None,
-        header_data.get("AWDCERPSCode") if header_data else None,
-        header_data.get("InvoiceDate") if header_data else None
-    ))
+        cursor.execute("""
+            INSERT INTO dbo.InvoiceHeader 
+            (IngestionID, FileID, PONumber, InvoiceNumber, HospitalName, HospitalID, AWDName, AWDCERPSCode, InvoiceDate)
+            OUTPUT inserted.InvoiceHeaderID
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            ingestion_id,
+            file_id,
+            po_number,
+            invoice_number,
+            header_data.get("HospitalName") if header_data else None,
+            hospital_id,
+            header_data.get("AWDName") if header_data else None,
+            header_data.get("AWDCERPSCode") if header_data else None,
+            header_data.get("InvoiceDate") if header_data else None
+        ))
 
-    invoice_header_id = cursor.fetchone()[0]
-    conn.commit()
-    conn.close()
+        invoice_header_id = cursor.fetchone()[0]
+        conn.commit()
 
     print(f" InvoiceHeader inserted → InvoiceHeaderID: {invoice_header_id}")
     return invoice_header_id
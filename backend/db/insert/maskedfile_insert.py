@@ -1,24 +1,120 @@
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
+from db.insert.outbox_insert import NOTIFICATION_MASKED_FILE, insert_notification
+from db.insert.poitem_insert import POITEM_COLUMNS
 
-def insert_masked_file(file_id, masked_blob_name):
-    conn = get_connection()
-    cursor = conn.cursor()
+# Copied as-is when an already processed PDF arrives for another file
+POHEADER_COPY_COLUMNS = [
+    "PONumber",
+    "HospitalID",
+    "PODate",
+    "AWDName",
+    "VendorGSTIN",
+    "VendorCode",
+    "POApprovalDate",
+    "RCNumber",
+    "RCValidityDate",
+    "HospitalName",
+]
 
+
+def _insert_masked_file_row(cursor, file_id, masked_blob_name, content_hash, ingestion_id):
     cursor.execute("""
         INSERT INTO dbo.MaskedFile
-            (FileID, MaskedFileName, MaskedFileURL, ProcessedAt)
+            (FileID, MaskedFileName, MaskedFileURL, ProcessedAt, ContentHash)
             OUTPUT inserted.MaskedFileID
-            VALUES (?, ?, ?, SYSUTCDATETIME())
+            VALUES (?, ?, ?, SYSUTCDATETIME(), ?)
 
     """, (
         file_id,
         masked_blob_name,
-        masked_blob_name  # using blob name as URL
+        masked_blob_name,  # using blob name as URL
+        content_hash
     ))
 
     masked_file_id = cursor.fetchone()[0]
-    conn.commit()
-    conn.close()
+
+    if ingestion_id:
+        insert_notification(
+            cursor,
+            NOTIFICATION_MASKED_FILE,
+            ingestion_id,
+            {
+                "ingestion_id": ingestion_id,
+                "masked_blob_name": masked_blob_name
+            }
+        )
+
+    return masked_file_id
+
+
+def insert_masked_file(file_id, masked_blob_name, content_hash=None, ingestion_id=None):
+    """
+    Inserts the MaskedFile row. With ingestion_id, the Power Automate
+    "masked file ready" notification is written to dbo.NotificationOutbox
+    in the SAME transaction (both rows or neither).
+    """
+    with pooled_connection() as conn:
+        conn.autocommit = False
+        cursor = conn.cursor()
+
+        masked_file_id = _insert_masked_file_row(
+            cursor, file_id, masked_blob_name, content_hash, ingestion_id
+        )
+
+        conn.commit()
 
     print(f" MaskedFile inserted → MaskedFileID: {masked_file_id}")
     return masked_file_id
+
+
+def insert_masked_file_copy(source_file_id, file_id, ingestion_id, masked_blob_name, content_hash):
+    """
+    Records an already processed PDF for another file / ingestion without
+    re-running the pipeline, in ONE transaction:
+      - copies the source file's POHeader rows (and their POItems) under
+        the new IngestionID / FileID,
+      - inserts the new file's MaskedFile row pointing at the existing
+        masked blob, and queues its "masked file ready" notification.
+    Returns the new MaskedFileID.
+    """
+    header_columns = ", ".join(POHEADER_COPY_COLUMNS)
+    item_columns = [c for c in POITEM_COLUMNS if c != "POID"]
+    item_column_sql = ", ".join(item_columns)
+
+    with pooled_connection() as conn:
+        conn.autocommit = False
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT POID FROM dbo.POHeader WHERE FileID = ?
+        """, (source_file_id,))
+        source_po_ids = [row[0] for row in cursor.fetchall()]
+
+        for source_po_id in source_po_ids:
+            cursor.execute(f"""
+                INSERT INTO dbo.POHeader (IngestionID, FileID, {header_columns})
+                OUTPUT inserted.POID
+                SELECT ?, ?, {header_columns}
+                FROM dbo.POHeader
+                WHERE POID = ?
+            """, (ingestion_id, file_id, source_po_id))
+            po_id = cursor.fetchone()[0]
+
+            cursor.execute(f"""
+                INSERT INTO dbo.POItem (POID, {item_column_sql}, CreatedAt)
+                SELECT ?, {item_column_sql}, SYSUTCDATETIME()
+                FROM dbo.POItem
+                WHERE POID = ?
+            """, (po_id, source_po_id))
+
+        masked_file_id = _insert_masked_file_row(
+            cursor, file_id, masked_blob_name, content_hash, ingestion_id
+        )
+
+        conn.commit()
+
+    print(
+        f" MaskedFile copied from FileID {source_file_id} → MaskedFileID: {masked_file_id} "
+        f"({len(source_po_ids)} POHeader rows)"
+    )
+    return masked_file_id
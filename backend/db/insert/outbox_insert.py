@@ -0,0 +1,26 @@
+import json
+
+from db.db_connection import pooled_connection
+
+# dbo.NotificationOutbox.Kind
+NOTIFICATION_MASKED_FILE = "MASKED_FILE"
+NOTIFICATION_PROCESSING_ERROR = "PROCESSING_ERROR"
+
+
+def insert_notification(cursor, kind: str, ingestion_id: str | None, payload: dict) -> None:
+    """
+    Adds a PENDING notification on the caller's cursor, so it commits
+    (or rolls back) together with the caller's own writes.
+    """
+    cursor.execute("""
+        INSERT INTO dbo.NotificationOutbox (Kind, IngestionID, Payload)
+        VALUES (?, ?, ?)
+    """, (kind, ingestion_id, json.dumps(payload, default=str)))
+
+
+def enqueue_notification(kind: str, ingestion_id: str | None, payload: dict) -> None:
+    """Adds a PENDING notification in its own transaction."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        insert_notification(cursor, kind, ingestion_id, payload)
+        conn.commit()
@@ -1,6 +1,6 @@
 # db/write/poheader_manual_insert.py
 import uuid
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 
 # API field -> DB column mapping
 COLUMN_MAP = {
@@ -45,11 +45,10 @@ def insert_po_header_manual(payload):
         VALUES ({", ".join(placeholders)})
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(sql, values)
-    conn.commit()
-    conn.close()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, values)
+        conn.commit()
 
     print(f" Manual POHeader inserted → POID: {po_id}")
     return po_id
@@ -163,11 +163,27 @@
 
 from typing import List
 from models.po_models import POItemModel
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
+from db.insert.bulk_insert import bulk_insert
+from db.select.product_catalog import product_catalog
 from utils.logging.logger import get_logger
 
 logger = get_logger(__name__)
 
+POITEM_COLUMNS = [
+    "POID",
+    "ProductID",
+    "ProductName",
+    "UnitOfMeasure",
+    "HSNCode",
+    "Quantity",
+    "GSKQuantity",
+    "Price",
+    "RCRate",
+    "ItemCodeFromPO",
+    "Marked",
+]
+
 def insert_po_items(po_id: str, items: List[POItemModel]):
     """
     Insert POItem rows into dbo.POItem.
@@ -193,41 +209,13 @@ def insert_po_items(po_id: str, items: List[POItemModel]):
     )
 
     # ------------------------------------------------------------------
-    # Load Product Master (once)
-    # ------------------------------------------------------------------
-    def normalize_product_name(text: str) -> str:
-        return (
-            text.lower()
-                .replace("-", "")
-                .replace("(", "")
-                .replace(")", "")
-                .replace(",", "")
-                .replace("  ", " ")
-                .strip()
-        )
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute(
-        "SELECT ProductID, ProductDescription FROM dbo.Product"
-    )
-    products = cursor.fetchall()
-
-    product_map = {
-        normalize_product_name(p.ProductDescription): p.ProductID
-        for p in products
-    }
-
-    inserted_count = 0
-
-    # ------------------------------------------------------------------
-    # Insert Rows
+    # Build Rows (product master is served from the process-wide cache,
+    # resolved before a connection is borrowed)
     # ------------------------------------------------------------------
+    rows = []
     for item in items:
 
-        norm_name = normalize_product_name(item.ProductDescription)
-        product_id = product_map.get(norm_name)
+        product_id = product_catalog.lookup(item.ProductDescription)
 
         if not product_id:
             logger.warning(
@@ -235,46 +223,40 @@ def insert_po_items(po_id: str, items: List[POItemModel]):
                 extra={"product_name": item.ProductDescription}
             )
 
-        cursor.execute(
-            """
-            INSERT INTO dbo.POItem
-            (
-                POID,
-                ProductID,
-                ProductName,
-                UnitOfMeasure,
-                HSNCode,
-                Quantity,
-                GSKQuantity,
-                Price,
-                RCRate,
-                ItemCodeFromPO,
-                Marked,
-                CreatedAt
-            )
-            OUTPUT inserted.POItemID
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, SYSUTCDATETIME())
-            """,
-            (
-                po_id,
-                product_id,
-                item.ProductDescription,
-                item.UnitOfMeasure,
-                item.HSNCode,
-                item.Quantity,
-                1,
-                item.Price,
-                item.RCRate,
-                item.ItemCodeFromPO,
-                item.Marked,
-            )
-        )
+        rows.append((
+            po_id,
+            product_id,
+            item.ProductDescription,
+            item.UnitOfMeasure,
+            item.HSNCode,
+            item.Quantity,
+            1,
+            item.Price,
+            item.RCRate,
+            item.ItemCodeFromPO,
+            item.Marked,
+        ))
 
-        cursor.fetchone()
-        inserted_count += 1
+    # ------------------------------------------------------------------
+    # Insert Rows (set-based, one statement per 2100 parameters)
+    # ------------------------------------------------------------------
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+
+        # All chunks commit together
+        conn.autocommit = False
+
+        po_item_ids = bulk_insert(
+            cursor,
+            "dbo.POItem",
+            POITEM_COLUMNS,
+            rows,
+            output_column="POItemID",
+            sql_values={"CreatedAt": "SYSUTCDATETIME()"}
+        )
+        inserted_count = len(po_item_ids)
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
     logger.info(
         "POItem insertion completed successfully",
@@ -1,5 +1,6 @@
 import uuid
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
+from db.insert.bulk_insert import bulk_insert
 
 COLUMN_MAP = {
     "product_id": "ProductID",
@@ -15,31 +16,36 @@ COLUMN_MAP = {
 }
 
 def insert_po_items_manual(po_id: str, items: list):
-    conn = get_connection()
-    cursor = conn.cursor()
+    # Items only carry the fields the user set, so rows are grouped by
+    # column set; each group is one set-based insert
+    groups: dict[tuple, list] = {}
 
     for item in items:
         po_item_id = str(uuid.uuid4())
         data = item.model_dump(exclude_unset=True)
 
         columns = ["POItemID", "POID"]
-        placeholders = ["?", "?"]
         values = [po_item_id, po_id]
 
         for api_field, db_column in COLUMN_MAP.items():
             if api_field in data:
                 columns.append(db_column)
-                placeholders.append("?")
                 values.append(data[api_field])
 
-        sql = f"""
-            INSERT INTO dbo.POItem
-            ({", ".join(columns)}, CreatedAt)
-            VALUES ({", ".join(placeholders)}, SYSUTCDATETIME())
-        """
+        groups.setdefault(tuple(columns), []).append(tuple(values))
 
-        cursor.execute(sql, values)
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        conn.autocommit = False
 
-    conn.commit()
-    conn.close()
-    print(f" Manual POItems inserted for POID: {po_id}")
\ No newline at end of file
+        for columns, rows in groups.items():
+            bulk_insert(
+                cursor,
+                "dbo.POItem",
+                list(columns),
+                rows,
+                sql_values={"CreatedAt": "SYSUTCDATETIME()"}
+            )
+
+        conn.commit()
+    print(f" Manual POItems inserted for POID: {po_id}")
@@ -43,7 +43,7 @@ BEGIN
         Subject NVARCHAR(500) NULL,
         HospitalID UNIQUEIDENTIFIER NULL,
         Status NVARCHAR(50) NOT NULL DEFAULT 'New',
-        CONSTRAINT CK_Ingestion_Status CHECK (Status IN ('New','In Progress','Completed','Failed')),
+        CONSTRAINT CK_Ingestion_Status CHECK (Status IN ('New','In Progress','Completed','Failed','PROCESSING','COMPLETED','PARTIAL','ERROR')),
         CONSTRAINT FK_Ingestion_Hospital FOREIGN KEY (HospitalID) REFERENCES dbo.Hospital(HospitalID)
     );
 END;
@@ -72,9 +72,30 @@ BEGIN
         MaskedFileURL NVARCHAR(MAX) NULL,
         AccuracyPercent DECIMAL(5,2) NULL,
         ProcessedAt DATETIME2(3) NULL,
+        ContentHash CHAR(64) NULL,
         CONSTRAINT FK_MaskedFile_File FOREIGN KEY (FileID) REFERENCES dbo.FileUpload(FileID)
     );
     CREATE INDEX IX_MaskedFile_FileID ON dbo.MaskedFile(FileID);
+    CREATE INDEX IX_MaskedFile_ContentHash ON dbo.MaskedFile(ContentHash);
+END;
+
+-- NotificationOutbox Table
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'NotificationOutbox' AND schema_id = SCHEMA_ID('dbo'))
+BEGIN
+    CREATE TABLE dbo.NotificationOutbox (
+        NotificationID BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        Kind NVARCHAR(50) NOT NULL,
+        IngestionID UNIQUEIDENTIFIER NULL,
+        Payload NVARCHAR(MAX) NOT NULL,
+        Status NVARCHAR(20) NOT NULL DEFAULT 'PENDING',
+        Attempts INT NOT NULL DEFAULT 0,
+        NextAttemptAt DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+        LastError NVARCHAR(MAX) NULL,
+        CreatedAt DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+        SentAt DATETIME2(3) NULL,
+        CONSTRAINT CK_NotificationOutbox_Status CHECK (Status IN ('PENDING','SENT','DEAD'))
+    );
+    CREATE INDEX IX_NotificationOutbox_Due ON dbo.NotificationOutbox(Status, NextAttemptAt);
 END;
 
 -- Product Table
@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 from backend.db.seed.sheet_data import GSK_PRODUCTS_LIST
 # from db_insert_operations import get_connection
 from db.db_connection import get_connection
+from db.select.product_catalog import product_catalog
 
 
 # Load environment variables
@@ -29,6 +30,11 @@ def insert_products(products):
                 print(f" Skipped (already exists): {product_name}")
 
         conn.commit()
+
+    # Seed runs in its own process: a running app reloads its catalog via
+    # POST /pdf/products/cache/invalidate (or within PRODUCT_CACHE_TTL_SECONDS)
+    if inserted:
+        product_catalog.invalidate()
     print(f"\n Summary → Inserted: {inserted} | Skipped: {skipped}")
 
 if __name__ == "__main__":
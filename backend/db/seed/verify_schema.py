@@ -13,12 +13,16 @@ EXPECTED_TABLES = [
     "Ingestion",
     "FileUpload",
     "MaskedFile",
+    "NotificationOutbox",
     "Product",
     "POHeader",
     "POItem",
     "Invoice"
 ]
 
+# dbo.Ingestion.Status values written by the pipeline (CK_Ingestion_Status)
+EXPECTED_INGESTION_STATUSES = ["PROCESSING", "COMPLETED", "PARTIAL", "ERROR"]
+
 def verify_schema():
     """Verify that all expected tables exist and print schema summary."""
     if not AZURE_SQL_CONN:
@@ -68,6 +72,22 @@ def verify_schema():
             else:
                 summary.append((table, "-", "-"))
 
+        # Statuses the CHECK constraint would reject
+        cursor.execute("""
+            SELECT definition
+            FROM sys.check_constraints
+            WHERE name = 'CK_Ingestion_Status'
+        """)
+        row = cursor.fetchone()
+        status_check = row[0].upper() if row else ""
+        missing_statuses = [
+            s for s in EXPECTED_INGESTION_STATUSES
+            if status_check and f"'{s}'" not in status_check
+        ]
+
+        if missing_statuses:
+            print(f" CK_Ingestion_Status rejects: {', '.join(missing_statuses)} (run migrations)")
+
         df = pd.DataFrame(summary, columns=["Table", "Columns", "Rows"])
 
         print("\n Schema Verification Summary:")
@@ -75,6 +95,8 @@ def verify_schema():
 
         if missing_tables:
             print("\n Schema validation FAILED: Missing tables detected.")
+        elif missing_statuses:
+            print("\n Schema validation FAILED: Ingestion status constraint out of date.")
         else:
             print("\n Schema validation PASSED: All tables verified successfully.")
 
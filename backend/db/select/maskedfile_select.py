@@ -0,0 +1,27 @@
+# db/select/maskedfile_select.py
+from db.db_connection import pooled_connection
+
+def get_masked_file_by_content_hash(content_hash: str) -> dict | None:
+    """Latest MaskedFile produced from a PDF with this SHA-256, or None."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT TOP 1 MaskedFileID, FileID, MaskedFileName, MaskedFileURL, ProcessedAt
+            FROM dbo.MaskedFile
+            WHERE ContentHash = ?
+            ORDER BY ProcessedAt DESC
+        """, (content_hash,))
+
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+
+    return {
+        "masked_file_id": str(row.MaskedFileID),
+        "file_id": str(row.FileID),
+        "masked_blob_name": row.MaskedFileName,
+        "masked_file_url": row.MaskedFileURL,
+        "processed_at": row.ProcessedAt,
+    }
@@ -0,0 +1,202 @@
+# db/select/product_catalog.py
+import os
+import time
+import threading
+
+from dotenv import load_dotenv
+from db.db_connection import pooled_connection
+from utils.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+# Full reload interval (also picks up deleted products)
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "3600"))
+# Interval of the incremental DateModified / DateCreated refresh
+PRODUCT_CACHE_REFRESH_SECONDS = float(os.getenv("PRODUCT_CACHE_REFRESH_SECONDS", "60"))
+
+_CHANGED_AT = "COALESCE(DateModified, DateCreated)"
+
+
+def normalize_product_name(text: str) -> str:
+    return (
+        text.lower()
+            .replace("-", "")
+            .replace("(", "")
+            .replace(")", "")
+            .replace(",", "")
+            .replace("  ", " ")
+            .strip()
+    )
+
+
+class ProductCatalog:
+    """
+    Process-wide cache of dbo.Product as normalized name -> ProductID.
+
+    - Loaded in full on first use and again every ttl_seconds.
+    - In between, at most every refresh_seconds, only rows whose
+      DateModified / DateCreated is at or past the last seen value
+      (the watermark) are read and merged.
+    - invalidate() forces a full reload on the next lookup; product writes
+      call it in-process, other processes use POST
+      /pdf/products/cache/invalidate.
+
+    - Refresh queries run outside the lock, one at a time; meanwhile (and
+      after a failed refresh, until the next interval) lookups are served
+      from the current catalog. Only the very first load is waited for.
+
+    Rows whose DateModified and DateCreated are both NULL never pass the
+    watermark filter, so they only appear after a full reload.
+    """
+
+    def __init__(self, ttl_seconds: float = PRODUCT_CACHE_TTL_SECONDS,
+                 refresh_seconds: float = PRODUCT_CACHE_REFRESH_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = refresh_seconds
+
+        # _lock guards the maps / timestamps and is never held across SQL;
+        # _refresh_lock lets ONE thread at a time run the refresh query
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._by_name: dict[str, object] = {}   # normalized name -> ProductID
+        self._name_of: dict[object, str] = {}   # ProductID -> normalized name
+        self._watermark = None
+        self._has_catalog = False
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+        self._retry_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+            self._retry_at = 0.0
+        logger.info("Product catalog invalidated")
+
+    def lookup(self, product_name: str):
+        """ProductID for a product description, or None."""
+        self._ensure_fresh()
+        with self._lock:
+            return self._by_name.get(normalize_product_name(product_name))
+
+    def product_map(self) -> dict:
+        """Snapshot of normalized name -> ProductID."""
+        self._ensure_fresh()
+        with self._lock:
+            return dict(self._by_name)
+
+    def _due(self, now: float) -> str | None:
+        # Caller holds self._lock
+        if now < self._retry_at:
+            return None
+        if not self._loaded_at or now - self._loaded_at >= self.ttl_seconds or self._watermark is None:
+            return "full"
+        if now - self._refreshed_at >= self.refresh_seconds:
+            return "incremental"
+        return None
+
+    def _ensure_fresh(self):
+        with self._lock:
+            due = self._due(time.monotonic())
+            has_catalog = self._has_catalog
+        if due is None:
+            return
+
+        # Once a catalog exists, other threads keep serving it instead of
+        # queueing behind the refresher (e.g. during a DB outage)
+        if not self._refresh_lock.acquire(blocking=not has_catalog):
+            return
+
+        try:
+            now = time.monotonic()
+            with self._lock:
+                due = self._due(now)
+                watermark = self._watermark
+            if due is None:
+                # Refreshed by the thread we waited for
+                return
+
+            try:
+                if due == "full":
+                    self._full_load(now)
+                else:
+                    self._incremental_load(watermark, now)
+
+            except Exception:
+                with self._lock:
+                    if not self._has_catalog:
+                        raise
+                    # Serve the last good catalog; retry on the next interval
+                    self._retry_at = now + self.refresh_seconds
+                logger.exception("Product catalog refresh failed, serving cached catalog")
+
+        finally:
+            self._refresh_lock.release()
+
+    def _fetch(self, where: str = "", params: tuple = ()) -> list:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT ProductID, ProductDescription, {_CHANGED_AT} AS ChangedAt "
+                f"FROM dbo.Product {where}",
+                params
+            )
+            return cursor.fetchall()
+
+    @staticmethod
+    def _apply(rows, by_name: dict, name_of: dict, watermark):
+        """Merges rows into the maps; returns the new watermark."""
+        for row in rows:
+            product_id = row.ProductID
+            name = normalize_product_name(row.ProductDescription or "")
+
+            old_name = name_of.get(product_id)
+            if old_name is not None and old_name != name and by_name.get(old_name) == product_id:
+                del by_name[old_name]
+
+            by_name[name] = product_id
+            name_of[product_id] = name
+
+            if row.ChangedAt is not None and (watermark is None or row.ChangedAt > watermark):
+                watermark = row.ChangedAt
+
+        return watermark
+
+    def _full_load(self, now: float):
+        started = time.perf_counter()
+        rows = self._fetch()
+
+        # Built outside the lock, swapped in at once
+        by_name, name_of = {}, {}
+        watermark = self._apply(rows, by_name, name_of, None)
+
+        with self._lock:
+            self._by_name, self._name_of, self._watermark = by_name, name_of, watermark
+            self._has_catalog = True
+            self._loaded_at = self._refreshed_at = now
+
+        logger.info(
+            "Product catalog loaded",
+            extra={
+                "product_count": len(name_of),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        )
+
+    def _incremental_load(self, watermark, now: float):
+        # >= so rows written in the same millisecond as the watermark are not missed
+        rows = self._fetch(f"WHERE {_CHANGED_AT} >= ?", (watermark,))
+
+        with self._lock:
+            self._watermark = self._apply(rows, self._by_name, self._name_of, self._watermark)
+            self._refreshed_at = now
+
+        if rows:
+            logger.info(
+                "Product catalog refreshed",
+                extra={"changed_products": len(rows)}
+            )
+
+
+product_catalog = ProductCatalog()
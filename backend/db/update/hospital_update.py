@@ -1,6 +1,6 @@
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 from utils.logging.logger import get_logger
 
 logger = get_logger(__name__)
@@ -13,66 +13,63 @@ def update_hospital_by_rcno(*, rc_no: int, payload):
     Returns list of updated fields.
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 1️⃣ Fetch existing values
-    cursor.execute(
-        """
-        SELECT HospitalID, HospitalEmail, RCExtension
-        FROM dbo.Hospital
-        WHERE RCNo = ?
-        """,
-        (rc_no,)
-    )
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    row = cursor.fetchone()
-    if not row:
-        conn.close()
-        raise ValueError("Hospital not found for given RCNo")
+        # 1️⃣ Fetch existing values
+        cursor.execute(
+            """
+            SELECT HospitalID, HospitalEmail, RCExtension
+            FROM dbo.Hospital
+            WHERE RCNo = ?
+            """,
+            (rc_no,)
+        )
 
-    hospital_id, existing_email, existing_rc_ext = row
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError("Hospital not found for given RCNo")
 
-    updates = {}
-    updated_fields = []
+        hospital_id, existing_email, existing_rc_ext = row
 
-    # 2️⃣ Detect changes
-    if payload.HospitalEmail is not None and payload.HospitalEmail != existing_email:
-        updates["HospitalEmail"] = payload.HospitalEmail
-        updated_fields.append("HospitalEmail")
+        updates = {}
+        updated_fields = []
 
-    if payload.RCExtension is not None and payload.RCExtension != existing_rc_ext:
-        updates["RCExtension"] = payload.RCExtension
-        updated_fields.append("RCExtension")
+        # 2️⃣ Detect changes
+        if payload.HospitalEmail is not None and payload.HospitalEmail != existing_email:
+            updates["HospitalEmail"] = payload.HospitalEmail
+            updated_fields.append("HospitalEmail")
 
-    if not updates:
-        conn.close()
-        return []
+        if payload.RCExtension is not None and payload.RCExtension != existing_rc_ext:
+            updates["RCExtension"] = payload.RCExtension
+            updated_fields.append("RCExtension")
 
-    # updates["UpdatedAt"] = datetime.now(IST)
-    updates["RCNo"] = rc_no
+        if not updates:
+            return []
 
-    # 3️⃣ Dynamic UPDATE (pyodbc-compatible)
+        # updates["UpdatedAt"] = datetime.now(IST)
+        updates["RCNo"] = rc_no
 
-    set_clause = ", ".join(f"{k} = ?" for k in updates if k != "RCNo")
+        # 3️⃣ Dynamic UPDATE (pyodbc-compatible)
 
-    values = [
-        updates[k] for k in updates if k != "RCNo"
-    ]
-    values.append(rc_no)  # for WHERE RCNo = ?
+        set_clause = ", ".join(f"{k} = ?" for k in updates if k != "RCNo")
 
-    cursor.execute(
-        f"""
-        UPDATE dbo.Hospital
-        SET {set_clause}
-        WHERE RCNo = ?
-        """,
-        values
-    )
+        values = [
+            updates[k] for k in updates if k != "RCNo"
+        ]
+        values.append(rc_no)  # for WHERE RCNo = ?
+
+        cursor.execute(
+            f"""
+            UPDATE dbo.Hospital
+            SET {set_clause}
+            WHERE RCNo = ?
+            """,
+            values
+        )
 
 
-    conn.commit()
-    conn.close()
+        conn.commit()
 
     logger.info(
         "Hospital updated using RCNo",
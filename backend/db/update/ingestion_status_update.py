@@ -1,15 +1,14 @@
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 
 def update_ingestion_status(ingestion_id: str, status: str):
-    conn = get_connection()
-    cursor = conn.cursor()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("""
-        UPDATE dbo.Ingestion
-        SET Status = ?
-        WHERE IngestionID = ?
-    """, (status, ingestion_id))
+        cursor.execute("""
+            UPDATE dbo.Ingestion
+            SET Status = ?
+            WHERE IngestionID = ?
+        """, (status, ingestion_id))
 
-    conn.commit()
-    conn.close()
+        conn.commit()
     
\ No newline at end of file
@@ -2,7 +2,7 @@ import os
 import pyodbc
 from dotenv import load_dotenv
 # from .db_insert_operations import get_connection
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 
 
 load_dotenv()
@@ -39,7 +39,7 @@ def apply_migration(cursor, filename):
     print(f" Migration applied: {filename}")
 
 def run_migrations():
-    with get_connection() as conn:
+    with pooled_connection() as conn:
         cursor = conn.cursor()
         ensure_migration_table(cursor)
         applied = get_applied_migrations(cursor)
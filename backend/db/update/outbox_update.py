@@ -0,0 +1,108 @@
+import json
+
+from db.db_connection import pooled_connection
+
+
+def claim_due_notifications(batch_size: int, lease_seconds: int) -> list[dict]:
+    """
+    Claims up to batch_size due PENDING notifications in one statement.
+
+    Claimed rows get Attempts + 1 and NextAttemptAt pushed lease_seconds
+    ahead, so if this process dies mid-send they become due again.
+    READPAST lets several app instances claim disjoint batches.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            UPDATE TOP (?) o
+            SET Attempts = o.Attempts + 1,
+                NextAttemptAt = DATEADD(SECOND, ?, SYSUTCDATETIME())
+            OUTPUT inserted.NotificationID, inserted.Kind, inserted.IngestionID,
+                   inserted.Payload, inserted.Attempts
+            FROM dbo.NotificationOutbox o WITH (ROWLOCK, UPDLOCK, READPAST)
+            WHERE o.Status = 'PENDING' AND o.NextAttemptAt <= SYSUTCDATETIME()
+        """, (batch_size, lease_seconds))
+
+        rows = cursor.fetchall()
+        conn.commit()
+
+    return [
+        {
+            "notification_id": row.NotificationID,
+            "kind": row.Kind,
+            "ingestion_id": str(row.IngestionID) if row.IngestionID else None,
+            "payload": json.loads(row.Payload),
+            "attempts": row.Attempts,
+        }
+        for row in rows
+    ]
+
+
+def mark_notifications_sent(notification_ids: list[int]):
+    if not notification_ids:
+        return
+
+    placeholders = ", ".join("?" * len(notification_ids))
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+            UPDATE dbo.NotificationOutbox
+            SET Status = 'SENT', SentAt = SYSUTCDATETIME(), LastError = NULL
+            WHERE NotificationID IN ({placeholders})
+        """, notification_ids)
+
+        conn.commit()
+
+
+def mark_notifications_failed(retries: list[tuple[int, int, str]],
+                              dead: list[tuple[int, str]]):
+    """
+    retries: (notification_id, delay_seconds, error) -> due again after delay
+    dead   : (notification_id, error)                -> dead-lettered
+    """
+    if not retries and not dead:
+        return
+
+    with pooled_connection() as conn:
+        conn.autocommit = False
+        cursor = conn.cursor()
+
+        for notification_id, delay_seconds, error in retries:
+            cursor.execute("""
+                UPDATE dbo.NotificationOutbox
+                SET NextAttemptAt = DATEADD(SECOND, ?, SYSUTCDATETIME()), LastError = ?
+                WHERE NotificationID = ?
+            """, (delay_seconds, error, notification_id))
+
+        for notification_id, error in dead:
+            cursor.execute("""
+                UPDATE dbo.NotificationOutbox
+                SET Status = 'DEAD', LastError = ?
+                WHERE NotificationID = ?
+            """, (error, notification_id))
+
+        conn.commit()
+
+
+def requeue_dead_notifications(notification_ids: list[int] | None = None) -> int:
+    """Moves DEAD notifications (all, or the given ids) back to PENDING."""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+
+        sql = """
+            UPDATE dbo.NotificationOutbox
+            SET Status = 'PENDING', Attempts = 0, NextAttemptAt = SYSUTCDATETIME()
+            WHERE Status = 'DEAD'
+        """
+        params = []
+        if notification_ids:
+            sql += f" AND NotificationID IN ({', '.join('?' * len(notification_ids))})"
+            params = notification_ids
+
+        cursor.execute(sql, params)
+        count = cursor.rowcount
+        conn.commit()
+
+    return count
@@ -1,6 +1,6 @@
 import pyodbc
 import os
-from db.db_connection import get_connection
+from db.db_connection import pooled_connection
 # --------------------------------------------------
 # API field → DB column mapping
 # --------------------------------------------------
@@ -53,8 +53,7 @@ def update_po_header(po_id: str, fields: dict):
         WHERE POID = ?
     """
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(sql, values + [po_id])
-    conn.commit()
-    conn.close()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, values + [po_id])
+        conn.commit()
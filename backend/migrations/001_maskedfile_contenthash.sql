@@ -0,0 +1,6 @@
+-- SHA-256 of the source PDF, used to short-circuit re-processing of the same file
+IF COL_LENGTH('dbo.MaskedFile', 'ContentHash') IS NULL
+    ALTER TABLE dbo.MaskedFile ADD ContentHash CHAR(64) NULL;
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_MaskedFile_ContentHash' AND object_id = OBJECT_ID('dbo.MaskedFile'))
+    CREATE INDEX IX_MaskedFile_ContentHash ON dbo.MaskedFile(ContentHash);
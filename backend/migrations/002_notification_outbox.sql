@@ -0,0 +1,19 @@
+-- Power Automate notifications, written in the same transaction as the
+-- data they announce and delivered by the background outbox dispatcher
+IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'NotificationOutbox' AND schema_id = SCHEMA_ID('dbo'))
+    CREATE TABLE dbo.NotificationOutbox (
+        NotificationID BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        Kind NVARCHAR(50) NOT NULL,
+        IngestionID UNIQUEIDENTIFIER NULL,
+        Payload NVARCHAR(MAX) NOT NULL,
+        Status NVARCHAR(20) NOT NULL DEFAULT 'PENDING',
+        Attempts INT NOT NULL DEFAULT 0,
+        NextAttemptAt DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+        LastError NVARCHAR(MAX) NULL,
+        CreatedAt DATETIME2(3) NOT NULL DEFAULT SYSUTCDATETIME(),
+        SentAt DATETIME2(3) NULL,
+        CONSTRAINT CK_NotificationOutbox_Status CHECK (Status IN ('PENDING','SENT','DEAD'))
+    );
+
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_NotificationOutbox_Due' AND object_id = OBJECT_ID('dbo.NotificationOutbox'))
+    CREATE INDEX IX_NotificationOutbox_Due ON dbo.NotificationOutbox(Status, NextAttemptAt);
@@ -0,0 +1,7 @@
+-- Ingestion statuses written by the pipeline: PROCESSING / COMPLETED / ERROR,
+-- and PARTIAL when some tables could not be classified nor matched
+IF EXISTS (SELECT * FROM sys.check_constraints WHERE name = 'CK_Ingestion_Status' AND parent_object_id = OBJECT_ID('dbo.Ingestion'))
+    ALTER TABLE dbo.Ingestion DROP CONSTRAINT CK_Ingestion_Status;
+
+ALTER TABLE dbo.Ingestion ADD CONSTRAINT CK_Ingestion_Status
+    CHECK (Status IN ('New','In Progress','Completed','Failed','PROCESSING','COMPLETED','PARTIAL','ERROR'));
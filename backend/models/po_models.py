@@ -42,9 +42,14 @@ class POTableEvaluation(BaseModel):
     reason: str = Field(description="Why the table is classified as PO or not")
     med_col_idx: Optional[int] = None
     header_rows: Optional[List[int]] = None
+    classification_failed: bool = False
     
 class POTableEvaluationResult(BaseModel):
     tables: List[POTableEvaluation]
+    # LLM classification failed (after retries)
+    failed_table_indices: List[int] = []
+    # ... and no rule-based item column either: the table was not matched
+    unresolved_table_indices: List[int] = []
 
 class POHeader(BaseModel):
     PONumber: Optional[str] = Field(
@@ -150,6 +155,11 @@ class BlobProcessRequest(BaseModel):
     blob_file_name: str
     file_id: str | None = None
     ingestion_id: str | None = None
+    # Re-process even if this PDF was already masked
+    force: bool = False
+
+class BatchProcessRequest(BaseModel):
+    items: List[BlobProcessRequest] = Field(..., min_length=1)
 
 class ManualRedactionResponse(BaseModel):
     status: Literal["MANUAL_REQUIRED"]
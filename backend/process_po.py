@@ -1,19 +1,23 @@
 # services/process_po.py
 import os
 import re
+import time
+import logging
 import uuid
 from datetime import datetime
 from pathlib import Path
-import requests
 import sys
+from typing import Callable
 
 from db.update.ingestion_status_update import update_ingestion_status
 from utils.logging.logger import get_logger
+from utils.metrics.metrics import PIPELINE_DOCUMENT_SECONDS
 from utils.stage0.pdf_to_bytes import load_pdf_as_bytes
 from utils.stage0.pdf_bytes_to_image import pdf_bytes_to_images
 from utils.stage1_llm_classifier.llm_classifier import classify_po_pdf_from_images
 from utils.stage2_llm_extraction_as_it_is.getAllMedicines import extract_all_medicines_from_images
 from utils.stage2_llm_extraction_as_it_is.gsk_products_list import GSK_BRANDS
+from utils.stage2_llm_extraction_as_it_is.brand_matcher import get_brand_matcher
 from utils.stage2_llm_extraction_as_it_is.non_gsk_filteration import filter_non_gsk_medicines
 from utils.stage3_po_item_extraction.po_itemlist_extract import extract_po_items_from_pdf_pages
 from utils.stage4_ocr_grid.stage4_0_ocr import run_adi_ocr
@@ -22,24 +26,30 @@ from utils.stage4_ocr_grid.stage4_1_orchestrator import evaluate_tables_for_po
 from utils.stage5_find_row_col_idx.matcher import find_fragmented_match
 from utils.stage5_find_row_col_idx.get_max_width import get_table_x_bounds
 from utils.stage5_find_row_col_idx.get_row_y1_y2 import get_y1_y2_from_ocr
+from utils.stage5_find_row_col_idx.table_geometry import build_table_geometries
 from utils.stage5_find_row_col_idx.redaction import redact_pdf_from_stream_with_spans
 from utils.stage2_llm_extraction_as_it_is.po_header_extractor import extract_POHeader_data_from_bytes
 from utils.azure.upload_bytes import upload_bytes_to_blob
 from db.insert.poheader_insert import insert_po_header
-from db.insert.maskedfile_insert import insert_masked_file
+from db.insert.maskedfile_insert import insert_masked_file, insert_masked_file_copy
+from db.insert.outbox_insert import NOTIFICATION_PROCESSING_ERROR, enqueue_notification
+from db.select.maskedfile_select import get_masked_file_by_content_hash
 from db.insert.poitem_insert import insert_po_items
 from utils.logging.error_handler import log_processing_failure
 from utils.stage2_llm_extraction_as_it_is.layout_result import get_layout_result
 from utils.stage2_llm_extraction_as_it_is.get_medicine_list_from_layout import medicine_names_layout
 from utils.stage2_llm_extraction_as_it_is.build_layout_index import build_layout_index_for_non_gsk
+from utils.stage0.document_analysis import analyze_pdf
+from utils.stage0.adi_cache import content_hash
+from utils.pipeline.single_flight import SharedFailure, SingleFlight
+from utils.jobs.outbox_dispatcher import POWER_AUTOMATE_ERROR_WEBHOOK_URL, outbox_dispatcher
+from utils.pipeline.stage_graph import STAGE_RUNNING, Stage, StageFailure, run_stage_graph
 
  
 
 logger = get_logger(__name__)
 
 REDACTED_OUTPUT = "REDACTED_OUTPUT"
-POWER_AUTOMATE_WEBHOOK_URL = os.getenv("POWER_AUTOMATE_WEBHOOK_URL")
-POWER_AUTOMATE_ERROR_WEBHOOK_URL = os.getenv("POWER_AUTOMATE_ERROR_WEBHOOK_URL")
 
 # pdf_name = sys.argv[1]  # expects: python runner.py file.pdf
 # logger.info(f"📄 Starting PO processing pipeline for file: {pdf_name}")
@@ -62,65 +72,11 @@ def normalize_guid(value: str, name: str) -> str:
     except Exception:
         raise ValueError(f"{name} is not a valid GUID: {value}")
 
-def trigger_power_automate_email(ingestion_id: str, masked_blob_name: str):
+def queue_error_notification(ingestion_id: str, error_stage: str,
+                             error_message: str, file_name: str):
     """
-    Triggers Power Automate flow to send email notification
-    with the masked PDF blob name and ingestion ID.
-    """
-    try:
-        payload = {
-            "ingestion_id": ingestion_id,
-            "masked_blob_name": masked_blob_name
-        }
-        
-        logger.info(
-            "Triggering Power Automate webhook",
-            extra={
-                "ingestion_id": ingestion_id,
-                "masked_blob_name": masked_blob_name
-            }
-        )
-        
-        response = requests.post(
-            POWER_AUTOMATE_WEBHOOK_URL,
-            json=payload,
-            timeout=30
-        )
-        
-        response.raise_for_status()
-        
-        logger.info(
-            "Power Automate webhook triggered successfully",
-            extra={
-                "ingestion_id": ingestion_id,
-                "status_code": response.status_code
-            }
-        )
-        
-        return True
-        
-    except requests.exceptions.Timeout:
-        logger.error(
-            "Power Automate webhook timed out",
-            extra={"ingestion_id": ingestion_id}
-        )
-        return False
-        
-    except requests.exceptions.RequestException as exc:
-        logger.exception(
-            "Power Automate webhook call failed",
-            extra={
-                "ingestion_id": ingestion_id,
-                "error": str(exc)
-            }
-        )
-        return False
-    
-def trigger_power_automate_error(ingestion_id: str, error_stage: str, 
-                                 error_message: str, file_name: str):
-    """
-    Triggers Power Automate flow to send ERROR email notification
-    when processing fails.
+    Queues the Power Automate ERROR email in dbo.NotificationOutbox;
+    the outbox dispatcher delivers it (with retries) off this thread.
     """
     if not POWER_AUTOMATE_ERROR_WEBHOOK_URL:
         logger.warning(
@@ -128,707 +84,795 @@ def trigger_power_automate_error(ingestion_id: str, error_stage: str,
             extra={"ingestion_id": ingestion_id}
         )
         return False
-        
-    try:
-        payload = {
+
+    enqueue_notification(
+        NOTIFICATION_PROCESSING_ERROR,
+        ingestion_id,
+        {
             "ingestion_id": ingestion_id,
             "error_stage": error_stage,
             "error_message": error_message,
             "file_name": file_name,
             "timestamp": datetime.utcnow().isoformat()
         }
-        
-        logger.info(
-            "Triggering Power Automate ERROR webhook",
-            extra={
-                "ingestion_id": ingestion_id,
-                "error_stage": error_stage
-            }
-        )
-        
-        response = requests.post(
-            POWER_AUTOMATE_ERROR_WEBHOOK_URL,
-            json=payload,
-            timeout=30
-        )
-        
-        response.raise_for_status()
-        
-        logger.info(
-            "Power Automate ERROR webhook triggered successfully",
-            extra={
-                "ingestion_id": ingestion_id,
-                "status_code": response.status_code
-            }
-        )
-        
-        return True
-        
-    except requests.exceptions.Timeout:
-        logger.error(
-            "Power Automate ERROR webhook timed out",
-            extra={"ingestion_id": ingestion_id}
-        )
-        return False
-        
-    except requests.exceptions.RequestException as exc:
-        logger.exception(
-            "Power Automate ERROR webhook call failed",
-            extra={
-                "ingestion_id": ingestion_id,
-                "error": str(exc)
-            }
-        )
-        return False
-    
-def process_pdf(pdf_bytes: bytes, file_name: str, file_id: str | None = None, ingestion_id: str | None = None ):
+    )
+    outbox_dispatcher.wake()
 
-    current_stage = "INIT"
-    po_id = None
-    try:
-        logger.info(
-            "PDF processing started (bytes)",
-            extra={
-                "filename": file_name,
-                "byte_size": len(pdf_bytes)
-            }
-        )
-            
-        # Normalize IDs ONLY if provided (Power Automate flow)
-        if ingestion_id:
-            ingestion_id = normalize_guid(ingestion_id, "IngestionID")
-        if file_id:
-            file_id = normalize_guid(file_id, "FileID")
-        if ingestion_id:
-            update_ingestion_status(ingestion_id, "PROCESSING")  
+    logger.info(
+        "Power Automate ERROR notification queued",
+        extra={"ingestion_id": ingestion_id, "error_stage": error_stage}
+    )
+    return True
 
-        # ---------------------------------------------------------------------
-        # Stage 0 -> Converting Pdf to Bytes
-        # ---------------------------------------------------------------------
 
-        # logger.info("Stage 0 | Loading PDF as bytes")
+# =============================================================================
+# Pipeline stages
+# Each stage takes its declared inputs as keyword arguments and returns a
+# dict of its declared outputs (see build_pipeline_graph).
+# =============================================================================
 
-        # pdf_bytes = load_pdf_as_bytes(pdf_name)
+def stage_layout_extraction(pdf_bytes):
+    logger.info( "Stage 1 | Extracting the layout using prebuilt-layout")
+    # Single ADI analysis shared by stages 1-5
+    analysis = analyze_pdf(pdf_bytes)
+    ocr_text, result = get_layout_result(pdf_bytes, analysis=analysis)
 
-        # logger.info(
-        #     f"Stage 0 | PDF loaded successfully | size_bytes={len(pdf_bytes)}"
-        # )
-        # print(f"Loaded PDF ({len(pdf_bytes)} bytes)")
+    return {"analysis": analysis, "ocr_text": ocr_text, "layout_result": result}
 
-        # ---------------------------------------------------------------------
-        # Stage 1 -> LLM Classifier
-        # ---------------------------------------------------------------------
 
-        # logger.info("Stage 1 | Running LLM PO classifier on PDF images")
-        # current_stage = "STAGE_1_CLASSIFICATION"
-        # po_clasify_result = classify_po_pdf_from_images(pdf_bytes)
-        # flag = po_clasify_result.Type
+def stage_medicine_extraction(ocr_text, layout_result):
+    logger.info( " Stage 1 | Extracting the medicine names for the layout result")
+    all_medicine_list = medicine_names_layout(ocr_text)
 
-        # logger.info(
-        #     f"Stage 1 | PO classification completed | type={flag}"
-        # )
+    logger.info(
+        f"Stage 1 | Medicine extraction completed | total_medicines={len(all_medicine_list)}"
+    )
 
-        # image_list = pdf_bytes_to_images(pdf_bytes) ----> We dont need this 
+    non_gsk_med_list = filter_non_gsk_medicines(all_medicine_list, GSK_BRANDS)
+    logger.debug("All medicines | %s", all_medicine_list)
+    logger.debug("Non GSK medicines | %s", non_gsk_med_list)
 
-        # logger.info(
-        #     f"Stage 1 | PDF converted to images | image_count={len(image_list)}"
-        # )
+    logger.info(
+        f"Stage 1 | Non-GSK filtering completed | non_gsk_count={len(non_gsk_med_list)}"
+    )
+
+    # ---------------------------------------------------------------------
+    # Stage 1.2 -> Build layout index for NON-GSK medicines (NEW)
+    # ---------------------------------------------------------------------
+
+    logger.info(
+        "Stage 2.5 | Building layout index for NON-GSK medicines (fallback prep)"
+    )
+
+    layout_index = build_layout_index_for_non_gsk(
+        layout_result=layout_result,
+        non_gsk_med_list=non_gsk_med_list,
+    )
+
+    logger.info(
+        "Stage 2.5 | Layout index built | medicines_indexed=%d",
+        len(layout_index)
+    )
+
+    for med in layout_index:
+
+        logger.debug("Layout-indexed NON-GSK medicine | %s", med)
+
+    fallback_spans = set()
+
+    for norm_med, entries in layout_index.items():
+        for entry in entries:
+            fallback_spans.add((
+                entry["page_no"],
+                entry["y1"],
+                entry["y2"]
+            ))
+
+    return {"non_gsk_med_list": non_gsk_med_list, "fallback_spans": fallback_spans}
 
-        # ---------------------------------------------------------------------
-        # Stage 2 -> Extract PO As it is
-        # ---------------------------------------------------------------------
-        # @capture_errors(stage="HEADER_EXTRACTION")
-        # logger.info("Stage 2 | Extracting PO Header data from PDF bytes")
-        # try:
-        #     header_data = extract_POHeader_data_from_bytes(pdf_bytes)
-
-        # except Exception as exc:
-        #     print("Header extraction failed:", str(exc))
-
-        #     #INSERT into POHeader table
-        #     po_number = header_data.PONumber or "UNKNOWN"
-
-        #     if ingestion_id and file_id:
-        #         po_id = insert_po_header(
-        #             po_number=po_number,
-        #             file_id=file_id,
-        #             ingestion_id = ingestion_id,
-        #             header_data=header_data
-        #         )
-        #         logger.info(
-        #     "POHeader inserted",
-        #     extra={
-        #         "po_id": po_id,
-        #         "file_id": file_id,
-        #         "ingestion_id": ingestion_id
-        #     }
-        #     )
-        #     else:
-        #         logger.info(
-        #             "Skipping POHeader insert — local / non-ingestion flow",
-        #             extra={"filename": file_name}
-        # )
-        logger.info("Stage 1 | Extracting all medicine names from OCR Result of Layout")
 
-        logger.info( "Stage 1 | Extracting the layout using prebuilt-layout")
-        current_stage = "STAGE_1_LAYOUT_EXTRACTION"
-        ocr_text,result = get_layout_result(pdf_bytes)
+def stage_header_extraction(pdf_bytes, analysis):
+    logger.info("Stage 2 | Extracting PO Header data from PDF bytes")
+    try:
+        header_data = extract_POHeader_data_from_bytes(pdf_bytes, analysis=analysis)
+    except Exception as exc:
+        raise RuntimeError("POHeader extraction / insertion failed") from exc
+
+    return {"header_data": header_data}
 
-        logger.info( " Stage 1 | Extracting the medicine names for the layout result")
-        all_medicine_list = medicine_names_layout(ocr_text)
+
+def stage_header_insertion(header_data, file_name, file_id, ingestion_id):
+    po_id = None
+    po_number = header_data.PONumber or "UNKNOWN"
+
+    if ingestion_id and file_id:
+        try:
+            po_id = insert_po_header(
+                po_number=po_number,
+                file_id=file_id,
+                ingestion_id=ingestion_id,
+                header_data=header_data,
+            )
+        except Exception as exc:
+            raise RuntimeError("POHeader extraction / insertion failed") from exc
 
         logger.info(
-            f"Stage 1 | Medicine extraction completed | total_medicines={len(all_medicine_list)}"
+            "POHeader inserted",
+            extra={
+                "po_id": po_id,
+                "file_id": file_id,
+                "ingestion_id": ingestion_id
+            }
         )
+    else:
+        logger.info("Skipping POHeader insertion — local / non-ingestion flow",
+                    extra={"filename": file_name}
+                    )
+
+    return {"po_id": po_id}
+
+
+def stage_po_item_extraction(ocr_text):
+    logger.info("Stage 3 | Extracting structured PO item list")
+    poItemList= extract_po_items_from_pdf_pages(ocr_text)
 
-        non_gsk_med_list = filter_non_gsk_medicines(all_medicine_list, GSK_BRANDS)
-        print("all medicine:")
-        for med in all_medicine_list:
-            print( med )
-        print ( "Non gsk medicine: ********************")
-        for non in non_gsk_med_list:
-            print( non)
-        print ( "********************")
+    logger.info("Stage 3 | Extracted PO Items:")
 
+    for idx, item in enumerate(poItemList.items, start=1):
         logger.info(
-            f"Stage 1 | Non-GSK filtering completed | non_gsk_count={len(non_gsk_med_list)}"
+            "Item %d | Product=%s | Qty=%s | UOM=%s | Price=%s | HSN=%s",
+            idx,
+            item.ProductDescription,
+            item.Quantity,
+            item.UnitOfMeasure,
+            item.Price,
+            item.HSNCode
         )
 
-        # ---------------------------------------------------------------------
-        # Stage 1.2 -> Build layout index for NON-GSK medicines (NEW)
-        # ---------------------------------------------------------------------
+    return {"po_item_list": poItemList}
+
 
+def stage_po_item_insertion(po_item_list, po_id, file_name, file_id, ingestion_id):
+    # -------------------------------------------------------------------------
+    # INSERT PO ITEMS (DATA IS FINAL AT THIS POINT)
+    # -------------------------------------------------------------------------
+    if not (ingestion_id and file_id and po_id):
         logger.info(
-            "Stage 2.5 | Building layout index for NON-GSK medicines (fallback prep)"
+            "Skipping POItem insertion — missing po_id / ingestion flow",
+            extra={
+                "filename": file_name,
+                "po_id": po_id
+            }
         )
+        return {}
 
-        layout_index = build_layout_index_for_non_gsk(
-            layout_result=result,
-            non_gsk_med_list=non_gsk_med_list,
+    try:
+        logger.info(
+            "Starting POItem insertion",
+            extra={
+                "po_id": po_id,
+                "total_rows": len(po_item_list.items)
+            }
+        )
+
+        # Only GSK items are stored
+        filtered_po_items, _ = get_brand_matcher(GSK_BRANDS).partition(
+            po_item_list.items,
+            key=lambda item: item.ProductDescription
+        )
+
+        inserted_count = insert_po_items(
+            po_id=po_id,
+            items=filtered_po_items
         )
 
         logger.info(
-            "Stage 2.5 | Layout index built | medicines_indexed=%d",
-            len(layout_index)
+            "POItem insertion completed",
+            extra={
+                "po_id": po_id,
+                "inserted_count": inserted_count
+            }
         )
 
-        print ( "********* Layout Indexing Result **********")
-        for med in layout_index:
+    except Exception as exc:
+        raise RuntimeError("POItem insertion failed") from exc
 
-            logger.info("Layout-indexed NON-GSK medicine | %s", med)
+    return {}
 
-        print ( "********************")
 
-        fallback_spans = set()
+def stage_ocr_processing(pdf_bytes, analysis):
+    # ---------------------------------------------------------------------
+    # Stage 4 -> PDF Bytes to ocr result & Grid formation
+    # ---------------------------------------------------------------------
 
-        for norm_med, entries in layout_index.items():
-            for entry in entries:
-                fallback_spans.add((
-                    entry["page_no"],
-                    entry["y1"],
-                    entry["y2"]
-                ))
- 
+    logger.info("Stage 4 | Reading OCR tables from the shared layout analysis")
+    ocr_result = run_adi_ocr(pdf_bytes, analysis=analysis)
 
-        logger.info("Stage 2 | Extracting PO Header data from PDF bytes")
+    logger.info(
+        "Stage 4 | OCR completed | extracting tables metadata"
+    )
 
-        try:
-            current_stage = "STAGE_2_HEADER_EXTRACTION"
-            header_data = extract_POHeader_data_from_bytes(pdf_bytes)
+    tables_raw = ocr_result.get("tables", [])
 
-            po_number = header_data.PONumber or "UNKNOWN"
+    ##################################### Debugging ###################################
 
-            if ingestion_id and file_id:
-                current_stage = "STAGE_2_HEADER_INSERTION"
-                po_id = insert_po_header(
-                    po_number=po_number,
-                    file_id=file_id,
-                    ingestion_id=ingestion_id,
-                    header_data=header_data,
-                )
+    if not tables_raw:
+        logger.warning("Stage 4 | No OCR tables found")
+    elif logger.isEnabledFor(logging.DEBUG):
+        # Per-cell dump only when DEBUG is enabled for this module
+        logger.debug("Stage 4 | Dumping ALL OCR tables for inspection")
 
-                logger.info(
-                    "POHeader inserted",
-                    extra={
-                        "po_id": po_id,
-                        "file_id": file_id,
-                        "ingestion_id": ingestion_id
-                    }
+        for t_idx, table in enumerate(tables_raw):
+            logger.debug(
+                "TABLE %d | row_count=%s | column_count=%s | cell_count=%d",
+                t_idx,
+                table.row_count,
+                table.column_count,
+                len(table),
+            )
+
+            for c_idx, (row, col, page_no, content) in enumerate(table.iter_cells(), start=1):
+                logger.debug(
+                    "  T%d-C%d | row=%s col=%s | page=%s | text=%r",
+                    t_idx,
+                    c_idx,
+                    row,
+                    col,
+                    page_no,
+                    content,
                 )
-            else:
-                logger.info("Skipping POHeader insertion — local / non-ingestion flow",
-                            extra={"filename": file_name}
-                            )
 
-        except Exception as exc:
-            raise RuntimeError("POHeader extraction / insertion failed") from exc
-        
 
-            # logger.exception(
-            #     "Stage 2 | PO Header extraction failed",
-            #     extra={
-            #         "file_name": file_name,
-            #         "ingestion_id": ingestion_id,
-            #         "file_id": file_id
-            #     }
-            # )
+    ##################################### Debugging ###################################
 
+    logger.info(
+        f"Stage 4 | OCR tables detected | table_count={len(tables_raw)}"
+    )
 
-        # logger.info("Stage 2 | Extracting all medicine names from images")
+    return {"ocr_tables": tables_raw}
 
-        # # -------------------->
 
-        # all_medicine_list = extract_all_medicines_from_images(image_list)
+def stage_table_evaluation(ocr_tables):
+    logger.info(
+        "Stage 4 | Evaluating OCR tables for PO relevance (grid + markdown + LLM)"
+    )
 
-        # logger.info(
-        #     f"Stage 2 | Medicine extraction completed | total_medicines={len(all_medicine_list)}"
-        # )
+    tables = evaluate_tables_for_po(ocr_tables)
 
-        # non_gsk_med_list, gsk_med_list = filter_non_gsk_medicines(all_medicine_list, GSK_BRANDS)
+    po_table_count = sum(1 for t in tables.tables if t.is_po)
 
-        # print ( "Non gsk medicine: ********************")
-        # for non in non_gsk_med_list:
-        #     print( non)
-        # print ( "********************")
+    logger.debug("Stage 4 | Table evaluation result | %s", tables)
+    logger.info(
+        f"Stage 4 | Table evaluation completed | po_tables={po_table_count} | total_tables={len(tables.tables)}"
+    )
 
-        # print ("GSK medicine: ********************")
-        # for gsk in gsk_med_list:
-        #     print( gsk)
-        # print ( "********************")
-        
+    if tables.unresolved_table_indices:
+        logger.warning(
+            "Stage 4 | Tables could not be classified and were not matched | table_indices=%s",
+            tables.unresolved_table_indices
+        )
 
-        # logger.info(
-        #     f"Stage 2 | Non-GSK filtering completed | non_gsk_count={len(non_gsk_med_list)}"
-        # )
-        
+    return {"table_evaluation": tables}
 
-        # ---------------------------------------------------------------------
-        # Stage 3 -> PO Item Extraction
-        # ---------------------------------------------------------------------
 
-        logger.info("Stage 3 | Extracting structured PO item list")
-        current_stage = "STAGE_3_PO_ITEM_EXTRACTION"
-        poItemList= extract_po_items_from_pdf_pages(ocr_text)
+def stage_coordinate_matching(ocr_tables, table_evaluation, non_gsk_med_list, fallback_spans):
+    # ---------------------------------------------------------------------
+    # Stage 5 ->  Finding Coordinates
+    # ---------------------------------------------------------------------
+    tables = table_evaluation
 
-        logger.info("Stage 3 | Extracted PO Items:")
+    logger.info("Stage 5 | Entering coordinates finding phase")
 
-        for idx, item in enumerate(poItemList.items, start=1):
-            logger.info(
-                "Item %d | Product=%s | Qty=%s | UOM=%s | Price=%s | HSN=%s",
-                idx,
-                item.ProductDescription,
-                item.Quantity,
-                item.UnitOfMeasure,
-                item.Price,
-                item.HSNCode
-            )
-        
-        # -------------------------------------------------------------------------
-        # INSERT PO ITEMS (DATA IS FINAL AT THIS POINT)
-        # -------------------------------------------------------------------------
-        if ingestion_id and file_id and po_id:
-            try:
-                current_stage = "STAGE_3_PO_ITEM_INSERTION"
-                logger.info(
-                    "Starting POItem insertion",
-                    extra={
-                        "po_id": po_id,
-                        "total_rows": len(poItemList.items)
-                    }
-                )
+    all_matched_cells = set()
 
-                filtered_po_items = [
-                    item for item in poItemList.items
-                    if any(
-                    brand.upper() in (item.ProductDescription or "").upper()
-                    for brand in GSK_BRANDS
-                    )
-                ]
+    # --------------------> Finding the Min_X and Max_X coordinates <-------------------------------
 
 
-                inserted_count = insert_po_items(
-                    po_id=po_id,
-                    items=filtered_po_items
-                )
+    # -------------------------------------------------
+    # STEP 1: Get FIRST PO table evaluation
+    # -------------------------------------------------
 
-                logger.info(
-                    "POItem insertion completed",
-                    extra={
-                        "po_id": po_id,
-                        "inserted_count": inserted_count
-                    }
-                )
+    # Tables kept as PO only by the classification-failure fallback
+    # do not decide the X bounds when a classified one exists
+    first_po_table = next(
+        (t for t in tables.tables if t.is_po and not t.classification_failed),
+        next((t for t in tables.tables if t.is_po), None)
+    )
 
-            except Exception as exc:
-                # logger.exception(
-                #     "POItem insertion failed",
-                #     extra={"po_id": po_id}
-                # )
-                raise RuntimeError("POItem insertion failed") from exc
-        else:
-            logger.info(
-                "Skipping POItem insertion — missing po_id / ingestion flow",
-                extra={
-                    "filename": file_name,
-                    "po_id": po_id
-                }
-            )
+    if first_po_table is None:
+        logger.warning("Stage 5 | No PO tables found — skipping coordinate extraction")
+        # sys.exit(0)
+        raise RuntimeError("No PO tables found in document")
 
 
-        # ---------------------------------------------------------------------
-        # Stage 4 -> PDF Bytes to ocr result & Grid formation
-        # ---------------------------------------------------------------------
+    logger.info(
+        "Stage 5 | First PO table identified | table_index=%d | page=%d",
+        first_po_table.table_index,
+        first_po_table.page_number
+    )
 
-        logger.info("Stage 4 | Running OCR engine on PDF bytes")
-        current_stage = "STAGE_4_OCR_PROCESSING"
-        ocr_result = run_adi_ocr(pdf_bytes)
+    # -------------------------------------------------
+    # STEP 2: Navigate back to OCR table using index
+    # -------------------------------------------------
 
-        logger.info(
-            "Stage 4 | OCR completed | extracting tables metadata"
-        )
+    first_ocr_table = ocr_tables[first_po_table.table_index]
 
-        tables_raw = ocr_result.get("tables", [])
+    # -------------------------------------------------
+    # STEP 3: Compute global X bounds for PO tables
+    # -------------------------------------------------
 
-        ##################################### Debugging ###################################
+    # Row geometry is indexed once per PO table; every span is an O(1) lookup
+    geometries = build_table_geometries(
+        ocr_tables, [t.table_index for t in tables.tables if t.is_po]
+    )
+    tables_by_index = {t.table_index: t for t in tables.tables}
 
-        if not tables_raw:
-            logger.warning("Stage 4 | No OCR tables found")
-        else:
-            logger.info("Stage 4 | Dumping ALL OCR tables for inspection")
+    x_min, x_max = get_table_x_bounds(
+        first_ocr_table, geometry=geometries[first_po_table.table_index]
+    )
 
-            for t_idx, table in enumerate(tables_raw):
-                logger.info(
-                    "TABLE %d | row_count=%s | column_count=%s | cell_count=%d",
-                    t_idx,
-                    table.get("row_count"),
-                    table.get("column_count"),
-                    len(table.get("cells", [])),
-                )
+    logger.info(
+        "Stage 5 | PO table X bounds calculated | x_min=%.2f | x_max=%.2f",
+        x_min,
+        x_max
+    )
 
-                for c_idx, cell in enumerate(table.get("cells", []), start=1):
-                    page_no = None
-                    if cell.get("bounding_regions"):
-                        page_no = cell["bounding_regions"][0].get("page_number")
-
-                    logger.info(
-                        "  T%d-C%d | row=%s col=%s | page=%s | text=%r",
-                        t_idx,
-                        c_idx,
-                        cell.get("row_index"),
-                        cell.get("column_index"),
-                        page_no,
-                        cell.get("content"),
-                    )
 
+    for table in tables.tables:
 
-        ##################################### Debugging ###################################
+        # Only PO tables are relevant
+        if not table.is_po:
+            continue
 
-        logger.info(
-            f"Stage 4 | OCR tables detected | table_count={len(tables_raw)}"
-        )
+        # If medicine column was not identified, skip safely
+        if table.med_col_idx is None:
+            logger.warning(
+                "Skipping table %d (page %d) — med_col_idx not found",
+                table.table_index,
+                table.page_number
+            )
+            continue
 
         logger.info(
-            "Stage 4 | Evaluating OCR tables for PO relevance (grid + markdown + LLM)"
+            "Stage 5 | Scanning table %d on page %d (med_col_idx=%d)",
+            table.table_index,
+            table.page_number,
+            table.med_col_idx
         )
 
-        tables = evaluate_tables_for_po(ocr_result["tables"])
+        # grid_idx, start_row, end_row = find_non_gsk_row_spans(
+        #     po_grid = table.grid,
+        #     ocr_table=ocr_table,
+        #     med_col_idx=table.med_col_idx,
+        #     non_gsk_med_list=non_gsk_med_list,
+        #     grid_idx = table.table_index
+        # )
+
+        # if start_row is not None:
+        #     all_matched_cells.add((grid_idx, start_row, end_row))
 
-        po_table_count = sum(1 for t in tables.tables if t.is_po)
+        logger.debug("Non GSK products | %s", non_gsk_med_list)
+        spans = find_fragmented_match(
+            po_grid=table.grid,
+            med_col_idx=table.med_col_idx,
+            non_gsk_med_list=non_gsk_med_list,
+            header_rows=table.header_rows,
+        )
 
-        print( tables )
         logger.info(
-            f"Stage 4 | Table evaluation completed | po_tables={po_table_count} | total_tables={len(tables.tables)}"
+        "Stage 5 | Returned spans from matcher | table=%d | spans=%s",
+        table.table_index,
+        spans
         )
 
-        # ---------------------------------------------------------------------
-        # Stage 5 ->  Finding Coordinates
-        # ---------------------------------------------------------------------
+        for (start_row, end_row) in spans:
+            grid_idx = table.table_index
+            logger.info(
+                "Adding matched span | table=%d | start_row=%d | end_row=%d",
+                grid_idx, start_row, end_row
+            )
+            all_matched_cells.add((grid_idx, start_row, end_row))
 
-        logger.info("Stage 5 | Entering coordinates finding phase")
+    logger.info(
+        "Stage 5 | Non-GSK medicine cells identified | count=%d",
+        len(all_matched_cells)
+    )
 
-        all_matched_cells = set()
+    for grid_idx, start_row, end_row in sorted(all_matched_cells):
+        logger.info(
+            "Non-GSK Medicine Span → table_index=%d | start_row=%d | end_row=%d",
+            grid_idx,
+            start_row,
+            end_row
+        )
 
-        # --------------------> Finding the Min_X and Max_X coordinates <-------------------------------
 
+    y_spans = set()
 
-        # -------------------------------------------------
-        # STEP 1: Get FIRST PO table evaluation
-        # -------------------------------------------------
+    for (grid_idx, start_row, end_row) in all_matched_cells:
 
-        first_po_table = next(
-            (t for t in tables.tables if t.is_po),
-            None
+        # 1. Get Y bounds from OCR
+        y1, y2 = get_y1_y2_from_ocr(
+            ocr_tables=ocr_tables,
+            grid_idx=grid_idx,
+            start_row=start_row,
+            end_row=end_row,
+            geometry=geometries[grid_idx]
         )
 
-        if first_po_table is None:
-            logger.warning("Stage 5 | No PO tables found — skipping coordinate extraction")
-            # sys.exit(0)
-            raise RuntimeError("No PO tables found in document")
-
-
-        logger.info(
-            "Stage 5 | First PO table identified | table_index=%d | page=%d",
-            first_po_table.table_index,
-            first_po_table.page_number
+        logger.debug(
+            "Y-SPAN RESULT | table=%d | start_row=%d | end_row=%d | y1=%.4f | y2=%.4f",
+            grid_idx,
+            start_row,
+            end_row,
+            y1 if y1 is not None else -1,
+            y2 if y2 is not None else -1
         )
 
-        # -------------------------------------------------
-        # STEP 2: Navigate back to OCR table using index
-        # -------------------------------------------------
+        # 2. Resolve page number via Pydantic table
+        table_eval = tables_by_index[grid_idx]
 
-        first_ocr_table = ocr_result["tables"][first_po_table.table_index]
+        page_no = table_eval.page_number - 1  # fitz is 0-based
 
-        # -------------------------------------------------
-        # STEP 3: Compute global X bounds for PO tables
-        # -------------------------------------------------
+        logger.debug(
+            "PAGE RESOLUTION | table=%d | pydantic_page=%d | fitz_page=%d",
+            grid_idx,
+            table_eval.page_number,
+            page_no
+        )
 
-        x_min, x_max = get_table_x_bounds(first_ocr_table)
+        # 3. Store span
+        y_spans.add((page_no, y1, y2))
 
-        logger.info(
-            "Stage 5 | PO table X bounds calculated | x_min=%.2f | x_max=%.2f",
+        logger.debug(
+            "FINAL REDACTION SPAN | page=%d | x1=%.2f | x2=%.2f | y1=%.4f | y2=%.4f",
+            page_no,
             x_min,
-            x_max
+            x_max,
+            y1,
+            y2
         )
 
+    y_spans |= fallback_spans
 
-        for table in tables.tables:
+    logger.info("========== REDACTION INPUT DUMP ==========")
 
-            # Only PO tables are relevant
-            if not table.is_po:
-                continue
+    logger.info("X-BOUNDS | x1=%.2f | x2=%.2f", x_min, x_max)
 
-            # If medicine column was not identified, skip safely
-            if table.med_col_idx is None:
-                logger.warning(
-                    "Skipping table %d (page %d) — med_col_idx not found",
-                    table.table_index,
-                    table.page_number
-                )
-                continue
+    for page_no, y1, y2 in sorted(y_spans):
+        logger.debug(
+            "REDACT SPAN | page=%d | x1=%.2f | x2=%.2f | y1=%.2f | y2=%.2f",
+            page_no, x_min, x_max, y1, y2
+        )
 
-            logger.info(
-                "Stage 5 | Scanning table %d on page %d (med_col_idx=%d)",
-                table.table_index,
-                table.page_number,
-                table.med_col_idx
-            )
+    logger.info("========== END REDACTION INPUT ==========")
 
-            ocr_table = ocr_result["tables"][table.table_index]
-
-            # grid_idx, start_row, end_row = find_non_gsk_row_spans(
-            #     po_grid = table.grid,
-            #     ocr_table=ocr_table,
-            #     med_col_idx=table.med_col_idx,
-            #     non_gsk_med_list=non_gsk_med_list,
-            #     grid_idx = table.table_index
-            # )
-
-            # if start_row is not None:
-            #     all_matched_cells.add((grid_idx, start_row, end_row))
-
-            # spans = find_non_gsk_row_spans(
-            # po_grid=table.grid,
-            # ocr_table=ocr_table,
-            # med_col_idx=table.med_col_idx,
-            # non_gsk_med_list=non_gsk_med_list,
-            # grid_idx=table.table_index
-            # )
-
-            print("Non GSK products:")
-            for non_gsk in non_gsk_med_list:
-                print(non_gsk)
-            print("*"*50)
-            spans = find_fragmented_match(
-                po_grid=table.grid,
-                med_col_idx=table.med_col_idx,
-                non_gsk_med_list=non_gsk_med_list,
-                header_rows=table.header_rows,
-            )
+    return {"x_bounds": (x_min, x_max), "y_spans": y_spans}
 
-            logger.info(
-            "Stage 5 | Returned spans from matcher | table=%d | spans=%s",
-            table.table_index,
-            spans
-            )
 
-            for (start_row, end_row) in spans:
-                grid_idx = table.table_index
-                logger.info(
-                    "Adding matched span | table=%d | start_row=%d | end_row=%d",
-                    grid_idx, start_row, end_row
-                )
-                all_matched_cells.add((grid_idx, start_row, end_row))
+def stage_redaction_generation(pdf_bytes, x_bounds, y_spans, file_name):
+    x_min, x_max = x_bounds
+    redacted_pdf_bytes=redact_pdf_from_stream_with_spans(
+        pdf_stream=pdf_bytes,
+        x1=x_min,
+        x2=x_max,
+        y_spans=y_spans
+    )
+    logger.info(
+        "Stage 5 | Redacted PDF generated",
+        extra={"output_path": f"REDACTED_OUTPUT/{file_name}"}
+    )
+    return {"redacted_pdf_bytes": redacted_pdf_bytes}
 
-            # all_matched_cells.update(matched)
 
+def stage_masked_file_upload(redacted_pdf_bytes, file_name, file_id, ingestion_id, pdf_hash):
+    # -------------------------------------------------------------------------
+    # UPLOAD MASKED PDF + INSERT DB RECORD
+    # -------------------------------------------------------------------------
+    if not (ingestion_id and file_id):
         logger.info(
-            "Stage 5 | Non-GSK medicine cells identified | count=%d",
-            len(all_matched_cells)
+            "Skipping masked file persistence — local / non-ingestion flow",
+            extra={"filename": file_name}
         )
+        return {"masked_file_id": None, "masked_blob_name": None}
 
-        for grid_idx, start_row, end_row in sorted(all_matched_cells):
-            logger.info(
-                "Non-GSK Medicine Span → table_index=%d | start_row=%d | end_row=%d",
-                grid_idx,
-                start_row,
-                end_row
-            )
-        
-
+    try:
+        masked_blob_name = build_masked_blob_name(
+            file_id=file_id,
+            original_file_name=file_name
+        )
+        upload_bytes_to_blob(
+            container_name="maskedpdfs",
+            blob_name=masked_blob_name,
+            data=redacted_pdf_bytes
+        )
+        # The Power Automate email is queued in the same transaction
+        masked_file_id = insert_masked_file(
+            file_id=file_id,
+            masked_blob_name=masked_blob_name,
+            content_hash=pdf_hash,
+            ingestion_id=ingestion_id
+        )
+        logger.info(
+            "Masked PDF uploaded and DB record created",
+            extra={
+                "file_id": file_id,
+                "masked_file_id": masked_file_id,
+                "blob_name": masked_blob_name
+            }
+        )
+        # Deliver the queued email now rather than at the next outbox poll
+        outbox_dispatcher.wake()
+    except Exception as exc:
+        logger.exception(
+            "Masked file upload / DB insert failed",
+            extra={"file_id": file_id}
+        )
+        raise RuntimeError("Masked file persistence failed") from exc
 
+    return {"masked_file_id": str(masked_file_id), "masked_blob_name": masked_blob_name}
 
-        y_spans = set()
 
-        for (grid_idx, start_row, end_row) in all_matched_cells:
+def build_pipeline_graph() -> list[Stage]:
+    """
+    The PO pipeline as a dependency graph. After the layout analysis,
+    medicine extraction, header, PO items and table evaluation run
+    side by side; matching / redaction / upload wait for what they need.
+    """
+    ids = ("file_name", "file_id", "ingestion_id")
+
+    return [
+        Stage("STAGE_1_LAYOUT_EXTRACTION", stage_layout_extraction,
+              inputs=("pdf_bytes",),
+              outputs=("analysis", "ocr_text", "layout_result")),
+        Stage("STAGE_1_MEDICINE_EXTRACTION", stage_medicine_extraction,
+              inputs=("ocr_text", "layout_result"),
+              outputs=("non_gsk_med_list", "fallback_spans")),
+        Stage("STAGE_2_HEADER_EXTRACTION", stage_header_extraction,
+              inputs=("pdf_bytes", "analysis"),
+              outputs=("header_data",)),
+        Stage("STAGE_2_HEADER_INSERTION", stage_header_insertion,
+              inputs=("header_data", *ids),
+              outputs=("po_id",)),
+        Stage("STAGE_3_PO_ITEM_EXTRACTION", stage_po_item_extraction,
+              inputs=("ocr_text",),
+              outputs=("po_item_list",)),
+        Stage("STAGE_3_PO_ITEM_INSERTION", stage_po_item_insertion,
+              inputs=("po_item_list", "po_id", *ids)),
+        Stage("STAGE_4_OCR_PROCESSING", stage_ocr_processing,
+              inputs=("pdf_bytes", "analysis"),
+              outputs=("ocr_tables",)),
+        Stage("STAGE_4_TABLE_EVALUATION", stage_table_evaluation,
+              inputs=("ocr_tables",),
+              outputs=("table_evaluation",)),
+        Stage("STAGE_5_COORDINATE_MATCHING", stage_coordinate_matching,
+              inputs=("ocr_tables", "table_evaluation", "non_gsk_med_list", "fallback_spans"),
+              outputs=("x_bounds", "y_spans")),
+        Stage("STAGE_5_REDACTION_GENERATION", stage_redaction_generation,
+              inputs=("pdf_bytes", "x_bounds", "y_spans", "file_name"),
+              outputs=("redacted_pdf_bytes",)),
+        # Only publish the masked file once the DB rows are in place
+        Stage("FINAL_MASKED_FILE_UPLOAD", stage_masked_file_upload,
+              inputs=("redacted_pdf_bytes", *ids, "pdf_hash"),
+              outputs=("masked_file_id", "masked_blob_name"),
+              after=("STAGE_2_HEADER_INSERTION", "STAGE_3_PO_ITEM_INSERTION")),
+    ]
+
+
+PIPELINE_GRAPH = build_pipeline_graph()
+
+# Stages reported through process_pdf(on_stage=...)
+PIPELINE_STAGES = [stage.name for stage in PIPELINE_GRAPH]
+
+
+# Concurrent process_pdf calls for the same PDF + file share one pipeline run
+_in_flight = SingleFlight()
+
+PROCESS_STATUS_PROCESSED = "PROCESSED"
+PROCESS_STATUS_DUPLICATE = "DUPLICATE"
+
+
+def ingestion_status_for(result: dict) -> str:
+    """PARTIAL when some tables could not be classified nor matched."""
+    return "PARTIAL" if result.get("unresolved_table_indices") else "COMPLETED"
+
+
+def reuse_processed_file(existing: dict, pdf_hash: str, file_name: str,
+                         file_id: str, ingestion_id: str) -> dict:
+    """
+    Result for a PDF whose MaskedFile already exists.
 
-        #     logger.info(
-        #         "Y-SPAN REQUEST | table=%d | start_row=%d | end_row=%d",
-        #         grid_idx,
-        #         start_row,
-        #         end_row
-        #     )
+    Same file (e.g. a Power Automate retry): the existing record.
+    Other file / ingestion (e.g. a duplicate email): this file gets its own
+    POHeader / POItem copies and MaskedFile row pointing at the existing
+    masked blob, and its own "masked file ready" notification.
+    """
+    if existing["file_id"].lower() == file_id.lower():
+        masked_file_id = existing["masked_file_id"]
+    else:
+        masked_file_id = str(insert_masked_file_copy(
+            source_file_id=existing["file_id"],
+            file_id=file_id,
+            ingestion_id=ingestion_id,
+            masked_blob_name=existing["masked_blob_name"],
+            content_hash=pdf_hash
+        ))
+        outbox_dispatcher.wake()
+
+    logger.info(
+        "PDF already processed, reusing existing masked file",
+        extra={
+            "filename": file_name,
+            "content_hash": pdf_hash,
+            "file_id": file_id,
+            "masked_file_id": masked_file_id,
+            "source_file_id": existing["file_id"]
+        }
+    )
+    return {
+        "status": PROCESS_STATUS_DUPLICATE,
+        "content_hash": pdf_hash,
+        "masked_file_id": masked_file_id,
+        "masked_blob_name": existing["masked_blob_name"],
+        "deduplicated": "completed",
+    }
+
+
+def process_pdf(pdf_bytes: bytes, file_name: str, file_id: str | None = None, ingestion_id: str | None = None,
+                on_stage: Callable[[str, str], None] | None = None, update_status: bool = True,
+                force: bool = False) -> dict:
+    """
+    on_stage: optional callback invoked as on_stage(stage, status) when a
+              stage starts (RUNNING) and ends (COMPLETED / FAILED /
+              CANCELLED). Independent stages run concurrently, so several
+              stages can be RUNNING at once (used for job progress).
+    update_status: write dbo.Ingestion PROCESSING / COMPLETED / ERROR for
+              this file. Batches pass False and update the ingestion once.
+    force:    re-run the pipeline even if these bytes were already masked
+              or are being processed right now.
+
+    Idempotency is keyed by the SHA-256 of pdf_bytes:
+      - concurrent calls for the same bytes AND file / ingestion run the
+        pipeline once and all receive its result; if it fails, only the
+        run that failed updates dbo.Ingestion, logs the failure and
+        queues the error email (the others raise SharedFailure),
+      - in the ingestion flow, a PDF whose MaskedFile already exists is
+        not processed again (see reuse_processed_file); the check runs
+        inside the single-flight, so a run finishing just before is seen.
+
+    Returns {"status": PROCESSED | DUPLICATE, "content_hash",
+             "masked_file_id", "masked_blob_name", "deduplicated"}
+    where deduplicated is None, "completed" or "in_flight". Pipeline runs
+    also carry "failed_table_indices" / "unresolved_table_indices" (tables
+    whose classification failed; unresolved ones were not matched and
+    leave the ingestion PARTIAL).
+    """
 
-            # 1. Get Y bounds from OCR
-            y1, y2 = get_y1_y2_from_ocr(
-                ocr_tables=ocr_result["tables"],
-                grid_idx=grid_idx,
-                start_row=start_row,
-                end_row=end_row
-            )
+    current_stage = "INIT"
+    started = time.perf_counter()
 
-            logger.info(
-                "Y-SPAN RESULT | table=%d | start_row=%d | end_row=%d | y1=%.4f | y2=%.4f",
-                grid_idx,
-                start_row,
-                end_row,
-                y1 if y1 is not None else -1,
-                y2 if y2 is not None else -1
-            )
+    def track_stage(stage: str, status: str):
+        nonlocal current_stage
+        if status == STAGE_RUNNING:
+            current_stage = stage
+        if on_stage:
+            on_stage(stage, status)
 
-            # 2. Resolve page number via Pydantic table
-            table_eval = next(
-                t for t in tables.tables if t.table_index == grid_idx
-            )
+    try:
+        logger.info(
+            "PDF processing started (bytes)",
+            extra={
+                "filename": file_name,
+                "byte_size": len(pdf_bytes),
+                "force": force
+            }
+        )
+            
+        # Normalize IDs ONLY if provided (Power Automate flow)
+        if ingestion_id:
+            ingestion_id = normalize_guid(ingestion_id, "IngestionID")
+        if file_id:
+            file_id = normalize_guid(file_id, "FileID")
+        if ingestion_id and update_status:
+            update_ingestion_status(ingestion_id, "PROCESSING")  
 
-            page_no = table_eval.page_number - 1  # fitz is 0-based
+        pdf_hash = content_hash(pdf_bytes)
+        persisted = bool(ingestion_id and file_id)
 
-            logger.info(
-                "PAGE RESOLUTION | table=%d | pydantic_page=%d | fitz_page=%d",
-                grid_idx,
-                table_eval.page_number,
-                page_no
-            )
+        # ---------------------------------------------------------------------
+        # Stage 1 -> LLM Classifier (disabled)
+        # ---------------------------------------------------------------------
 
-            # 3. Store span
-            y_spans.add((page_no, y1, y2))
+        # logger.info("Stage 1 | Running LLM PO classifier on PDF images")
+        # po_clasify_result = classify_po_pdf_from_images(pdf_bytes)
+        # flag = po_clasify_result.Type
 
-            logger.info(
-                "FINAL REDACTION SPAN | page=%d | x1=%.2f | x2=%.2f | y1=%.4f | y2=%.4f",
-                page_no,
-                x_min,
-                x_max,
-                y1,
-                y2
+        def run_pipeline() -> dict:
+            nonlocal current_stage
+
+            # Already masked -> reuse the existing MaskedFile
+            if persisted and not force:
+                current_stage = "IDEMPOTENCY_CHECK"
+                existing = get_masked_file_by_content_hash(pdf_hash)
+                if existing:
+                    return reuse_processed_file(existing, pdf_hash, file_name, file_id, ingestion_id)
+
+            values = run_stage_graph(
+                PIPELINE_GRAPH,
+                initial={
+                    "pdf_bytes": pdf_bytes,
+                    "pdf_hash": pdf_hash,
+                    "file_name": file_name,
+                    "file_id": file_id,
+                    "ingestion_id": ingestion_id,
+                },
+                on_stage=track_stage
             )
+            return {
+                "status": PROCESS_STATUS_PROCESSED,
+                "content_hash": pdf_hash,
+                "masked_file_id": values["masked_file_id"],
+                "masked_blob_name": values["masked_blob_name"],
+                "deduplicated": None,
+                "failed_table_indices": values["table_evaluation"].failed_table_indices,
+                "unresolved_table_indices": values["table_evaluation"].unresolved_table_indices,
+            }
 
-        y_spans |= fallback_spans
+        if force:
+            result = run_pipeline()
+        else:
+            result, shared = _in_flight.do((pdf_hash, file_id, ingestion_id), run_pipeline)
+            if shared:
+                logger.info(
+                    "Same PDF was being processed for this file, reused its result",
+                    extra={"filename": file_name, "content_hash": pdf_hash, "file_id": file_id}
+                )
+                result = {**result, "status": PROCESS_STATUS_DUPLICATE, "deduplicated": "in_flight"}
 
-        logger.info("========== REDACTION INPUT DUMP ==========")
+        if ingestion_id and update_status:
+            update_ingestion_status(ingestion_id, ingestion_status_for(result))
 
-        logger.info("X-BOUNDS | x1=%.2f | x2=%.2f", x_min, x_max)
+        PIPELINE_DOCUMENT_SECONDS.observe(
+            time.perf_counter() - started,
+            outcome="duplicate" if result["deduplicated"] else "ok"
+        )
 
-        for page_no, y1, y2 in sorted(y_spans):
-            logger.info(
-                "REDACT SPAN | page=%d | x1=%.2f | x2=%.2f | y1=%.2f | y2=%.2f",
-                page_no, x_min, x_max, y1, y2
-            )
+        return result
 
-        logger.info("========== END REDACTION INPUT ==========")
+    except Exception as exc:
+        PIPELINE_DOCUMENT_SECONDS.observe(time.perf_counter() - started, outcome="error")
 
+        # Joined a run that failed: that run already set ERROR, logged the
+        # failure and queued the error email - only fail this caller
+        if isinstance(exc, SharedFailure):
+            logger.warning(
+                "Joined PDF processing run failed",
+                extra={
+                    "filename": file_name,
+                    "file_id": file_id,
+                    "ingestion_id": ingestion_id,
+                    "stage": exc.stage,
+                    "error": str(exc.error)
+                }
+            )
+            raise
 
-        current_stage = "STAGE_5_REDACTION_GENERATION"
-        redacted_pdf_bytes=redact_pdf_from_stream_with_spans(
-            pdf_stream=pdf_bytes,
-            x1=x_min,
-            x2=x_max,
-            y_spans=y_spans
-        )
-        logger.info(
-            "Stage 5 | Redacted PDF generated",
-            extra={"output_path": f"REDACTED_OUTPUT/{file_name}"}
-        )
-        # -------------------------------------------------------------------------
-            # UPLOAD MASKED PDF + INSERT DB RECORD
-            # -------------------------------------------------------------------------
-        if ingestion_id and file_id:
-            try:
-                masked_blob_name = build_masked_blob_name(
-                    file_id=file_id,
-                    original_file_name=file_name
-                )
-                current_stage = "FINAL_MASKED_FILE_UPLOAD"
-                upload_bytes_to_blob(
-                    container_name="maskedpdfs",
-                    blob_name=masked_blob_name,
-                    data=redacted_pdf_bytes
-                )
-                masked_file_id = insert_masked_file(
-                    file_id=file_id,
-                    masked_blob_name=masked_blob_name
-                )
-                logger.info(
-                    "Masked PDF uploaded and DB record created",
-                    extra={
-                        "file_id": file_id,
-                        "masked_file_id": masked_file_id,
-                        "blob_name": masked_blob_name
-                    }
-                )
-                # Trigger Power Automate email notification
-                trigger_power_automate_email(
-                    ingestion_id=ingestion_id,
-                    masked_blob_name=masked_blob_name
-                )
-            except Exception as exc:
-                logger.exception(
-                    "Masked file upload / DB insert failed",
-                    extra={"file_id": file_id}
-                )
-                raise RuntimeError("Masked file persistence failed") from exc
+        # The failing stage (not whichever stage started last) is reported
+        if isinstance(exc, StageFailure):
+            failed_stage, error = exc.stage, exc.error
         else:
-            logger.info(
-                "Skipping masked file persistence — local / non-ingestion flow",
-                extra={"filename": file_name}
-            )
-        if ingestion_id:
-            update_ingestion_status(ingestion_id, "COMPLETED")
-    
-    # except Exception as exc:
-    #     # -----------------------------------------
-    #     # AUTO FAILURE -> ERROR
-    #     # -----------------------------------------
-    #     if ingestion_id:
-    #         update_ingestion_status(ingestion_id, "ERROR")
-
-    #     logger.exception(
-    #         "PDF processing failed",
-    #         extra={
-    #             "filename": file_name,
-    #             "ingestion_id": ingestion_id,
-    #             "file_id": file_id
-    #         }
-    #     )
-    #     raise
-    except Exception as exc:
-        error_message = str(exc)
+            failed_stage, error = current_stage, exc
+
+        error_message = str(error)
     # -------------------------------
     # 1. Update ingestion status
     # -------------------------------
         if ingestion_id:
-            try:
-                update_ingestion_status(ingestion_id, "ERROR")
-            except Exception as status_exc:
-                logger.exception("Failed to update ingestion status to ERROR")
+            if update_status:
+                try:
+                    update_ingestion_status(ingestion_id, "ERROR")
+                except Exception as status_exc:
+                    logger.exception("Failed to update ingestion status to ERROR")
 
             try:
 
@@ -836,9 +880,9 @@ def process_pdf(pdf_bytes: bytes, file_name: str, file_id: str | None = None, in
                 # 2. Persist failure to DB
                 # -------------------------------
                 log_processing_failure(
-                    error=exc,
+                    error=error,
                     category="PIPELINE_ERROR",
-                    stage=current_stage,
+                    stage=failed_stage,
                     ingestion_id=ingestion_id,
                     file_id=file_id,
                     filename=file_name
@@ -846,14 +890,14 @@ def process_pdf(pdf_bytes: bytes, file_name: str, file_id: str | None = None, in
             except Exception as db_exc:
                 logger.exception("Failed to log processing failure to DB")
             try:
-                trigger_power_automate_error(
+                queue_error_notification(
                     ingestion_id=ingestion_id,
-                    error_stage=current_stage,
+                    error_stage=failed_stage,
                     error_message=error_message,
                     file_name=file_name
                 )
             except Exception as notify_exc:
-                logger.exception("Failed to trigger Power Automate error notification")
+                logger.exception("Failed to queue Power Automate error notification")
 
         # -------------------------------
         # 3. Log for developers
@@ -864,7 +908,7 @@ def process_pdf(pdf_bytes: bytes, file_name: str, file_id: str | None = None, in
                 "filename": file_name,
                 "ingestion_id": ingestion_id,
                 "file_id": file_id,
-                "stage": current_stage
+                "stage": failed_stage
             }
         )
 
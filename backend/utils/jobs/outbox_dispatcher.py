@@ -0,0 +1,214 @@
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from db.insert.outbox_insert import NOTIFICATION_MASKED_FILE, NOTIFICATION_PROCESSING_ERROR
+from db.update.outbox_update import (
+    claim_due_notifications,
+    mark_notifications_failed,
+    mark_notifications_sent,
+)
+from utils.logging.logger import get_logger
+from utils.metrics.metrics import NOTIFICATIONS, external_call
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+POWER_AUTOMATE_WEBHOOK_URL = os.getenv("POWER_AUTOMATE_WEBHOOK_URL")
+POWER_AUTOMATE_ERROR_WEBHOOK_URL = os.getenv("POWER_AUTOMATE_ERROR_WEBHOOK_URL")
+
+OUTBOX_DISPATCHER_ENABLED = os.getenv("OUTBOX_DISPATCHER_ENABLED", "true").lower() == "true"
+# Idle poll interval; enqueueing in this process wakes the dispatcher early
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_SEND_WORKERS = int(os.getenv("OUTBOX_SEND_WORKERS", "4"))
+OUTBOX_HTTP_TIMEOUT = float(os.getenv("OUTBOX_HTTP_TIMEOUT", "10"))
+# Claimed rows become due again after this if the process dies mid-send
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+# Attempts before a notification is dead-lettered
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+
+WEBHOOK_URLS = {
+    NOTIFICATION_MASKED_FILE: POWER_AUTOMATE_WEBHOOK_URL,
+    NOTIFICATION_PROCESSING_ERROR: POWER_AUTOMATE_ERROR_WEBHOOK_URL,
+}
+
+# 4xx responses worth retrying; any other 4xx is dead-lettered at once
+_RETRYABLE_CLIENT_ERRORS = {408, 409, 425, 429}
+
+
+class PermanentDeliveryError(Exception):
+    """Delivery can never succeed as is (bad request, no webhook URL)."""
+
+
+def backoff_seconds(attempts: int,
+                    base: float = OUTBOX_BACKOFF_BASE_SECONDS,
+                    cap: float = OUTBOX_BACKOFF_MAX_SECONDS) -> int:
+    """Exponential backoff with jitter for the given attempt number (1-based)."""
+    delay = min(cap, base * (2 ** (attempts - 1)))
+    return max(1, int(random.uniform(delay / 2, delay)))
+
+
+class OutboxDispatcher:
+    """
+    Background delivery of dbo.NotificationOutbox to Power Automate.
+
+    - Claims due PENDING rows in batches (claim_due_notifications)
+    - Posts them concurrently over ONE pooled requests.Session
+    - Marks the batch SENT in one statement; failures are retried with
+      exponential backoff, and dead-lettered (Status = 'DEAD') after
+      max_attempts or on a permanent error. requeue_dead_notifications()
+      puts dead rows back in the queue.
+    """
+
+    def __init__(self, batch_size: int = OUTBOX_BATCH_SIZE,
+                 send_workers: int = OUTBOX_SEND_WORKERS,
+                 poll_seconds: float = OUTBOX_POLL_SECONDS,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS):
+        self.batch_size = batch_size
+        self.send_workers = send_workers
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+
+        self._session = None
+        self._executor = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    # -------------------------------
+    # Lifecycle
+    # -------------------------------
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.send_workers)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.send_workers,
+            thread_name_prefix="outbox-send"
+        )
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+        logger.info(
+            "Outbox dispatcher started",
+            extra={"batch_size": self.batch_size, "send_workers": self.send_workers}
+        )
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+        self._session.close()
+        self._thread = None
+
+        logger.info("Outbox dispatcher stopped")
+
+    def wake(self):
+        """Deliver now instead of at the next poll (after a commit)."""
+        self._wake.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                delivered = self.dispatch_once()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                delivered = 0
+
+            # A full batch means more may be due: go again without waiting
+            if delivered < self.batch_size:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    # -------------------------------
+    # Delivery
+    # -------------------------------
+    def dispatch_once(self) -> int:
+        """Claims and delivers one batch; returns the number claimed."""
+        batch = claim_due_notifications(self.batch_size, OUTBOX_LEASE_SECONDS)
+        if not batch:
+            return 0
+
+        results = list(self._executor.map(self._deliver, batch))
+
+        sent, retries, dead = [], [], []
+        for notification, error in zip(batch, results):
+            kind = notification["kind"]
+            if error is None:
+                sent.append(notification["notification_id"])
+                NOTIFICATIONS.inc(kind=kind, outcome="sent")
+            elif isinstance(error, PermanentDeliveryError) or notification["attempts"] >= self.max_attempts:
+                dead.append((notification["notification_id"], str(error)))
+                NOTIFICATIONS.inc(kind=kind, outcome="dead")
+            else:
+                retries.append((
+                    notification["notification_id"],
+                    backoff_seconds(notification["attempts"]),
+                    str(error)
+                ))
+                NOTIFICATIONS.inc(kind=kind, outcome="retry")
+
+        mark_notifications_sent(sent)
+        mark_notifications_failed(retries, dead)
+
+        for notification_id, error in dead:
+            logger.error(
+                "Notification dead-lettered",
+                extra={"notification_id": notification_id, "error": error}
+            )
+
+        logger.info(
+            "Outbox batch delivered",
+            extra={"sent": len(sent), "retry": len(retries), "dead": len(dead)}
+        )
+        return len(batch)
+
+    def _deliver(self, notification: dict) -> Exception | None:
+        """Posts one notification; returns the error or None."""
+        kind = notification["kind"]
+        url = WEBHOOK_URLS.get(kind)
+
+        if not url:
+            return PermanentDeliveryError(f"No webhook URL configured for {kind}")
+
+        try:
+            with external_call("power_automate", kind):
+                response = self._session.post(
+                    url,
+                    json=notification["payload"],
+                    timeout=OUTBOX_HTTP_TIMEOUT
+                )
+                response.raise_for_status()
+
+        except requests.exceptions.HTTPError as exc:
+            status_code = exc.response.status_code
+            if 400 <= status_code < 500 and status_code not in _RETRYABLE_CLIENT_ERRORS:
+                return PermanentDeliveryError(f"HTTP {status_code}: {exc}")
+            return exc
+
+        except requests.exceptions.RequestException as exc:
+            return exc
+
+        return None
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,459 @@
+import os
+import threading
+import uuid
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from db.update.ingestion_status_update import update_ingestion_status
+from process_po import PIPELINE_STAGES, ingestion_status_for, process_pdf, queue_error_notification
+from utils.azure.blob_reader import download_blob_as_bytes
+from utils.logging.logger import get_logger
+from utils.logging.error_handler import log_processing_failure
+from utils.metrics.metrics import JOBS_FINISHED, JOBS_IN_FLIGHT
+
+logger = get_logger(__name__)
+
+PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "2"))
+PDF_JOB_MAX_PENDING = int(os.getenv("PDF_JOB_MAX_PENDING", "50"))
+PDF_JOB_HISTORY = int(os.getenv("PDF_JOB_HISTORY", "1000"))
+
+JOB_QUEUED = "QUEUED"
+JOB_RUNNING = "RUNNING"
+JOB_COMPLETED = "COMPLETED"
+JOB_FAILED = "FAILED"
+# Batch finished with both completed and failed jobs
+JOB_COMPLETED_WITH_ERRORS = "COMPLETED_WITH_ERRORS"
+
+STAGE_BLOB_DOWNLOAD = "BLOB_DOWNLOAD"
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue already holds PDF_JOB_MAX_PENDING unfinished jobs."""
+
+
+class PDFJob:
+    """
+    State of one /pdf/process-blob request.
+    Mutated only under PDFJobQueue._lock.
+    """
+
+    def __init__(self, request: dict, batch_id: str | None = None):
+        self.job_id = str(uuid.uuid4())
+        self.request = request
+        self.batch_id = batch_id
+        self.status = JOB_QUEUED
+        self.current_stage = None
+        self.stages: list[dict] = []
+        self.error = None
+        self.result = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def update_stage(self, stage: str, status: str):
+        """
+        Records a stage event. Pipeline stages can overlap, so each
+        stage entry is opened (RUNNING) and closed independently.
+        """
+        now = datetime.utcnow()
+        if status == JOB_RUNNING:
+            self.stages.append({
+                "stage": stage,
+                "status": JOB_RUNNING,
+                "started_at": now,
+                "finished_at": None,
+            })
+            self.current_stage = stage
+            return
+
+        for entry in reversed(self.stages):
+            if entry["stage"] == stage and entry["status"] == JOB_RUNNING:
+                entry["status"] = status
+                entry["finished_at"] = now
+                return
+
+        # Never started (e.g. cancelled after an upstream failure)
+        self.stages.append({
+            "stage": stage,
+            "status": status,
+            "started_at": None,
+            "finished_at": now,
+        })
+
+    def finish(self, status: str, error: str | None = None):
+        now = datetime.utcnow()
+        for entry in self.stages:
+            if entry["status"] == JOB_RUNNING:
+                entry["status"] = status
+                entry["finished_at"] = now
+        self.status = status
+        self.error = error
+        self.finished_at = now
+
+    def to_dict(self) -> dict:
+        completed = sum(1 for s in self.stages if s["status"] == JOB_COMPLETED)
+        if self.status == JOB_COMPLETED:
+            progress = 100
+        else:
+            # +1 for the blob download that happens before process_pdf
+            progress = min(99, int(100 * completed / (len(PIPELINE_STAGES) + 1)))
+
+        return {
+            "job_id": self.job_id,
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "progress": progress,
+            "current_stage": self.current_stage,
+            "running_stages": [s["stage"] for s in self.stages if s["status"] == JOB_RUNNING],
+            "stages": [dict(s) for s in self.stages],
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            **self.request,
+        }
+
+
+class PDFBatch:
+    """
+    Aggregate handle of the jobs of one /pdf/process-batch request.
+
+    dbo.Ingestion is updated once per ingestion of the batch instead of
+    once per file: PROCESSING when its first job starts, COMPLETED / ERROR
+    when its last job finishes. Mutated only under PDFJobQueue._lock.
+    """
+
+    def __init__(self, jobs: list[PDFJob], batch_id: str):
+        self.batch_id = batch_id
+        self.jobs = jobs
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+        self._remaining: dict[str, int] = {}
+        for job in jobs:
+            ingestion_id = job.request["ingestion_id"]
+            self._remaining[ingestion_id] = self._remaining.get(ingestion_id, 0) + 1
+        self._started: set[str] = set()
+        self._failed: set[str] = set()
+        self._partial: set[str] = set()
+
+    @property
+    def is_finished(self) -> bool:
+        return all(job.is_finished for job in self.jobs)
+
+    def start_ingestion(self, ingestion_id: str) -> bool:
+        """True for the first job of ingestion_id to start."""
+        if ingestion_id in self._started:
+            return False
+        self._started.add(ingestion_id)
+        return True
+
+    def finish_job(self, job: PDFJob) -> str | None:
+        """
+        Final dbo.Ingestion status once the last job of the job's
+        ingestion has finished, else None.
+        """
+        ingestion_id = job.request["ingestion_id"]
+        if job.status == JOB_FAILED:
+            self._failed.add(ingestion_id)
+        elif job.result and ingestion_status_for(job.result) == "PARTIAL":
+            self._partial.add(ingestion_id)
+
+        self._remaining[ingestion_id] -= 1
+        if self.is_finished:
+            self.finished_at = datetime.utcnow()
+
+        if self._remaining[ingestion_id]:
+            return None
+        if ingestion_id in self._failed:
+            return "ERROR"
+        return "PARTIAL" if ingestion_id in self._partial else "COMPLETED"
+
+    @property
+    def status(self) -> str:
+        statuses = [job.status for job in self.jobs]
+        if not self.is_finished:
+            return JOB_QUEUED if all(s == JOB_QUEUED for s in statuses) else JOB_RUNNING
+        if all(s == JOB_COMPLETED for s in statuses):
+            return JOB_COMPLETED
+        if all(s == JOB_FAILED for s in statuses):
+            return JOB_FAILED
+        return JOB_COMPLETED_WITH_ERRORS
+
+    def to_dict(self) -> dict:
+        jobs = [job.to_dict() for job in self.jobs]
+        counts: dict[str, int] = {}
+        for job in jobs:
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+
+        return {
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "progress": 100 if self.is_finished else int(sum(job["progress"] for job in jobs) / len(jobs)),
+            "job_count": len(jobs),
+            "status_counts": counts,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "jobs": [
+                {
+                    "job_id": job["job_id"],
+                    "status": job["status"],
+                    "progress": job["progress"],
+                    "current_stage": job["current_stage"],
+                    "error": job["error"],
+                    "result": job["result"],
+                    "blob_file_name": job["blob_file_name"],
+                    "file_id": job["file_id"],
+                    "ingestion_id": job["ingestion_id"],
+                }
+                for job in jobs
+            ],
+        }
+
+
+class PDFJobQueue:
+    """
+    Bounded worker pool that runs blob download + process_pdf
+    off the event loop. Single jobs and batch jobs share the same
+    workers (and so the same blob / ADI / OpenAI clients and caches).
+    """
+
+    def __init__(self, max_workers: int = PDF_JOB_WORKERS,
+                 max_pending: int = PDF_JOB_MAX_PENDING,
+                 history: int = PDF_JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="pdf-job"
+        )
+        self._max_pending = max_pending
+        self._history = history
+        self._jobs: "OrderedDict[str, PDFJob]" = OrderedDict()
+        self._batches: "OrderedDict[str, PDFBatch]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if not j.is_finished)
+
+    def submit(self, request: dict) -> PDFJob:
+        job = PDFJob(request)
+
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.is_finished)
+            if pending >= self._max_pending:
+                raise JobQueueFullError(
+                    f"PDF job queue is full ({pending} pending jobs)"
+                )
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+
+        self._schedule(job)
+
+        logger.info(
+            "PDF job queued",
+            extra={"job_id": job.job_id, "pending": pending + 1}
+        )
+        return job
+
+    def submit_batch(self, requests: list[dict]) -> PDFBatch:
+        """
+        Queues all files of a batch or none of them
+        (JobQueueFullError when they do not all fit).
+        """
+        batch_id = str(uuid.uuid4())
+        jobs = [PDFJob(request, batch_id=batch_id) for request in requests]
+        batch = PDFBatch(jobs, batch_id)
+
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.is_finished)
+            if pending + len(jobs) > self._max_pending:
+                raise JobQueueFullError(
+                    f"PDF job queue cannot take {len(jobs)} more jobs "
+                    f"({pending} pending, limit {self._max_pending})"
+                )
+            for job in jobs:
+                self._jobs[job.job_id] = job
+            self._batches[batch_id] = batch
+            self._evict_finished()
+
+        for job in jobs:
+            self._schedule(job)
+
+        logger.info(
+            "PDF batch queued",
+            extra={
+                "batch_id": batch_id,
+                "job_count": len(jobs),
+                "pending": pending + len(jobs)
+            }
+        )
+        return batch
+
+    def _schedule(self, job: PDFJob):
+        JOBS_IN_FLIGHT.inc(state="queued")
+
+        # Keep request_id and other context vars in the worker thread
+        ctx = contextvars.copy_context()
+        self._executor.submit(ctx.run, self._run, job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def get_batch(self, batch_id: str) -> dict | None:
+        with self._lock:
+            batch = self._batches.get(batch_id)
+            return batch.to_dict() if batch else None
+
+    def _evict_finished(self):
+        # Drop the oldest FINISHED jobs / batches once history is exceeded
+        for entries in (self._jobs, self._batches):
+            if len(entries) <= self._history:
+                continue
+            for key in [k for k, entry in entries.items() if entry.is_finished]:
+                if len(entries) <= self._history:
+                    break
+                del entries[key]
+
+    def _on_stage(self, job: PDFJob, stage: str, status: str):
+        with self._lock:
+            job.update_stage(stage, status)
+
+    def _run(self, job: PDFJob):
+        req = job.request
+
+        with self._lock:
+            job.status = JOB_RUNNING
+            job.started_at = datetime.utcnow()
+            batch = self._batches.get(job.batch_id) if job.batch_id else None
+            first_of_ingestion = batch is not None and batch.start_ingestion(req["ingestion_id"])
+
+        JOBS_IN_FLIGHT.dec(state="queued")
+        JOBS_IN_FLIGHT.inc(state="running")
+
+        try:
+            if first_of_ingestion:
+                self._set_ingestion_status(req["ingestion_id"], "PROCESSING")
+
+            self._on_stage(job, STAGE_BLOB_DOWNLOAD, JOB_RUNNING)
+            try:
+                pdf_bytes = download_blob_as_bytes(
+                    storage_account=req["storage_account"],
+                    container_name=req["container_name"],
+                    blob_file_name=req["blob_file_name"]
+                )
+            except Exception as exc:
+                self._record_download_failure(req, exc, update_status=batch is None)
+                raise
+            self._on_stage(job, STAGE_BLOB_DOWNLOAD, JOB_COMPLETED)
+
+            result = process_pdf(
+                pdf_bytes=pdf_bytes,
+                file_name=req["blob_file_name"],
+                file_id=req["file_id"],
+                ingestion_id=req["ingestion_id"],
+                on_stage=lambda stage, status: self._on_stage(job, stage, status),
+                update_status=batch is None,
+                force=req.get("force", False)
+            )
+
+            with self._lock:
+                job.result = result
+                job.finish(JOB_COMPLETED)
+            JOBS_FINISHED.inc(status=JOB_COMPLETED)
+
+            logger.info(
+                "Blob processing completed successfully",
+                extra={
+                    "job_id": job.job_id,
+                    "file_id": req["file_id"],
+                    "ingestion_id": req["ingestion_id"],
+                    "process_status": result["status"]
+                }
+            )
+
+        except Exception as exc:
+            with self._lock:
+                job.finish(JOB_FAILED, error=str(exc))
+            JOBS_FINISHED.inc(status=JOB_FAILED)
+
+            logger.exception(
+                "Blob processing job failed",
+                extra={
+                    "job_id": job.job_id,
+                    "blob_file_name": req["blob_file_name"],
+                    "ingestion_id": req["ingestion_id"]
+                }
+            )
+
+        finally:
+            JOBS_IN_FLIGHT.dec(state="running")
+            if batch is not None:
+                self._finish_batch_job(batch, job)
+
+    def _finish_batch_job(self, batch: PDFBatch, job: PDFJob):
+        with self._lock:
+            ingestion_status = batch.finish_job(job)
+            batch_finished = batch.is_finished
+
+        if ingestion_status:
+            self._set_ingestion_status(job.request["ingestion_id"], ingestion_status)
+
+        if batch_finished:
+            logger.info(
+                "PDF batch finished",
+                extra={"batch_id": batch.batch_id, "status": batch.status}
+            )
+
+    @staticmethod
+    def _set_ingestion_status(ingestion_id: str, status: str):
+        try:
+            update_ingestion_status(ingestion_id, status)
+        except Exception:
+            logger.exception(
+                "Failed to update ingestion status",
+                extra={"ingestion_id": ingestion_id, "status": status}
+            )
+
+    def _record_download_failure(self, req: dict, exc: Exception, update_status: bool = True):
+        # process_pdf never ran, so mark the ingestion here
+        # (batch ingestions are marked once their last job finishes)
+        if update_status:
+            try:
+                update_ingestion_status(req["ingestion_id"], "ERROR")
+            except Exception:
+                logger.exception("Failed to update ingestion status to ERROR")
+
+        try:
+            log_processing_failure(
+                error=exc,
+                category="PIPELINE_ERROR",
+                stage=STAGE_BLOB_DOWNLOAD,
+                ingestion_id=req["ingestion_id"],
+                file_id=req["file_id"],
+                filename=req["blob_file_name"]
+            )
+        except Exception:
+            logger.exception("Failed to log processing failure to DB")
+
+        # The caller already got 202, so Power Automate learns of it here
+        try:
+            queue_error_notification(
+                ingestion_id=req["ingestion_id"],
+                error_stage=STAGE_BLOB_DOWNLOAD,
+                error_message=str(exc),
+                file_name=req["blob_file_name"]
+            )
+        except Exception:
+            logger.exception("Failed to queue Power Automate error notification")
+
+
+pdf_job_queue = PDFJobQueue()
@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from openai import AzureOpenAI
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from utils.logging.logger import get_logger
+from utils.metrics.metrics import LLM_CACHE_EVENTS, external_call
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+# ======================================================
+# SHARED CLIENT (one per process)
+# ======================================================
+client = AzureOpenAI(
+    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+    api_version="2024-12-01-preview",
+)
+
+DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm/llm_cache.sqlite3")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+JSON_OBJECT_SCHEMA = "json_object"
+
+
+def make_cache_key(*, deployment: str, prompt_name: str, prompt_version: str,
+                   schema: str, temperature: float, max_tokens: int | None,
+                   messages: list) -> str:
+    """
+    deployment + prompt template version + response schema + hash of input.
+    """
+    payload = json.dumps(
+        {
+            "deployment": deployment,
+            "prompt_name": prompt_name,
+            "prompt_version": prompt_version,
+            "schema": schema,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Bounded, persisted (SQLite) cache of parsed LLM responses.
+    Least-recently-used entries are evicted beyond max_entries;
+    entries older than ttl_seconds are treated as misses.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = LLM_CACHE_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds self._lock
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    prompt_name TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access "
+                "ON llm_cache(last_access)"
+            )
+        return self._conn
+
+    def _count(self, name: str, amount: int = 1):
+        # Caller holds self._lock
+        self._stats[name] += amount
+        LLM_CACHE_EVENTS.inc(amount, event=name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._count("misses")
+                    return None
+
+                value, created_at = row
+                if now - created_at > self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    conn.commit()
+                    self._count("expired")
+                    self._count("misses")
+                    return None
+
+                conn.execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?",
+                    (now, key)
+                )
+                conn.commit()
+                self._count("hits")
+                return value
+
+            except sqlite3.Error:
+                # Cache must NEVER break the pipeline
+                logger.exception("LLM cache read failed")
+                self._count("errors")
+                self._count("misses")
+                return None
+
+    def put(self, key: str, prompt_name: str, value: str):
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, prompt_name, value, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, prompt_name, value, now, now)
+                )
+                self._count("writes")
+
+                count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                if count > self.max_entries:
+                    # Evict down to 90% so we don't evict on every write
+                    excess = count - int(self.max_entries * 0.9)
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN ("
+                        "SELECT key FROM llm_cache ORDER BY last_access LIMIT ?)",
+                        (excess,)
+                    )
+                    self._count("evictions", excess)
+                conn.commit()
+
+            except sqlite3.Error:
+                logger.exception("LLM cache write failed")
+                self._count("errors")
+
+
+llm_cache = LLMResponseCache()
+
+
+def _log_call(prompt_name: str, started: float, response=None, cache_hit=False):
+    extra = {
+        "prompt_name": prompt_name,
+        "cache_hit": cache_hit,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        extra.update({
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+        })
+    logger.info("LLM call completed", extra=extra)
+
+
+def parse_completion(*, prompt_name: str, prompt_version: str, messages: list,
+                     response_format: type[BaseModel],
+                     temperature: float | None = None,
+                     max_tokens: int | None = None,
+                     llm_client: AzureOpenAI | None = None) -> BaseModel:
+    """
+    Structured-output chat completion, memoized on
+    (deployment, prompt version, response schema, input hash).
+    """
+    started = time.perf_counter()
+    key = make_cache_key(
+        deployment=DEPLOYMENT_NAME,
+        prompt_name=prompt_name,
+        prompt_version=prompt_version,
+        schema=json.dumps(response_format.model_json_schema(), sort_keys=True),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        messages=messages,
+    )
+
+    if LLM_CACHE_ENABLED:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            _log_call(prompt_name, started, cache_hit=True)
+            return response_format.model_validate_json(cached)
+
+    kwargs = {}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+
+    with external_call("openai", prompt_name):
+        response = (llm_client or client).chat.completions.parse(
+            model=DEPLOYMENT_NAME,
+            messages=messages,
+            response_format=response_format,
+            **kwargs,
+        )
+    parsed = response.choices[0].message.parsed
+
+    if LLM_CACHE_ENABLED and parsed is not None:
+        llm_cache.put(key, prompt_name, parsed.model_dump_json())
+
+    _log_call(prompt_name, started, response=response)
+    return parsed
+
+
+def json_completion(*, prompt_name: str, prompt_version: str, messages: list,
+                    temperature: float,
+                    llm_client: AzureOpenAI | None = None) -> dict:
+    """
+    JSON-mode chat completion, memoized like parse_completion.
+    Raises json.JSONDecodeError if the model returns invalid JSON
+    (invalid responses are never cached).
+    """
+    started = time.perf_counter()
+    key = make_cache_key(
+        deployment=DEPLOYMENT_NAME,
+        prompt_name=prompt_name,
+        prompt_version=prompt_version,
+        schema=JSON_OBJECT_SCHEMA,
+        temperature=temperature,
+        max_tokens=None,
+        messages=messages,
+    )
+
+    if LLM_CACHE_ENABLED:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            _log_call(prompt_name, started, cache_hit=True)
+            return json.loads(cached)
+
+    with external_call("openai", prompt_name):
+        response = (llm_client or client).chat.completions.create(
+            model=DEPLOYMENT_NAME,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=temperature,
+        )
+    content = response.choices[0].message.content
+    result = json.loads(content)
+
+    if LLM_CACHE_ENABLED:
+        llm_cache.put(key, prompt_name, content)
+
+    _log_call(prompt_name, started, response=response)
+    return result
@@ -45,12 +45,18 @@
 #             print("DB logging failed:", e)
 
 import logging
-import json
 import os
 import pyodbc
+from datetime import datetime, timezone
 from db.db_connection import get_connection
 
 class DBLogHandler(logging.Handler):
+    """
+    Writes records to dbo.AppLogs.
+    Runs on the logging writer thread (QueueListener), never on the
+    request thread; RawLog is the JSON line built by the formatter.
+    """
+
     def __init__(self):
         super().__init__()
         self.conn = None  # Lazy connection
@@ -73,12 +79,14 @@ class DBLogHandler(logging.Handler):
 
             cursor = self.conn.cursor()
 
-            raw_log = record.getMessage()
-            parsed = json.loads(raw_log)
+            raw_log = self.format(record)
 
-            timestamp = parsed.get("timestamp")
-            request_id = parsed.get("request_id")
-            message = parsed.get("message")
+            timestamp = (
+                datetime.fromtimestamp(record.created, timezone.utc)
+                        .replace(tzinfo=None).isoformat() + "Z"
+            )
+            request_id = getattr(record, "request_id", None)
+            message = record.getMessage()
 
             cursor.execute(
                 """
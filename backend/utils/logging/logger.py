@@ -89,14 +89,20 @@
 import logging
 import json
 import os
-from datetime import datetime
-from typing import Optional
+import time
+import queue
+import atexit
+import random
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 from dotenv import load_dotenv
 from opencensus.ext.azure.log_exporter import AzureLogHandler
 
 from utils.logging.request_context import request_id_ctx
 from utils.logging.db_handler import DBLogHandler
+from utils.metrics.metrics import LOG_CALLER_TIME, LOG_QUEUE_DEPTH, LOG_RECORDS, registry
 
 # =====================================================
 # HARD SWITCH — DISABLE DB LOGGING HERE
@@ -105,61 +111,205 @@ DISABLE_DB_LOGGING = True   # ← SET TO False TO RE-ENABLE DB LOGGING
 
 load_dotenv()
 
+# Default level of every application logger
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-logger overrides, e.g. "process_po=DEBUG,utils.stage5_find_row_col_idx=WARNING"
+# (a prefix applies to every logger below it)
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+
+# Records waiting for the background writer thread
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Queue fill ratio from which DEBUG / INFO records are sampled
+LOG_SAMPLE_THRESHOLD = float(os.getenv("LOG_SAMPLE_THRESHOLD", "0.8"))
+# Share of DEBUG / INFO records kept while sampling
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+# WARNING+ records wait this long for queue space before being dropped
+LOG_BLOCK_TIMEOUT = float(os.getenv("LOG_BLOCK_TIMEOUT", "0.05"))
+# Budget for the time a log call costs the calling thread (microseconds)
+LOG_OVERHEAD_BUDGET_US = float(os.getenv("LOG_OVERHEAD_BUDGET_US", "50"))
+
+
+def _parse_levels(spec: str) -> dict[str, int]:
+    levels = {}
+    for part in spec.split(","):
+        name, _, level = part.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+_LEVEL_OVERRIDES = _parse_levels(LOG_LEVELS)
+
+
+def level_for(name: str) -> int:
+    """Most specific LOG_LEVELS entry for a logger name, else LOG_LEVEL."""
+    best, best_len = logging.getLevelName(LOG_LEVEL), -1
+    for prefix, level in _LEVEL_OVERRIDES.items():
+        if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best_len:
+            best, best_len = level, len(prefix)
+    return best
+
+
 # -------------------------------
-# SINGLETON HANDLERS
+# LAZY JSON FORMATTING
 # -------------------------------
-_console_handler = None
-_db_handler = None
-_ai_handler = None
+class StructuredFormatter(logging.Formatter):
+    """
+    Builds the JSON line on the writer thread, from what the adapter
+    attached to the record (request_id + extra), not on the caller.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc)
+                                 .replace(tzinfo=None).isoformat() + "Z",
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+
+        # Merge any metadata
+        log_payload.update(getattr(record, "structured", None) or {})
+
+        line = json.dumps(log_payload, default=str)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+
+        return line
 
 
 class StructuredLogger(logging.LoggerAdapter):
     def process(self, message, kwargs):
-        log_payload = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+        # Only capture what cannot be read later on another thread;
+        # serialization happens in StructuredFormatter
+        kwargs["extra"] = {
             "request_id": request_id_ctx.get(),
-            "message": message,
+            "structured": kwargs.pop("extra", None) or {},
         }
+        return message, kwargs
 
-        # Merge any metadata
-        extra = kwargs.pop("extra", {})
-        log_payload.update(extra)
 
-        return json.dumps(log_payload), kwargs
+# -------------------------------
+# BOUNDED QUEUE WITH DROP / SAMPLING
+# -------------------------------
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without blocking the caller.
+
+    - below LOG_SAMPLE_THRESHOLD every record is queued
+    - above it only LOG_SAMPLE_RATE of DEBUG / INFO records are queued
+    - on a full queue DEBUG / INFO records are dropped; WARNING+ wait
+      up to LOG_BLOCK_TIMEOUT for space, then are dropped
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "calls": 0,
+            "caller_time_us": 0.0,
+            "max_queue_depth": 0,
+        }
 
+    def _count(self, name: str, caller_us: float, depth: int = 0):
+        with self._stats_lock:
+            self._stats[name] += 1
+            self._stats["calls"] += 1
+            self._stats["caller_time_us"] += caller_us
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve %-args and the traceback now (they may change or go away),
+        # but leave the JSON to the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        started = time.perf_counter()
+        depth = self.queue.qsize()
+        important = record.levelno >= logging.WARNING
+
+        if (
+            not important
+            and depth >= LOG_SAMPLE_THRESHOLD * LOG_QUEUE_SIZE
+            and random.random() >= LOG_SAMPLE_RATE
+        ):
+            self._count("sampled_out", (time.perf_counter() - started) * 1e6, depth)
+            return
+
+        try:
+            record = self.prepare(record)
+            if important:
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+            outcome, depth = "enqueued", depth + 1
+        except queue.Full:
+            outcome = "dropped"
+        except Exception:
+            self.handleError(record)
+            return
+
+        self._count(outcome, (time.perf_counter() - started) * 1e6, depth)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        calls = stats["calls"]
+        stats["queue_depth"] = self.queue.qsize()
+        stats["avg_caller_time_us"] = round(stats["caller_time_us"] / calls, 2) if calls else 0.0
+        stats["overhead_budget_us"] = LOG_OVERHEAD_BUDGET_US
+        stats["within_budget"] = stats["avg_caller_time_us"] <= LOG_OVERHEAD_BUDGET_US
+        return stats
 
-def get_logger(name: str) -> StructuredLogger:
-    global _console_handler, _db_handler, _ai_handler
 
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+# -------------------------------
+# SINGLETON HANDLERS
+# -------------------------------
+_console_handler = None
+_db_handler = None
+_ai_handler = None
 
-    # If logger already has handlers, reuse it
-    if logger.handlers:
-        return StructuredLogger(logger, {})
+_queue_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _build_sink_handlers() -> list[logging.Handler]:
+    """Handlers run by the writer thread (console, DB, App Insights)."""
+    global _console_handler, _db_handler, _ai_handler
+
+    formatter = StructuredFormatter()
+    handlers = []
 
     # ===========================
     # Console Handler (Singleton)
     # ===========================
-    if _console_handler is None:
-        _console_handler = logging.StreamHandler()
-        _console_handler.setFormatter(logging.Formatter("%(message)s"))
-
-    logger.addHandler(_console_handler)
+    _console_handler = logging.StreamHandler()
+    _console_handler.setFormatter(formatter)
+    handlers.append(_console_handler)
 
     # ===========================
     # DB Handler (OPTIONAL)
     # ===========================
     if not DISABLE_DB_LOGGING:
-        if _db_handler is None:
-            try:
-                _db_handler = DBLogHandler()
-            except Exception as e:
-                print(" Failed to initialize DBLogHandler:", e)
-                _db_handler = None
-
-        if _db_handler:
-            logger.addHandler(_db_handler)
+        try:
+            _db_handler = DBLogHandler()
+            _db_handler.setFormatter(formatter)
+            handlers.append(_db_handler)
+        except Exception as e:
+            print(" Failed to initialize DBLogHandler:", e)
+            _db_handler = None
 
     # ==================================
     # Azure Application Insights Handler
@@ -167,18 +317,58 @@ def get_logger(name: str) -> StructuredLogger:
     conn_str = os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")
 
     if conn_str:
-        if _ai_handler is None:
-            try:
-                _ai_handler = AzureLogHandler(connection_string=conn_str)
-            except Exception as e:
-                print(" Failed to initialize AzureLogHandler:", e)
-                _ai_handler = None
-
-        if _ai_handler:
-            logger.addHandler(_ai_handler)
-    else:
-        # Safe, non-intrusive notice
-        pass
+        try:
+            _ai_handler = AzureLogHandler(connection_string=conn_str)
+            _ai_handler.setFormatter(formatter)
+            handlers.append(_ai_handler)
+        except Exception as e:
+            print(" Failed to initialize AzureLogHandler:", e)
+            _ai_handler = None
 
-    return StructuredLogger(logger, {})
+    return handlers
+
+
+def _get_queue_handler() -> BoundedQueueHandler:
+    global _queue_handler, _listener
+
+    if _queue_handler is None:
+        with _setup_lock:
+            if _queue_handler is None:
+                log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+                _listener = QueueListener(log_queue, *_build_sink_handlers())
+                _listener.start()
+                # Flush what is still queued on interpreter exit
+                atexit.register(_listener.stop)
+                _queue_handler = BoundedQueueHandler(log_queue)
 
+    return _queue_handler
+
+
+def get_logging_stats() -> dict:
+    """Queue / drop / sampling counters and caller-side overhead."""
+    return _get_queue_handler().stats()
+
+
+def _collect_logging_metrics():
+    stats = get_logging_stats()
+    for outcome in ("enqueued", "dropped", "sampled_out"):
+        LOG_RECORDS.set_total(stats[outcome], outcome=outcome)
+    LOG_QUEUE_DEPTH.set(stats["queue_depth"])
+    LOG_CALLER_TIME.set(stats["avg_caller_time_us"])
+
+
+# Logging counters are read into /metrics at scrape time
+registry.add_collector(_collect_logging_metrics)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    logger = logging.getLogger(name)
+
+    # Disabled levels are rejected by isEnabledFor() before any work is done
+    logger.setLevel(level_for(name))
+
+    # If logger already has handlers, reuse it
+    if not logger.handlers:
+        logger.addHandler(_get_queue_handler())
+
+    return StructuredLogger(logger, {})
@@ -0,0 +1,307 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Seconds; covers sub-10ms SQL calls up to multi-minute OCR / LLM batches
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: dict | None = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs += [f'{name}="{_escape(value)}"' for name, value in extra.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Mirrors a running total kept elsewhere (from a collector)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts incl. +Inf, sum)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def totals(self) -> list[dict]:
+        """Per label set: labels, observation count and sum."""
+        with self._lock:
+            items = sorted((key, sum(counts), total) for key, (counts, total) in self._series.items())
+        return [
+            {**dict(zip(self.labelnames, key)), "count": count, "sum": total}
+            for key, count, total in items
+        ]
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """collector() runs before every render to refresh mirrored values."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            collector()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ======================================================
+# Application metrics
+# ======================================================
+PIPELINE_STAGE_SECONDS = registry.register(Histogram(
+    "po_pipeline_stage_seconds",
+    "Wall time of each process_pdf pipeline stage",
+    ("stage", "outcome"),
+))
+
+PIPELINE_DOCUMENT_SECONDS = registry.register(Histogram(
+    "po_pipeline_document_seconds",
+    "End-to-end process_pdf wall time per document",
+    ("outcome",),
+))
+
+EXTERNAL_CALL_SECONDS = registry.register(Histogram(
+    "po_external_call_seconds",
+    "Latency of calls to external services (adi, openai, blob, sql)",
+    ("service", "operation", "outcome"),
+))
+
+JOBS_IN_FLIGHT = registry.register(Gauge(
+    "po_jobs_in_flight",
+    "PDF jobs by state (queued / running)",
+    ("state",),
+))
+
+JOBS_FINISHED = registry.register(Counter(
+    "po_jobs_finished_total",
+    "Finished PDF jobs by final status",
+    ("status",),
+))
+
+ADI_CACHE_EVENTS = registry.register(Counter(
+    "po_adi_cache_events_total",
+    "ADI layout cache events (hits / misses / expired / writes / evictions / errors)",
+    ("event",),
+))
+
+LLM_CACHE_EVENTS = registry.register(Counter(
+    "po_llm_cache_events_total",
+    "LLM response cache events (hits / misses / expired / writes / evictions / errors)",
+    ("event",),
+))
+
+TABLE_EVALUATION_FAILURES = registry.register(Counter(
+    "po_table_evaluation_failures_total",
+    "Tables whose LLM PO classification failed after retries, by fallback "
+    "(rule_based = matched with the header-detected item column, unresolved = not matched)",
+    ("fallback",),
+))
+
+LOG_RECORDS = registry.register(Counter(
+    "po_log_records_total",
+    "Log records by outcome (enqueued / dropped on a full queue / sampled_out)",
+    ("outcome",),
+))
+
+LOG_QUEUE_DEPTH = registry.register(Gauge(
+    "po_log_queue_depth",
+    "Log records waiting for the writer thread",
+))
+
+LOG_CALLER_TIME = registry.register(Gauge(
+    "po_log_avg_caller_time_microseconds",
+    "Average time a logging call spends in the calling thread",
+))
+
+NOTIFICATIONS = registry.register(Counter(
+    "po_notifications_total",
+    "Outbox notification delivery attempts by kind and outcome (sent / retry / dead)",
+    ("kind", "outcome"),
+))
+
+
+@contextmanager
+def external_call(service: str, operation: str):
+    """Times one external call into po_external_call_seconds."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_SECONDS.observe(
+            time.perf_counter() - started,
+            service=service, operation=operation, outcome=outcome
+        )
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,70 @@
+import threading
+from typing import Callable, Hashable
+
+from utils.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SharedFailure(Exception):
+    """
+    Raised to followers when the leader's fn failed. The leader already
+    saw (and reported) the original error; stage / error mirror it.
+    """
+
+    def __init__(self, error: BaseException):
+        super().__init__(f"In-flight execution failed: {error}")
+        self.error = getattr(error, "error", error)
+        self.stage = getattr(error, "stage", None)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into ONE execution.
+
+    The first caller (leader) runs fn; callers arriving while it is in
+    flight block and receive the leader's result, or a SharedFailure
+    wrapping its exception. Nothing is cached: once the leader finishes,
+    the next call runs fn again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], object]) -> tuple[object, bool]:
+        """Returns (result, shared); shared is True for callers that waited."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            logger.info("Joining in-flight execution", extra={"key": str(key)})
+            call.done.wait()
+            if call.error is not None:
+                raise SharedFailure(call.error) from call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
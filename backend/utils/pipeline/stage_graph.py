@@ -0,0 +1,189 @@
+import os
+import time
+import contextvars
+from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+from utils.logging.logger import get_logger
+from utils.metrics.metrics import PIPELINE_STAGE_SECONDS
+
+logger = get_logger(__name__)
+
+PIPELINE_STAGE_WORKERS = int(os.getenv("PIPELINE_STAGE_WORKERS", "4"))
+
+STAGE_RUNNING = "RUNNING"
+STAGE_COMPLETED = "COMPLETED"
+STAGE_FAILED = "FAILED"
+STAGE_CANCELLED = "CANCELLED"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    func is called as func(**{name: value for name in inputs}) and must
+    return a dict holding every name in outputs.
+    after lists stages that must finish first without passing data
+    (e.g. upload only after the DB inserts succeeded).
+    """
+    name: str
+    func: Callable[..., dict]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+
+
+class StageFailure(Exception):
+    """A stage raised; carries the stage name and the original error."""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"{stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def resolve_dependencies(stages: list[Stage], initial: dict) -> dict[str, set[str]]:
+    """
+    Maps every stage to the names of the stages it waits for.
+    Raises ValueError for duplicate names/outputs, unknown inputs and cycles.
+    """
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate stage names in pipeline graph")
+
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers or output in initial:
+                raise ValueError(f"Output '{output}' of {stage.name} is produced more than once")
+            producers[output] = stage.name
+
+    deps = {}
+    for stage in stages:
+        stage_deps = set(stage.after)
+        for name in stage.inputs:
+            if name in producers:
+                stage_deps.add(producers[name])
+            elif name not in initial:
+                raise ValueError(f"Input '{name}' of {stage.name} has no producer")
+        unknown = stage_deps - set(names)
+        if unknown:
+            raise ValueError(f"{stage.name} depends on unknown stages {sorted(unknown)}")
+        deps[stage.name] = stage_deps
+
+    # Cycle check (Kahn)
+    remaining = {name: set(d) for name, d in deps.items()}
+    while remaining:
+        ready = [name for name, d in remaining.items() if not d]
+        if not ready:
+            raise ValueError(f"Cycle in pipeline graph between {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for d in remaining.values():
+            d.difference_update(ready)
+
+    return deps
+
+
+def run_stage_graph(stages: list[Stage], initial: dict,
+                    max_workers: int = PIPELINE_STAGE_WORKERS,
+                    on_stage: Callable[[str, str], None] | None = None) -> dict:
+    """
+    Runs the stage graph, starting every stage as soon as its
+    dependencies have finished (independent stages run concurrently).
+
+    on_stage(stage_name, status) is called with RUNNING when a stage
+    starts and COMPLETED / FAILED / CANCELLED when it ends.
+
+    On the first failure no further stage is started: stages that are
+    still pending (including every dependant of the failed stage) are
+    reported as CANCELLED, running ones are allowed to finish, and
+    StageFailure is raised.
+
+    Returns the initial values merged with all stage outputs.
+    """
+    deps = resolve_dependencies(stages, initial)
+    by_name = {s.name: s for s in stages}
+
+    values = dict(initial)
+    done: set[str] = set()
+    pending = [s.name for s in stages]   # declaration order = tie-break order
+    running = {}                         # future -> stage name
+    failure: StageFailure | None = None
+
+    def notify(name: str, status: str):
+        if on_stage:
+            try:
+                on_stage(name, status)
+            except Exception:
+                logger.exception("Stage callback failed", extra={"stage": name})
+
+    def execute(stage: Stage, kwargs: dict) -> dict:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = stage.func(**kwargs) or {}
+            missing = [o for o in stage.outputs if o not in result]
+            if missing:
+                raise ValueError(f"{stage.name} did not return outputs {missing}")
+            outcome = "ok"
+        finally:
+            PIPELINE_STAGE_SECONDS.observe(
+                time.perf_counter() - started, stage=stage.name, outcome=outcome
+            )
+        logger.info(
+            "Pipeline stage completed",
+            extra={
+                "stage": stage.name,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        )
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers),
+                            thread_name_prefix="pipeline-stage") as executor:
+        while pending or running:
+            if failure is None:
+                for name in [n for n in pending if deps[n] <= done]:
+                    pending.remove(name)
+                    stage = by_name[name]
+                    kwargs = {i: values[i] for i in stage.inputs}
+                    notify(name, STAGE_RUNNING)
+                    # One context copy per stage keeps request_id etc. in logs
+                    future = executor.submit(
+                        contextvars.copy_context().run, execute, stage, kwargs
+                    )
+                    running[future] = name
+            else:
+                for name in pending:
+                    notify(name, STAGE_CANCELLED)
+                pending = []
+
+            if not running:
+                break
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    notify(name, STAGE_FAILED)
+                    if failure is None:
+                        failure = StageFailure(name, exc)
+                        logger.error(
+                            "Pipeline stage failed, cancelling pending stages",
+                            extra={"stage": name, "error": str(exc)}
+                        )
+                    continue
+
+                values.update({o: result[o] for o in by_name[name].outputs})
+                done.add(name)
+                notify(name, STAGE_COMPLETED)
+
+    if failure is not None:
+        raise failure from failure.error
+
+    return values
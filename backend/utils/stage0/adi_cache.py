@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+from azure.ai.documentintelligence.models import AnalyzeResult
+from dotenv import load_dotenv
+from utils.logging.logger import get_logger
+from utils.metrics.metrics import ADI_CACHE_EVENTS
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+ADI_CACHE_ENABLED = os.getenv("ADI_CACHE_ENABLED", "true").lower() == "true"
+ADI_CACHE_DIR = os.getenv("ADI_CACHE_DIR", ".cache/adi")
+ADI_CACHE_MAX_BYTES = int(os.getenv("ADI_CACHE_MAX_MB", "512")) * 1024 * 1024
+ADI_CACHE_TTL_SECONDS = int(os.getenv("ADI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+_CACHE_SUFFIX = ".json.z"
+
+
+def content_hash(pdf_bytes: bytes) -> str:
+    """SHA-256 hex digest of the PDF bytes."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+# ---------------------------------------------------------------
+# Compact serialization — only what stages 1-5 read
+# ---------------------------------------------------------------
+def _compact_result(result: AnalyzeResult) -> dict:
+    data = result.as_dict()
+
+    return {
+        "modelId": data.get("modelId"),
+        "pages": [
+            {
+                "pageNumber": page.get("pageNumber"),
+                "width": page.get("width"),
+                "height": page.get("height"),
+                "unit": page.get("unit"),
+                "lines": [
+                    {"content": line.get("content"), "polygon": line.get("polygon")}
+                    for line in page.get("lines", [])
+                ],
+            }
+            for page in data.get("pages", [])
+        ],
+        "tables": [
+            {
+                "rowCount": table.get("rowCount"),
+                "columnCount": table.get("columnCount"),
+                "cells": [
+                    {
+                        "rowIndex": cell.get("rowIndex"),
+                        "columnIndex": cell.get("columnIndex"),
+                        "content": cell.get("content"),
+                        "boundingRegions": [
+                            {
+                                "pageNumber": region.get("pageNumber"),
+                                "polygon": region.get("polygon"),
+                            }
+                            for region in cell.get("boundingRegions", [])
+                        ],
+                    }
+                    for cell in table.get("cells", [])
+                ],
+            }
+            for table in data.get("tables", [])
+        ],
+    }
+
+
+def serialize_result(result: AnalyzeResult) -> bytes:
+    payload = json.dumps(_compact_result(result), separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), 6)
+
+
+def deserialize_result(blob: bytes) -> AnalyzeResult:
+    return AnalyzeResult(json.loads(zlib.decompress(blob)))
+
+
+class ADICache:
+    """
+    Content-addressed on-disk cache of ADI analysis results.
+
+    Key   : <model_id>-<sha256 of PDF bytes>
+    TTL   : file mtime (write time)
+    LRU   : file atime, bumped explicitly on every hit
+    Size  : oldest-accessed entries evicted once max_bytes is exceeded
+    """
+
+    def __init__(self, cache_dir: str = ADI_CACHE_DIR,
+                 max_bytes: int = ADI_CACHE_MAX_BYTES,
+                 ttl_seconds: int = ADI_CACHE_TTL_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    @staticmethod
+    def make_key(pdf_bytes: bytes, model_id: str) -> str:
+        return f"{model_id}-{content_hash(pdf_bytes)}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + _CACHE_SUFFIX)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+        ADI_CACHE_EVENTS.inc(event=name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def get(self, key: str) -> AnalyzeResult | None:
+        path = self._path(key)
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+
+        now = time.time()
+        if now - st.st_mtime > self.ttl_seconds:
+            self._remove(path)
+            self._count("expired")
+            self._count("misses")
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                result = deserialize_result(f.read())
+            # LRU bookkeeping: atime = last access, mtime = write time (TTL)
+            os.utime(path, (now, st.st_mtime))
+        except Exception:
+            logger.exception("ADI cache entry unreadable, dropping", extra={"key": key})
+            self._remove(path)
+            self._count("errors")
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return result
+
+    def put(self, key: str, result: AnalyzeResult):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+            with open(tmp_path, "wb") as f:
+                f.write(serialize_result(result))
+            os.replace(tmp_path, path)
+
+            self._count("writes")
+            self._evict()
+
+        except Exception:
+            # Cache must NEVER break the pipeline
+            logger.exception("ADI cache write failed", extra={"key": key})
+            self._count("errors")
+
+    def _evict(self):
+        entries = []
+        total = 0
+        now = time.time()
+
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(_CACHE_SUFFIX):
+                    continue
+                st = entry.stat()
+                if now - st.st_mtime > self.ttl_seconds:
+                    self._remove(entry.path)
+                    self._count("expired")
+                    continue
+                entries.append((st.st_atime, st.st_size, entry.path))
+                total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self._count("evictions")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+adi_cache = ADICache()
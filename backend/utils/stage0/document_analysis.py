@@ -0,0 +1,133 @@
+import os
+from dataclasses import dataclass
+from functools import cached_property
+
+from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.models import AnalyzeDocumentRequest, AnalyzeResult
+from azure.core.credentials import AzureKeyCredential
+from dotenv import load_dotenv
+from utils.logging.logger import get_logger
+from utils.stage0.adi_cache import ADI_CACHE_ENABLED, ADICache, adi_cache
+from utils.stage0.ocr_table import OCRTable
+from utils.metrics.metrics import external_call
+
+# -------------- Initializing the values ------------------------
+logger = get_logger(__name__)
+
+load_dotenv()
+
+LAYOUT_MODEL_ID = "prebuilt-layout"
+
+_client = None
+
+
+def get_adi_client() -> DocumentIntelligenceClient:
+    """
+    Returns the process-wide Document Intelligence client.
+    Created on first use so importing this module never needs credentials.
+    """
+    global _client
+
+    if _client is None:
+        endpoint = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
+        key = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
+
+        if not endpoint or not key:
+            raise RuntimeError("ADI credentials not found in .env")
+
+        _client = DocumentIntelligenceClient(
+            endpoint=endpoint,
+            credential=AzureKeyCredential(key)
+        )
+
+    return _client
+
+
+@dataclass
+class DocumentAnalysis:
+    """
+    Result of ONE prebuilt-layout analysis of a PDF.
+    Every stage reads from this object instead of calling ADI again.
+    """
+    result: AnalyzeResult
+    model_id: str = LAYOUT_MODEL_ID
+    from_cache: bool = False
+
+    @cached_property
+    def ocr_text(self) -> str:
+        """All page lines of the document, one per line."""
+        return "\n".join(
+            line.content for page in self.result.pages for line in page.lines
+        )
+
+    @cached_property
+    def page1_text(self) -> str:
+        """Lines of the first page only (used for header extraction)."""
+        if not self.result.pages:
+            return ""
+        return "\n".join(line.content for line in self.result.pages[0].lines)
+
+    @cached_property
+    def tables(self) -> list[OCRTable]:
+        """OCR tables with cell contents and polygons (stage 4 / 5 format)."""
+        return tables_from_analyze_result(self.result)
+
+    def page_lines(self, page_number: int) -> list[dict]:
+        """Lines of a single 1-based page as {"content", "polygon"} dicts."""
+        for page in self.result.pages:
+            if page.page_number == page_number:
+                return [
+                    {"content": line.content, "polygon": line.polygon}
+                    for line in page.lines
+                ]
+        return []
+
+
+def tables_from_analyze_result(result: AnalyzeResult) -> list[OCRTable]:
+    return [OCRTable.from_adi_table(table) for table in result.tables or []]
+
+
+# ------------------- Starting the ADI layout extraction -----------------------
+
+def analyze_pdf(pdf_bytes: bytes) -> DocumentAnalysis:
+    """
+    Runs Azure Document Intelligence (prebuilt-layout) once for the PDF.
+    Reads through the on-disk ADI cache, so replays of the same bytes
+    skip the OCR call entirely.
+    """
+    cache_key = ADICache.make_key(pdf_bytes, LAYOUT_MODEL_ID)
+
+    if ADI_CACHE_ENABLED:
+        cached = adi_cache.get(cache_key)
+        if cached is not None:
+            logger.info(
+                "ADI analysis served from cache",
+                extra={"model_id": LAYOUT_MODEL_ID, "cache_key": cache_key}
+            )
+            return DocumentAnalysis(result=cached, from_cache=True)
+
+    logger.info(
+        "Running ADI document analysis",
+        extra={"model_id": LAYOUT_MODEL_ID, "byte_size": len(pdf_bytes)}
+    )
+
+    with external_call("adi", LAYOUT_MODEL_ID):
+        poller = get_adi_client().begin_analyze_document(
+            model_id=LAYOUT_MODEL_ID,
+            body=AnalyzeDocumentRequest(bytes_source=pdf_bytes)
+        )
+
+        result = poller.result()
+
+    logger.info(
+        "ADI document analysis completed",
+        extra={
+            "page_count": len(result.pages or []),
+            "table_count": len(result.tables or [])
+        }
+    )
+
+    if ADI_CACHE_ENABLED:
+        adi_cache.put(cache_key, result)
+
+    return DocumentAnalysis(result=result)
@@ -0,0 +1,155 @@
+import numpy as np
+
+
+class OCRTable:
+    """
+    Columnar (array-backed) form of ONE ADI table.
+
+    Per cell i:
+        row_index[i], column_index[i]   : int32 grid position
+        content_id[i]                   : index into strings (each distinct
+                                          cell text is stored once)
+        region_offsets[i]:[i + 1]       : its bounding regions
+
+    Per region j:
+        region_page[j]                  : 1-based page number
+        polygon_offsets[j]:[j + 1]      : its x,y values in polygons
+
+    polygons is ONE contiguous float64 buffer holding every polygon of the
+    table, so geometry queries slice / fancy-index it instead of walking
+    a dict per cell and a list per polygon.
+    float64 keeps every coordinate equal to the Python float ADI returned.
+    """
+
+    __slots__ = (
+        "row_count", "column_count",
+        "row_index", "column_index", "content_id", "strings",
+        "region_offsets", "region_page", "polygon_offsets", "polygons",
+    )
+
+    def __init__(self, row_count: int, column_count: int,
+                 row_index: np.ndarray, column_index: np.ndarray,
+                 content_id: np.ndarray, strings: list[str],
+                 region_offsets: np.ndarray, region_page: np.ndarray,
+                 polygon_offsets: np.ndarray, polygons: np.ndarray):
+        self.row_count = row_count
+        self.column_count = column_count
+        self.row_index = row_index
+        self.column_index = column_index
+        self.content_id = content_id
+        self.strings = strings
+        self.region_offsets = region_offsets
+        self.region_page = region_page
+        self.polygon_offsets = polygon_offsets
+        self.polygons = polygons
+
+    @classmethod
+    def from_adi_table(cls, table) -> "OCRTable":
+        """Builds the columnar table from an ADI DocumentTable in one pass."""
+        rows, cols, content_ids = [], [], []
+        region_offsets, polygon_offsets = [0], [0]
+        region_page, points = [], []
+        strings, string_ids = [], {}
+
+        for cell in table.cells or []:
+            rows.append(cell.row_index)
+            cols.append(cell.column_index)
+
+            text = cell.content or ""
+            sid = string_ids.get(text)
+            if sid is None:
+                sid = string_ids[text] = len(strings)
+                strings.append(text)
+            content_ids.append(sid)
+
+            for region in cell.bounding_regions or []:
+                region_page.append(region.page_number)
+                points.extend(region.polygon or [])
+                polygon_offsets.append(len(points))
+            region_offsets.append(len(region_page))
+
+        return cls(
+            row_count=table.row_count,
+            column_count=table.column_count,
+            row_index=np.array(rows, dtype=np.int32),
+            column_index=np.array(cols, dtype=np.int32),
+            content_id=np.array(content_ids, dtype=np.int32),
+            strings=strings,
+            region_offsets=np.array(region_offsets, dtype=np.int32),
+            region_page=np.array(region_page, dtype=np.int32),
+            polygon_offsets=np.array(polygon_offsets, dtype=np.int32),
+            polygons=np.array(points, dtype=np.float64),
+        )
+
+    # ---------------------------------------------------------------
+    # Cells
+    # ---------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.row_index)
+
+    def content(self, cell: int) -> str:
+        return self.strings[self.content_id[cell]]
+
+    def iter_cells(self):
+        """(row, col, page of first region or None, content) per cell."""
+        first = self.first_region
+        has_region = first >= 0
+        pages = np.full(len(self), -1, dtype=np.int32)
+        pages[has_region] = self.region_page[first[has_region]]
+
+        for row, col, page, sid in zip(self.row_index.tolist(), self.column_index.tolist(),
+                                       pages.tolist(), self.content_id.tolist()):
+            yield row, col, (page if page >= 0 else None), self.strings[sid]
+
+    def to_grid(self) -> list[list[str]]:
+        """
+        2D grid of stripped cell texts, sized by the highest row / column
+        index present. Cells sharing a position are joined with a space.
+        """
+        if not len(self):
+            return []
+
+        stripped = [s.strip() for s in self.strings]
+        grid = [
+            ["" for _ in range(int(self.column_index.max()) + 1)]
+            for _ in range(int(self.row_index.max()) + 1)
+        ]
+
+        for r, c, sid in zip(self.row_index.tolist(), self.column_index.tolist(),
+                             self.content_id.tolist()):
+            text = stripped[sid]
+            if grid[r][c]:
+                grid[r][c] += " " + text
+            else:
+                grid[r][c] = text
+
+        return grid
+
+    # ---------------------------------------------------------------
+    # Geometry (views into the polygon buffer, no copies)
+    # ---------------------------------------------------------------
+    def polygon(self, region: int) -> np.ndarray:
+        return self.polygons[self.polygon_offsets[region]:self.polygon_offsets[region + 1]]
+
+    @property
+    def xs(self) -> np.ndarray:
+        """Every x value of every polygon (polygons are flat x,y pairs)."""
+        return self.polygons[0::2]
+
+    @property
+    def first_region(self) -> np.ndarray:
+        """Index of each cell's first region, -1 for cells without one."""
+        starts = self.region_offsets[:-1]
+        return np.where(self.region_offsets[1:] > starts, starts, -1)
+
+    @property
+    def page_number(self) -> int | None:
+        """Page of the table's first bounding region."""
+        return int(self.region_page[0]) if len(self.region_page) else None
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.row_index, self.column_index, self.content_id,
+                  self.region_offsets, self.region_page,
+                  self.polygon_offsets, self.polygons)
+        return sum(a.nbytes for a in arrays) + sum(len(s) for s in self.strings)
@@ -5,23 +5,14 @@ from PIL import Image
 import io
 import base64
 from openai import AzureOpenAI
-from dotenv import load_dotenv
 from models.po_models import PoClassifyModel
-import os
 from collections import defaultdict
 from utils.stage0.pdf_bytes_to_image import pdf_bytes_to_images
-# Load environment variables
-load_dotenv()
+# Shared Azure OpenAI client (one per process)
+from utils.llm.llm_gateway import client, DEPLOYMENT_NAME, parse_completion
 
-# Initialize Azure OpenAI client
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-12-01-preview",
-)
-
-# Deployment name (model)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+# Bump when PO_CLASSIFY_SYSTEM_PROMPT changes (invalidates cached responses)
+PROMPT_VERSION = "v1"
 
 ########################### Added ############################
 
@@ -36,8 +27,9 @@ def classify_po_page_image(
     client: AzureOpenAI,
 ) -> PoClassifyModel:
 
-    response = client.chat.completions.parse(
-        model=DEPLOYMENT_NAME,
+    return parse_completion(
+        prompt_name="classify_po_page_image",
+        prompt_version=PROMPT_VERSION,
         messages=[
             {
                 "role": "system",
@@ -62,10 +54,9 @@ def classify_po_page_image(
         temperature=0.1,
         max_tokens=512,
         response_format=PoClassifyModel,
+        llm_client=client,
     )
 
-    return response.choices[0].message.parsed
-
 
 PO_CLASSIFY_SYSTEM_PROMPT = """
 You are a professional PDF structural quality analyzer specializing in Purchase Order (PO) tables.
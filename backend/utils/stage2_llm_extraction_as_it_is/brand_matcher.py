@@ -0,0 +1,102 @@
+import re
+from functools import lru_cache
+from typing import Iterable
+
+
+class BrandMatcher:
+    """
+    Finds which catalog brands occur in a string with ONE regex scan.
+
+    Matching keeps the historical semantics of
+        brand.upper() in text.upper()
+    (plain substring, no word boundaries), so OCR-glued text such as
+    "AUGMENTIN625MG" still matches "AUGMENTIN".
+
+    The brands are compiled into a single alternation, longest first,
+    wrapped in a lookahead so a match is attempted at every position.
+    A brand that is itself a substring of a longer brand
+    ("NEOSPORIN" in "NEOSPORIN-H") is implied whenever the longer
+    one matches.
+    """
+
+    def __init__(self, brands: Iterable[str]):
+        # Catalog order is kept for find_brands(); duplicates / blanks dropped
+        self.brands: list[str] = []
+        seen = set()
+        for brand in brands:
+            key = brand.upper() if brand else ""
+            if key and key not in seen:
+                seen.add(key)
+                self.brands.append(key)
+
+        self._order = {brand: i for i, brand in enumerate(self.brands)}
+
+        # Shorter brands contained in each brand (including itself)
+        self._implied = {
+            brand: frozenset(other for other in self.brands if other in brand)
+            for brand in self.brands
+        }
+
+        if self.brands:
+            alternation = "|".join(
+                re.escape(b) for b in sorted(self.brands, key=len, reverse=True)
+            )
+            self._any = re.compile(alternation)
+            self._all = re.compile(f"(?=({alternation}))")
+        else:
+            self._any = None
+            self._all = None
+
+    def matches(self, text: str | None) -> bool:
+        """True if any brand occurs in text."""
+        if not text or self._any is None:
+            return False
+        return self._any.search(text.upper()) is not None
+
+    def find_brands(self, text: str | None) -> list[str]:
+        """All brands occurring in text, in catalog order."""
+        if not text or self._all is None:
+            return []
+
+        found = set()
+        for m in self._all.finditer(text.upper()):
+            found |= self._implied[m.group(1)]
+
+        return sorted(found, key=self._order.__getitem__)
+
+    def first_brand(self, text: str | None) -> str | None:
+        """First brand (in catalog order) occurring in text, or None."""
+        brands = self.find_brands(text)
+        return brands[0] if brands else None
+
+    def classify(self, texts: Iterable[str | None]) -> list[list[str]]:
+        """find_brands() for a whole list of strings."""
+        return [self.find_brands(text) for text in texts]
+
+    def partition(self, items: Iterable, key=None) -> tuple[list, list]:
+        """
+        Splits items into (matching, not_matching), preserving order.
+        key extracts the text to test (defaults to the item itself).
+        """
+        matching, not_matching = [], []
+        for item in items:
+            text = key(item) if key else item
+            (matching if self.matches(text) else not_matching).append(item)
+        return matching, not_matching
+
+
+@lru_cache(maxsize=32)
+def _matcher_for(catalog: tuple[str, ...]) -> BrandMatcher:
+    return BrandMatcher(catalog)
+
+
+def get_brand_matcher(brands: Iterable[str]) -> BrandMatcher:
+    """
+    Compiled matcher for a brand catalog, built once per catalog version
+    (i.e. per distinct set of brands) and reused afterwards.
+    """
+    if isinstance(brands, (set, frozenset)):
+        catalog = tuple(sorted(brands))
+    else:
+        catalog = tuple(brands)
+    return _matcher_for(catalog)
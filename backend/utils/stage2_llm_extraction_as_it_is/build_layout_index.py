@@ -1,6 +1,25 @@
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+import numpy as np
 import re
 
+from utils.logging.logger import get_logger
+from utils.stage2_llm_extraction_as_it_is.brand_matcher import get_brand_matcher
+
+logger = get_logger(__name__)
+
+# Lines mentioning these manufacturers are always redacted
+COMPETITOR_BRANDS = ["CIPLA", "ABBOTT", "TORRENT", "LUPIN", "SANOFI", "BIOCON", "BHARAT"]
+
+# Remove common noise words (tune carefully)
+NOISE_WORDS = [
+    "PHARMACEUTICALS", "PHARMA", "LTD", "LIMITED",
+    "INDIA", "PRIVATE", "PVT"
+]
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+_NOISE_PATTERN = re.compile(r"\b(?:" + "|".join(NOISE_WORDS) + r")\b")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
 
 def polygon_y_bounds(polygon):
     ys = polygon[1::2]
@@ -14,22 +33,66 @@ def normalize_medicine_name(text: str) -> str:
     text = text.upper()
 
     # Remove punctuation
-    text = re.sub(r"[^\w\s]", " ", text)
+    text = _PUNCTUATION_PATTERN.sub(" ", text)
 
-    # Remove common noise words (tune carefully)
-    noise_words = [
-        "PHARMACEUTICALS", "PHARMA", "LTD", "LIMITED",
-        "INDIA", "PRIVATE", "PVT"
-    ]
-    for w in noise_words:
-        text = re.sub(rf"\b{w}\b", " ", text)
+    text = _NOISE_PATTERN.sub(" ", text)
 
     # Collapse spaces
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WHITESPACE_PATTERN.sub(" ", text).strip()
 
     return text
 
 
+class PageLineIndex:
+    """
+    All ADI layout lines of a document, built once:
+    raw + normalized text per line, y-bounds as arrays, and the
+    [start, end) line range of every page.
+    """
+
+    def __init__(self, layout_result):
+        self.contents: list[str] = []
+        self.normalized: list[str] = []
+        y1s, y2s = [], []
+        self.pages: list[tuple[int, int, int]] = []   # (page_no, start, end)
+
+        for page in layout_result.pages:
+            page_no = page.page_number - 1  # fitz is 0-based
+            start = len(self.contents)
+
+            for line in page.lines or []:
+                y1, y2 = polygon_y_bounds(line.polygon)
+                self.contents.append(line.content)
+                self.normalized.append(normalize_medicine_name(line.content))
+                y1s.append(y1)
+                y2s.append(y2)
+
+            self.pages.append((page_no, start, len(self.contents)))
+
+        self.y1 = np.asarray(y1s, dtype=np.float64)
+        self.y2 = np.asarray(y2s, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def match_scores(self, normalized_names: list[str], score_cutoff: float) -> np.ndarray:
+        """
+        names x lines fuzz.ratio matrix in one rapidfuzz call
+        (scores below score_cutoff are 0).
+        """
+        if not normalized_names or not self.normalized:
+            return np.zeros((len(normalized_names), len(self.normalized)))
+
+        return process.cdist(
+            normalized_names,
+            self.normalized,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=score_cutoff,
+            dtype=np.float64,
+        )
+
+
 def build_layout_index_for_non_gsk(
     layout_result,
     non_gsk_med_list,
@@ -49,97 +112,62 @@ def build_layout_index_for_non_gsk(
     }
     """
 
-    # if competitor_brands is None:
-    competitor_brands = ["CIPLA", "ABBOTT", "TORRENT", "LUPIN", "SANOFI","BIOCON","BHARAT"]
+    competitor_matcher = get_brand_matcher(COMPETITOR_BRANDS)
 
     # Normalize non-GSK medicine names once
     normalized_non_gsk = {
         normalize_medicine_name(med): med
         for med in non_gsk_med_list
     }
+    norm_meds = list(normalized_non_gsk.keys())
 
     padding_y = 0.01
 
     layout_index = {}
 
-    for page_idx, page in enumerate(layout_result.pages):
-        page_no = page.page_number - 1  # fitz is 0-based
+    # Normalize every line once, then score all medicines x all lines at once
+    line_index = PageLineIndex(layout_result)
+    matched = line_index.match_scores(norm_meds, fuzzy_threshold) >= fuzzy_threshold
 
-        # Convert ADI line objects → simple dicts
-        page_lines = []
-        for line in page.lines:
-            page_lines.append({
-                "content": line.content,
-                "polygon": line.polygon,
-            })
-
-        for norm_med in normalized_non_gsk.keys():
-            matched_lines = []
-
-            for line in page_lines:
-                norm_line = normalize_medicine_name(line["content"])
-
-                score = fuzz.ratio(norm_med, norm_line)
-
-                if score >= fuzzy_threshold:
-                    matched_lines.append(line)
+    def make_entry(page_no, line_idx):
+        return {
+            "page_no": page_no,
+            "y1": float(line_index.y1[line_idx]) + padding_y,
+            "y2": float(line_index.y2[line_idx]) - padding_y,
+            "lines": [line_index.contents[line_idx]],
+        }
 
-            if not matched_lines:
-                continue
+    for page_no, start, end in line_index.pages:
 
+        # STEP 1: Match by non-GSK medicine names
+        for med_idx, norm_med in enumerate(norm_meds):
             # Store each matched line as a separate entry
-            for line in matched_lines:
-                y1, y2 = polygon_y_bounds(line["polygon"])
-
-                entry = {
-                    "page_no": page_no,
-                    "y1": y1 + padding_y,
-                    "y2": y2 - padding_y,
-                    "lines": [line["content"]],
-                }
-
-                # LOG THE ENTRY DATA
-                print(f"Creating entry for medicine: {norm_med}")
-                print(f"  Page: {entry['page_no']}")
-                print(f"  Y1: {entry['y1']}")
-                print(f"  Y2: {entry['y2']}")
-                print(f"  Lines: {entry['lines']}")
-                print("-" * 50)
+            for line_idx in np.flatnonzero(matched[med_idx, start:end]) + start:
+                entry = make_entry(page_no, int(line_idx))
+
+                logger.debug(
+                    "Layout index entry | medicine=%s | page=%d | y1=%.4f | y2=%.4f | lines=%s",
+                    norm_med, entry["page_no"], entry["y1"], entry["y2"], entry["lines"]
+                )
 
                 layout_index.setdefault(norm_med, []).append(entry)
 
         # STEP 2: Match by competitor brand names
-        for line in page_lines:
-            line_upper = line["content"].upper()
-            
-            # Check if any competitor brand appears in this line
-            matched_brand = None
-            for brand in competitor_brands:
-                if brand in line_upper:
-                    matched_brand = brand
-                    break
-            
+        for line_idx in range(start, end):
+            # First competitor brand (list order) appearing in this line
+            matched_brand = competitor_matcher.first_brand(line_index.contents[line_idx])
+
             if matched_brand:
-                y1, y2 = polygon_y_bounds(line["polygon"])
-                
-                entry = {
-                    "page_no": page_no,
-                    "y1": y1 + padding_y,
-                    "y2": y2 - padding_y,
-                    "lines": [line["content"]],
-                }
-                
+                entry = make_entry(page_no, line_idx)
+
                 # Use a special key for brand-based matches
                 brand_key = f"BRAND_{matched_brand}"
-                
-                # LOG THE ENTRY DATA
-                print(f"Creating entry for competitor brand: {matched_brand}")
-                print(f"  Page: {entry['page_no']}")
-                print(f"  Y1: {entry['y1']}")
-                print(f"  Y2: {entry['y2']}")
-                print(f"  Lines: {entry['lines']}")
-                print("-" * 50)
+
+                logger.debug(
+                    "Layout index entry | competitor_brand=%s | page=%d | y1=%.4f | y2=%.4f | lines=%s",
+                    matched_brand, entry["page_no"], entry["y1"], entry["y2"], entry["lines"]
+                )
 
                 layout_index.setdefault(brand_key, []).append(entry)
 
-    return layout_index
\ No newline at end of file
+    return layout_index
@@ -1,25 +1,15 @@
 from typing import List
 import io, base64 # PyMuPDF
 from PIL import Image
-from openai import AzureOpenAI
-from dotenv import load_dotenv
 from models.po_models import MedicineList
+from utils.llm.llm_gateway import parse_completion
 from utils.stage0.pdf_bytes_to_image import pdf_bytes_to_images
-import os
+from utils.logging.logger import get_logger
 
-# -------------------------------------------------
-# Azure OpenAI Client
-# -------------------------------------------------
-
-load_dotenv()
+logger = get_logger(__name__)
 
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-12-01-preview",
-)
-
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+# Bump when the prompts below change (invalidates cached responses)
+PROMPT_VERSION = "v1"
 
 def pil_image_to_base64(image: Image.Image) -> str:
     buffer = io.BytesIO()
@@ -101,8 +91,9 @@ def extract_medicines_from_page_image(
         prompt = MANIPAL_PO_PROMPT
     else:
         prompt = GENERIC_PO_PROMPT
-    response = client.chat.completions.parse(
-        model=DEPLOYMENT_NAME,
+    return parse_completion(
+        prompt_name="extract_medicines_from_page_image",
+        prompt_version=PROMPT_VERSION,
         messages=[
             {
                 "role": "user",
@@ -122,8 +113,6 @@ def extract_medicines_from_page_image(
         response_format=MedicineList,
     )
 
-    return response.choices[0].message.parsed
-
 
 # -------------------------------------------------
 # Extract Medicines From ALL Pages (PDF-Level)
@@ -140,9 +129,5 @@ def extract_all_medicines_from_images(image_list):
         if page_result and page_result.MedicineListName:
             all_meds.extend(page_result.MedicineListName)
 
-    print("$")
-    print(" medicines from LLM")
-    for med in all_meds:
-        print(med)
-    print("$")
+    logger.debug("Medicines from LLM | %s", all_meds)
     return all_meds
@@ -1,26 +1,17 @@
-import os
-from dotenv import load_dotenv
 from utils.stage0.pdf_to_bytes import load_pdf_as_bytes
 import sys
-from openai import AzureOpenAI
-from pydantic import BaseModel
 from models.po_models import MedicineList
 import json
 
 
+from utils.llm.llm_gateway import parse_completion
 from utils.logging.logger import get_logger
 
 
 logger = get_logger(__name__)
-load_dotenv()
 
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-12-01-preview",
-)
-
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+# Bump when the prompts below change (invalidates cached responses)
+PROMPT_VERSION = "v1"
 
 
 def medicine_names_layout(ocr_text):
@@ -100,8 +91,9 @@ Return ONLY JSON in provided schema.
     Return ONLY the JSON object in the given schema.
     """
 
-    response = client.chat.completions.parse(
-        model=DEPLOYMENT_NAME,
+    parsed = parse_completion(
+        prompt_name="medicine_names_layout",
+        prompt_version=PROMPT_VERSION,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": user_prompt}
@@ -110,7 +102,6 @@ Return ONLY JSON in provided schema.
         response_format=MedicineList,
     )
 
-    parsed = response.choices[0].message.parsed
     medicine_names = parsed.MedicineListName
 
     return medicine_names
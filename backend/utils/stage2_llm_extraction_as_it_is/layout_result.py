@@ -1,30 +1,17 @@
-import os
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.ai.documentintelligence.models import AnalyzeDocumentRequest
-from azure.core.credentials import AzureKeyCredential
-from dotenv import load_dotenv
 from utils.logging.logger import get_logger
+from utils.stage0.document_analysis import DocumentAnalysis, analyze_pdf
 
 # -------------- Initializing the values ------------------------
 logger = get_logger(__name__)
 
-load_dotenv()
-
-endpoint = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
-key = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
-
-clientadi = DocumentIntelligenceClient(endpoint=endpoint, credential=AzureKeyCredential(key))
-
 # ------------------- Starting the ADI layout extraction -----------------------
 
-def get_layout_result(pdf_bytes):
-
-    poller = clientadi.begin_analyze_document(
-    model_id="prebuilt-layout",
-    body=AnalyzeDocumentRequest(bytes_source=pdf_bytes)
-    )
-
-    result = poller.result()
-    ocr_text = "\n".join([line.content for page in result.pages for line in page.lines])
+def get_layout_result(pdf_bytes, analysis: DocumentAnalysis | None = None):
+    """
+    Returns (ocr_text, AnalyzeResult) for the PDF.
+    Pass the shared `analysis` to reuse the single per-document ADI call.
+    """
+    if analysis is None:
+        analysis = analyze_pdf(pdf_bytes)
 
-    return ocr_text,result
\ No newline at end of file
+    return analysis.ocr_text, analysis.result
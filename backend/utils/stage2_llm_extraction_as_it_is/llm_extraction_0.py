@@ -5,12 +5,14 @@ import re
 from models.po_models import POHeader
 # from utils.logging.decorators import capture_errors
 from utils.logging.error_handler import log_pipeline_errors
-from utils.stage1_llm_classifier.llm_classifier import client, DEPLOYMENT_NAME
+from utils.llm.llm_gateway import json_completion
 from utils.logging.logger import get_logger
 from utils.stage2_llm_extraction_as_it_is.ocr_check_1 import extract_po_number_hints
 
 logger = get_logger(__name__)
 
+# Bump when the prompts below change (invalidates cached responses)
+PROMPT_VERSION = "v1"
 
 
 # @log_pipeline_errors(stage="HEADER_LLM_EXTRACTION_PHASE1")
@@ -95,28 +97,16 @@ Return ONLY this JSON structure:
 
 
     try:
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
+        # Token usage is logged by the gateway (cache hits cost none)
+        result = json_completion(
+            prompt_name="header_critical_fields",
+            prompt_version=PROMPT_VERSION,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            response_format={"type": "json_object"},
             temperature=0
         )
-        
-        usage = response.usage
-        result = json.loads(response.choices[0].message.content)
-        logger.info(
-        "Phase 1 LLM usage",
-        extra={
-            "stage": "HEADER_LLM_EXTRACTION_PHASE1",
-            "prompt_tokens": usage.prompt_tokens,
-            "completion_tokens": usage.completion_tokens,
-            "total_tokens": usage.total_tokens,
-            "po_number": result.get("PONumber")
-            }
-        )
 
         logger.info(
             "Phase 1 extraction completed",
@@ -218,28 +208,22 @@ OCR TEXT (Page 1):
 
 Return ONLY a JSON object with these exact field names."""
 
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
+    result = json_completion(
+        prompt_name="header_remaining_fields",
+        prompt_version=PROMPT_VERSION,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ],
-        response_format={"type": "json_object"},
         temperature=0
     )
-    usage = response.usage
-    
-    result =  json.loads(response.choices[0].message.content)
     logger.info(
-    "Phase 2 LLM usage",
-    extra={
-        "stage": "HEADER_LLM_EXTRACTION_PHASE2",
-        "prompt_tokens": usage.prompt_tokens,
-        "completion_tokens": usage.completion_tokens,
-        "total_tokens": usage.total_tokens,
-        "vendor": critical_fields.get("AWDName"),
-    }
-)
+        "Phase 2 extraction completed",
+        extra={
+            "stage": "HEADER_LLM_EXTRACTION_PHASE2",
+            "vendor": critical_fields.get("AWDName"),
+        }
+    )
     return result
 
 # @log_pipeline_errors(stage="HEADER_LLM_EXTRACTION")
@@ -1,15 +1,10 @@
-def filter_non_gsk_medicines(all_medicine_list, gsk_brands):
-    non_gsk = []
-    # gsk = []
+from utils.stage2_llm_extraction_as_it_is.brand_matcher import get_brand_matcher
+
 
-    for medicine in all_medicine_list:
-        med_upper = medicine.upper()
+def filter_non_gsk_medicines(all_medicine_list, gsk_brands):
+    """Medicines that do not contain any GSK brand (input order kept)."""
+    matcher = get_brand_matcher(gsk_brands)
 
-        is_gsk = any(brand.upper() in med_upper for brand in gsk_brands)
+    gsk, non_gsk = matcher.partition(all_medicine_list)
 
-        if not is_gsk:
-            non_gsk.append(medicine)
-        # else:
-        #     gsk.append(medicine)
     return non_gsk
- 
\ No newline at end of file
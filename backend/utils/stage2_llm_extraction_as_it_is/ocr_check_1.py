@@ -1,20 +1,7 @@
-import os
 import re
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.ai.documentintelligence.models import AnalyzeDocumentRequest
-from azure.core.credentials import AzureKeyCredential
-from dotenv import load_dotenv
 # from utils.logging.decorators import capture_errors
 # from utils.logging.error_handler import log_pipeline_errors
-from utils.stage1_llm_classifier.llm_classifier import client, DEPLOYMENT_NAME
-# Load credentials
-load_dotenv()
-
-endpoint = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
-key = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
-
-# Initialize client
-client = DocumentIntelligenceClient(endpoint=endpoint, credential=AzureKeyCredential(key))
+from utils.stage0.document_analysis import DocumentAnalysis, analyze_pdf
 
 # @capture_errors(stage="OCR_EXTRACTION")
 # @log_pipeline_errors(stage="OCR_EXTRACTION")
@@ -34,33 +21,18 @@ client = DocumentIntelligenceClient(endpoint=endpoint, credential=AzureKeyCreden
 
 # @capture_errors(stage="OCR_EXTRACTION")
 # @log_pipeline_errors(stage="OCR_EXTRACTION")
-def extract_pdf_data_from_bytes(pdf_bytes: bytes):
+def extract_pdf_data_from_bytes(pdf_bytes: bytes, analysis: DocumentAnalysis | None = None):
     """
-    Extracts all text from PDF bytes using Azure Document Intelligence.
+    Extracts page 1 text from PDF bytes using Azure Document Intelligence.
     Cloud-safe, no filesystem usage.
     Includes preprocessing to fix common OCR issues.
+    Pass the shared `analysis` to reuse the single per-document ADI call.
     """
 
-    poller = client.begin_analyze_document(
-        model_id="prebuilt-read",
-        body=AnalyzeDocumentRequest(bytes_source=pdf_bytes)
-    )
-
-    result = poller.result()
-
-    # ocr_text = "\n".join(
-    #     [line.content for page in result.pages for line in page.lines]
-    # )
-
-    # # Preprocess to fix common issues (split PO numbers, etc.)
-    # ocr_text = preprocess_ocr_text(ocr_text)
-
-    # return ocr_text
-    page1_text = "\n".join(
-        line.content for line in result.pages[0].lines
-    )
+    if analysis is None:
+        analysis = analyze_pdf(pdf_bytes)
 
-    return preprocess_ocr_text(page1_text)
+    return preprocess_ocr_text(analysis.page1_text)
 
 
 def preprocess_ocr_text(text: str) -> str:
@@ -2,17 +2,18 @@
 from utils.logging.logger import get_logger
 from utils.stage2_llm_extraction_as_it_is.llm_extraction_0 import extract_header_from_text
 from utils.stage2_llm_extraction_as_it_is.ocr_check_1 import extract_pdf_data_from_bytes
+from utils.stage0.document_analysis import DocumentAnalysis
 
 logger = get_logger(__name__)
 
 
-def extract_POHeader_data_from_bytes(pdf_bytes: bytes):
+def extract_POHeader_data_from_bytes(pdf_bytes: bytes, analysis: DocumentAnalysis | None = None):
     logger.info(
         "Header extraction started (bytes)",
         extra={"byte_size": len(pdf_bytes)}
     )
 
-    ocr_text = extract_pdf_data_from_bytes(pdf_bytes)
+    ocr_text = extract_pdf_data_from_bytes(pdf_bytes, analysis=analysis)
 
     logger.info(
         "OCR text extracted",
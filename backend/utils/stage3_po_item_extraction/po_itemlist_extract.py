@@ -106,22 +106,11 @@
 #     return all_po_items
 
 
-from pydantic import BaseModel, Field
-from openai import AzureOpenAI
 from models.po_models import POItemList
-from dotenv import load_dotenv
-import os
+from utils.llm.llm_gateway import parse_completion
 
-load_dotenv()
-
-# Deployment name (model)
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-12-01-preview",
-)
-
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+# Bump when the prompts below change (invalidates cached responses)
+PROMPT_VERSION = "v1"
 
 
 SYSTEM_PROMPT = """
@@ -172,8 +161,9 @@ Return format:
 
 def extract_po_items_from_pdf_pages(ocr_text):
 
-    response = client.chat.completions.parse(
-        model=DEPLOYMENT_NAME,
+    return parse_completion(
+        prompt_name="po_item_extraction",
+        prompt_version=PROMPT_VERSION,
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
             {
@@ -182,7 +172,5 @@ def extract_po_items_from_pdf_pages(ocr_text):
             }
         ],
         response_format=POItemList
-    )
-
-    return response.choices[0].message.parsed 
+    ) 
  
\ No newline at end of file
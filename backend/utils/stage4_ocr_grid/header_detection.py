@@ -1,3 +1,28 @@
+HEADER_KEYWORDS = {
+    "sl", "sno", "sr",
+    "item", "product", "description",
+    "qty", "quantity", "pack",
+    "uom", "unit",
+    "rate", "price", "mrp",
+    "tax", "gst", "cgst", "sgst",
+    "hsn",
+    "discount", "amount", "value"
+}
+
+# Number of leading rows inspected for header content
+MAX_HEADER_ROWS = 4
+
+
+def tokenize(text: str) -> list[str]:
+    text = text.lower()
+    text = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
+    return [t for t in text.split() if t]
+
+
+def is_value_token(token: str) -> bool:
+    return any(ch.isdigit() for ch in token) or "%" in token
+
+
 def detect_header_rows(grid: list[list[str]]) -> list[int]:
     """
     Detect header rows in a PO table grid using deterministic rules.
@@ -9,31 +34,12 @@ def detect_header_rows(grid: list[list[str]]) -> list[int]:
         List of row indices that are header rows
     """
 
-    HEADER_KEYWORDS = {
-        "sl", "sno", "sr",
-        "item", "product", "description",
-        "qty", "quantity", "pack",
-        "uom", "unit",
-        "rate", "price", "mrp",
-        "tax", "gst", "cgst", "sgst",
-        "hsn",
-        "discount", "amount", "value"
-    }
-
-    def tokenize(text: str) -> list[str]:
-        text = text.lower()
-        text = "".join(ch if ch.isalnum() or ch.isspace() else " " for ch in text)
-        return [t for t in text.split() if t]
-
-    def is_value_token(token: str) -> bool:
-        return any(ch.isdigit() for ch in token) or "%" in token
-
     header_rows = []
 
     if not grid:
         return header_rows
 
-    rows_to_check = min(len(grid), 4)
+    rows_to_check = min(len(grid), MAX_HEADER_ROWS)
 
     for row_index in range(rows_to_check):
         row = grid[row_index]
@@ -76,4 +82,3 @@ def detect_header_rows(grid: list[list[str]]) -> list[int]:
             continue
 
     return header_rows
- 
\ No newline at end of file
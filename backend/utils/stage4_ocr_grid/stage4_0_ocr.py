@@ -1,76 +1,18 @@
-import os
-import json
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.core.credentials import AzureKeyCredential
-from dotenv import load_dotenv
+from utils.logging.logger import get_logger
+from utils.stage0.document_analysis import DocumentAnalysis, analyze_pdf
 
-load_dotenv()
+logger = get_logger(__name__)
 
-ENDPOINT = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
-KEY = os.getenv("AZURE_DOCUMENT_INTELLIGENCE_KEY")
 
-if not ENDPOINT or not KEY:
-    raise RuntimeError("ADI credentials not found in .env")
-
-
-def run_adi_ocr(pdf_bytes: bytes):
+def run_adi_ocr(pdf_bytes: bytes, analysis: DocumentAnalysis | None = None):
     """
-    Runs Azure Document Intelligence OCR (prebuilt-layout)
-    and saves BOTH table cells and page lines to JSON.
+    Returns the tables of the prebuilt-layout analysis as columnar OCRTable
+    objects (cell indices, string table and one float64 polygon buffer each).
+    Pass the shared `analysis` to reuse the single per-document ADI call.
     """
+    if analysis is None:
+        analysis = analyze_pdf(pdf_bytes)
 
-    client = DocumentIntelligenceClient(
-        endpoint=ENDPOINT,
-        credential=AzureKeyCredential(KEY),
-    )
-
-    # with open(pdf_path, "rb") as f:
-    #     pdf_bytes = f.read()
-
-    print("🔹 Running ADI OCR (prebuilt-layout)...")
-
-    poller = client.begin_analyze_document(
-        model_id="prebuilt-layout",
-        body=pdf_bytes
-    )
-
-    result = poller.result()
-
-    tables = []
-    
-    for table in result.tables:
-        table_obj = {
-            "row_count": table.row_count,
-            "column_count": table.column_count,
-            "cells": []
-        }
-
-        for cell in table.cells:
-            cell_obj = {
-                "row_index": cell.row_index,
-                "column_index": cell.column_index,
-                "content": cell.content,
-                "bounding_regions": []
-            }
-
-            if cell.bounding_regions:
-                for region in cell.bounding_regions:
-                    cell_obj["bounding_regions"].append({
-                        "page_number": region.page_number,
-                        "polygon": region.polygon
-                    })
-
-            table_obj["cells"].append(cell_obj)
-
-        tables.append(table_obj)
-
-    # os.makedirs(os.path.dirname(output_json_path), exist_ok=True)
-
-    # with open(output_json_path, "w", encoding="utf-8") as f:
-    #     json.dump(tables, f, indent=2)
-
-    # print(f"✅ ADI OCR JSON saved to: {output_json_path}")
     return {
-        "tables" : tables
+        "tables" : analysis.tables
     }
- 
\ No newline at end of file
@@ -1,14 +1,52 @@
+import os
+import time
+import random
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
 from utils.stage4_ocr_grid.stage4_2_grid_conversion import convert_table_to_grid
 from utils.stage4_ocr_grid.stage4_3_grid_to_md import convert_grid_to_markdown
-from utils.stage4_ocr_grid.stage4_4_recognize_po_table import recognize_po_table
+from utils.stage4_ocr_grid.stage4_4_recognize_po_table import (
+    chunk_tables_for_batch,
+    recognize_po_table,
+    recognize_po_tables_batch,
+)
 from models.po_models import POTableEvaluation, POTableEvaluationResult
 from utils.stage4_ocr_grid.stage4_0_extract_page_num import extract_page_number_from_table
 from tabulate import tabulate
 from utils.stage4_ocr_grid.header_detection import detect_header_rows
+from utils.stage4_ocr_grid.table_preclassifier import AMBIGUOUS, PO, preclassify_table
 from utils.logging.logger import get_logger
+from utils.metrics.metrics import TABLE_EVALUATION_FAILURES
 
 logger = get_logger(__name__)
 
+TABLE_PRECLASSIFIER_ENABLED = os.getenv("TABLE_PRECLASSIFIER_ENABLED", "true").lower() == "true"
+# Max tables classified by the LLM at the same time (per document)
+TABLE_EVAL_CONCURRENCY = int(os.getenv("TABLE_EVAL_CONCURRENCY", "4"))
+TABLE_EVAL_MAX_RETRIES = int(os.getenv("TABLE_EVAL_MAX_RETRIES", "4"))
+TABLE_EVAL_RETRY_BASE_DELAY = float(os.getenv("TABLE_EVAL_RETRY_BASE_DELAY", "2"))
+TABLE_EVAL_RETRY_MAX_DELAY = float(os.getenv("TABLE_EVAL_RETRY_MAX_DELAY", "30"))
+
+# "batch": one LLM request per token-bounded group of tables
+# "single": one LLM request per table
+TABLE_EVAL_MODE_BATCH = "batch"
+TABLE_EVAL_MODE_SINGLE = "single"
+TABLE_EVAL_MODE = os.getenv("TABLE_EVAL_MODE", TABLE_EVAL_MODE_BATCH).lower()
+# Estimated table tokens per batched request (system prompt not included)
+TABLE_BATCH_MAX_TOKENS = int(os.getenv("TABLE_BATCH_MAX_TOKENS", "12000"))
+
+# Errors worth retrying: throttling and transient service/network failures
+RETRYABLE_LLM_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+LLM_FAILURE_REASON_PREFIX = "LLM classification failed"
+
 def debug_table_card(table):
     print("\n" + "═" * 90)
     print(f"📄 TABLE INDEX : {table.table_index}")
@@ -31,55 +69,274 @@ def debug_table_card(table):
  
  
   
-def evaluate_tables_for_po(tables):
+def _retry_delay(exc: Exception, attempt: int) -> float:
+    # Honour the service's Retry-After when it sends one
+    response = getattr(exc, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(TABLE_EVAL_RETRY_MAX_DELAY, float(retry_after))
+    except ValueError:
+        pass
+
+    backoff = min(TABLE_EVAL_RETRY_MAX_DELAY, TABLE_EVAL_RETRY_BASE_DELAY * (2 ** attempt))
+    return random.uniform(backoff / 2, backoff)
+
+
+def call_llm_with_retry(func, *args, log_extra: dict | None = None):
     """
-    tables: List of OCR-extracted table objects.
-            Each table is assumed to already contain page_number metadata.
+    Calls func(*args) with exponential backoff on throttling / transient errors.
+    Raises the last error once TABLE_EVAL_MAX_RETRIES is exhausted.
     """
+    for attempt in range(TABLE_EVAL_MAX_RETRIES + 1):
+        try:
+            return func(*args)
+        except RETRYABLE_LLM_ERRORS as exc:
+            if attempt >= TABLE_EVAL_MAX_RETRIES:
+                raise
+            delay = _retry_delay(exc, attempt)
+            logger.warning(
+                "PO table classification throttled, retrying",
+                extra={
+                    **(log_extra or {}),
+                    "attempt": attempt + 1,
+                    "delay_seconds": round(delay, 2),
+                    "error_type": type(exc).__name__
+                }
+            )
+            time.sleep(delay)
+
+
+def recognize_po_table_with_retry(markdown: str, table_index: int) -> dict:
+    return call_llm_with_retry(
+        recognize_po_table, markdown, log_extra={"table_index": table_index}
+    )
+
 
-    results = []
+def prepare_table(index: int, table) -> dict:
+    """Page number, grid and markdown for one OCR table (no LLM)."""
+    # 1. Extract page number from OCR table
+    page_number = extract_page_number_from_table(table)
 
-    for index, table in enumerate(tables):
+    # 2. Convert table → grid
+    grid = convert_table_to_grid(table)
 
-        # 1. Extract page number from OCR table
-        page_number = extract_page_number_from_table(table)
+    # 3. Convert grid → markdown
+    markdown = convert_grid_to_markdown(grid)
 
-        # 2. Convert table → grid
-        grid = convert_table_to_grid(table)
+    return {
+        "table_index": index,
+        "page_number": page_number,
+        "grid": grid,
+        "markdown": markdown,
+    }
 
-        # 3. Convert grid → markdown
-        markdown = convert_grid_to_markdown(grid)
 
-        # 4. Call LLM to determine if PO table
+def classify_table_with_llm(prepared: dict) -> dict:
+    """
+    LLM classification of ONE table. A failure does not fail the whole
+    document, and does not silently drop the table either: if header
+    detection finds an item column the table is treated as PO and matched
+    on that column (redacting too much beats leaking a non-GSK row),
+    otherwise it is reported as unresolved.
+    """
+    try:
+        return recognize_po_table_with_retry(prepared["markdown"], prepared["table_index"])
+    except Exception as exc:
+        med_col_idx = preclassify_table(prepared["grid"]).med_col_idx
+        fallback = "rule_based" if med_col_idx is not None else "unresolved"
+        TABLE_EVALUATION_FAILURES.inc(fallback=fallback)
+
+        logger.exception(
+            "PO table classification failed",
+            extra={
+                "table_index": prepared["table_index"],
+                "page_number": prepared["page_number"],
+                "fallback": fallback,
+                "med_col_idx": med_col_idx
+            }
+        )
+        reason = f"{LLM_FAILURE_REASON_PREFIX}: {type(exc).__name__}: {exc}"
+        if med_col_idx is not None:
+            reason += f" (matched on rule-based item column {med_col_idx})"
 
-        # is_po,reason = recognize_po_table(markdown)
-        result = recognize_po_table(markdown)
-        is_po = result.get("is_po", False)
-        reason = result.get("reason", "")
-        med_col_idx = result.get("med_col_idx")
+        return {
+            "is_po": med_col_idx is not None,
+            "reason": reason,
+            "med_col_idx": med_col_idx,
+            "classification_failed": True
+        }
 
-        if is_po:
-            header_rows = detect_header_rows(grid)
-        else:
-            header_rows = None
 
-        logger.info("Detected header rows: %s", header_rows)
+def classify_chunk_with_llm(chunk: list[dict]) -> dict[int, dict]:
+    """
+    One batched LLM call for a chunk of tables (a single-table chunk uses
+    the regular per-table prompt). Tables the batch call did
+    not answer (or the whole chunk, if the call failed) fall back to
+    one recognize_po_table call each.
+    """
+    if len(chunk) == 1:
+        return {chunk[0]["table_index"]: classify_table_with_llm(chunk[0])}
+
+    indices = [p["table_index"] for p in chunk]
 
-        # 5. Store result in Pydantic model
-        table_result = POTableEvaluation(
-            table_index=index,
-            page_number=page_number,
-            grid=grid,
-            markdown=markdown,
-            is_po=is_po, 
-            reason=reason,
-            med_col_idx=med_col_idx,
-            header_rows = header_rows
+    try:
+        results = call_llm_with_retry(
+            recognize_po_tables_batch,
+            [(p["table_index"], p["markdown"]) for p in chunk],
+            log_extra={"table_indices": indices}
         )
+    except Exception:
+        logger.exception(
+            "Batched PO table classification failed, falling back to per-table calls",
+            extra={"table_indices": indices}
+        )
+        results = {}
+
+    missing = [p for p in chunk if p["table_index"] not in results]
+    if missing:
+        logger.warning(
+            "Batched PO table classification incomplete, classifying missing tables one by one",
+            extra={"missing_table_indices": [p["table_index"] for p in missing]}
+        )
+        for p in missing:
+            results[p["table_index"]] = classify_table_with_llm(p)
+
+    return results
+
+
+def preclassify(prepared: dict) -> dict | None:
+    """
+    Rule-based verdict as a recognize_po_table-shaped dict,
+    or None when the table must go to the LLM.
+    """
+    pre = preclassify_table(prepared["grid"])
+
+    logger.info(
+        "PO table pre-classified",
+        extra={
+            "table_index": prepared["table_index"],
+            "verdict": pre.verdict,
+            **pre.features
+        }
+    )
+
+    if pre.verdict == AMBIGUOUS:
+        return None
+
+    return {
+        "is_po": pre.verdict == PO,
+        "reason": pre.reason,
+        "med_col_idx": pre.med_col_idx if pre.verdict == PO else None,
+    }
+
+
+def build_table_evaluation(prepared: dict, result: dict) -> POTableEvaluation:
+    is_po = result.get("is_po", False)
+    reason = result.get("reason", "")
+    med_col_idx = result.get("med_col_idx")
+
+    if is_po:
+        header_rows = detect_header_rows(prepared["grid"])
+    else:
+        header_rows = None
+
+    logger.info("Detected header rows: %s", header_rows)
+
+    # 5. Store result in Pydantic model
+    return POTableEvaluation(
+        table_index=prepared["table_index"],
+        page_number=prepared["page_number"],
+        grid=prepared["grid"],
+        markdown=prepared["markdown"],
+        is_po=is_po,
+        reason=reason,
+        med_col_idx=med_col_idx,
+        header_rows=header_rows,
+        classification_failed=result.get("classification_failed", False)
+    )
+
+
+def evaluate_tables_for_po(tables, max_concurrency: int = TABLE_EVAL_CONCURRENCY):
+    """
+    tables: List of OCR-extracted table objects.
+            Each table is assumed to already contain page_number metadata.
+
+    Obvious PO / non-PO tables are decided by the rule-based pre-classifier;
+    only ambiguous ones are sent to the LLM - batched per token-bounded chunk
+    (TABLE_EVAL_MODE=batch) or one per table - concurrently, with at most
+    max_concurrency requests in flight. Results are in table_index order.
+    """
+    if not tables:
+        return POTableEvaluationResult(tables=[])
+
+    prepared = [prepare_table(index, table) for index, table in enumerate(tables)]
+
+    # 4a. Rule-based pre-classification
+    results: dict[int, dict] = {}
+    if TABLE_PRECLASSIFIER_ENABLED:
+        for p in prepared:
+            verdict = preclassify(p)
+            if verdict is not None:
+                results[p["table_index"]] = verdict
+
+    # 4b. LLM for the remaining (ambiguous) tables
+    escalated = [p for p in prepared if p["table_index"] not in results]
+
+    if TABLE_EVAL_MODE == TABLE_EVAL_MODE_BATCH:
+        # One request per token-bounded chunk instead of one per table
+        by_index = {p["table_index"]: p for p in escalated}
+        chunks = [
+            [by_index[table_index] for table_index, _ in chunk]
+            for chunk in chunk_tables_for_batch(
+                [(p["table_index"], p["markdown"]) for p in escalated],
+                TABLE_BATCH_MAX_TOKENS
+            )
+        ]
+    else:
+        chunks = [[p] for p in escalated]
+
+    workers = max(1, min(max_concurrency, len(chunks)))
+
+    if workers == 1:
+        for chunk in chunks:
+            results.update(classify_chunk_with_llm(chunk))
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="table-eval") as executor:
+            # One context copy per task keeps request_id etc. in worker logs
+            futures = [
+                executor.submit(contextvars.copy_context().run, classify_chunk_with_llm, chunk)
+                for chunk in chunks
+            ]
+            for future in futures:
+                results.update(future.result())
+
+    # 5. Assemble in table_index order
+    evaluations = [build_table_evaluation(p, results[p["table_index"]]) for p in prepared]
+
+    failed = [r.table_index for r in evaluations if r.classification_failed]
+    unresolved = [r.table_index for r in evaluations if r.classification_failed and not r.is_po]
+
+    # 6. Debug output
+    # for table_result in evaluations:
+    #     debug_table_card(table_result)
 
-        # 6. Append to results
-        # debug_table_card(table_result)
-        results.append(table_result)
+    logger.info(
+        "PO table evaluation completed",
+        extra={
+            "table_count": len(evaluations),
+            "po_table_count": sum(1 for r in evaluations if r.is_po),
+            "llm_table_count": len(escalated),
+            "llm_request_groups": len(chunks),
+            "mode": TABLE_EVAL_MODE,
+            "failed_table_indices": failed,
+            "unresolved_table_indices": unresolved,
+            "concurrency": workers
+        }
+    )
 
-    return POTableEvaluationResult(tables=results)
- 
\ No newline at end of file
+    return POTableEvaluationResult(
+        tables=evaluations,
+        failed_table_indices=failed,
+        unresolved_table_indices=unresolved
+    )
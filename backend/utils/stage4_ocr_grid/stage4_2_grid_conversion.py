@@ -1,27 +1,24 @@
-def convert_table_to_grid(table: dict):
+from utils.stage0.ocr_table import OCRTable
+
+
+def convert_table_to_grid(table: OCRTable):
     """
     Converts a single OCR-extracted table into a 2D grid.
     No normalization. No markdown. No LLM logic.
+    Built straight from the table's row/column arrays (no per-cell dicts).
     """
-
-    # Step 1: Extract display cells from OCR table
-    cells = adi_table_to_display_cells(table)
-
-    # Step 2: Build grid from row/column indices
-    grid = build_grid_from_cells(cells)
-
-    return grid
+    return table.to_grid()
 
 
 
-def adi_table_to_display_cells(table: dict):
+def adi_table_to_display_cells(table: OCRTable):
     return [
         {
-            "row_index": cell.get("row_index", 0),
-            "col_index": cell.get("column_index", 0),
-            "text": cell.get("content", "").strip(),
+            "row_index": row,
+            "col_index": col,
+            "text": content.strip(),
         }
-        for cell in table.get("cells", [])
+        for row, col, _, content in table.iter_cells()
     ]
 
 
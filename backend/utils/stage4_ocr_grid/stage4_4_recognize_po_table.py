@@ -1,18 +1,11 @@
 #recognize_po_table_llm.py
-from openai import AzureOpenAI
-from dotenv import load_dotenv
-import os , json
-load_dotenv()
+from utils.llm.llm_gateway import parse_completion
+from utils.logging.logger import get_logger
 
-# Initialize Azure OpenAI client
-client = AzureOpenAI(
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-12-01-preview",
-)
+logger = get_logger(__name__)
 
-# Deployment name (model)
-DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+# Bump when the prompts below change (invalidates cached responses)
+PROMPT_VERSION = "v1"
 
 # def extract_json_from_llm(content: str):
 #     """
@@ -37,21 +30,10 @@ class IsPOData(BaseModel):
     reason: str = Field(description="Reason why hsi table is PO or not PO")
     med_col_idx: int = Field(description="Index of the column where the medicine name is present")
 
-def recognize_po_table(markdown):
-    """
-    Analyze a markdown table to determine if it is a Purchase Order (PO) table using LLM.
-    
-    Args:
-        markdown_table: Table in markdown format.
-        
-    Returns:
-        POTableResult: Object containing is_po, column_name_of_item_name, and confidence_score.
-    """
-
-    # -----------------------------
-    # 🔹 System Prompt
-    # -----------------------------
-    system_prompt = """
+# -----------------------------
+# 🔹 System Prompt (shared by single and batched classification)
+# -----------------------------
+PO_TABLE_SYSTEM_PROMPT = """
         You are an expert procurement and purchasing assistant specialized in analyzing Purchase Order (PO) tables.
         Your task is to accurately identify PO tables by analyzing both column names AND their corresponding values.
 
@@ -151,8 +133,22 @@ def recognize_po_table(markdown):
         ----------------------------------------------
         - Go through the markdown and find the column which holds the medicine names/descriptions and return its numeric Index as an Integer
 
+"""
+
+
+def recognize_po_table(markdown):
+    """
+    Analyze a markdown table to determine if it is a Purchase Order (PO) table using LLM.
+    
+    Args:
+        markdown_table: Table in markdown format.
+        
+    Returns:
+        POTableResult: Object containing is_po, column_name_of_item_name, and confidence_score.
     """
 
+    system_prompt = PO_TABLE_SYSTEM_PROMPT
+
     # -----------------------------
     # 🔹 User Prompt
     # -----------------------------
@@ -190,11 +186,12 @@ def recognize_po_table(markdown):
         {markdown}
     """
 
- # -----------------------------
-    # LLM Call (Structured)
     # -----------------------------
-    response = client.chat.completions.parse(
-        model=DEPLOYMENT_NAME,
+    # LLM Call (Structured, memoized)
+    # -----------------------------
+    parsed = parse_completion(
+        prompt_name="recognize_po_table",
+        prompt_version=PROMPT_VERSION,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
@@ -203,20 +200,110 @@ def recognize_po_table(markdown):
         response_format=IsPOData,
     )
 
-    content = response.choices[0].message.content
-    print("*"*50)
-    print(content)
-    import json
-    return json.loads(content)    # return extract_json_from_llm(content)
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        return {
-            "is_po": False,
-            "reason": "LLM returned invalid JSON",
-        }
-    # -----------------------------
-    # Parsed Pydantic Output
-    # -----------------------------
-    # return response.choices[0].message.parsed
+    logger.debug("recognize_po_table result | %s", parsed)
+    return parsed.model_dump()
+
+
+
+# ======================================================
+# Batched classification (all tables of a document)
+# ======================================================
+BATCH_PROMPT_VERSION = "v1"
+
+# Rough token estimate used for chunking (≈ 4 characters per token)
+CHARS_PER_TOKEN = 4
+
+
+class IndexedIsPOData(IsPOData):
+    table_index: int = Field(description="Index of the table exactly as given in the input")
+
+
+class IsPODataBatch(BaseModel):
+    tables: list[IndexedIsPOData]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_tables_for_batch(tables: list[tuple[int, str]], max_tokens: int) -> list[list[tuple[int, str]]]:
+    """
+    Greedily groups (table_index, markdown) pairs into chunks whose
+    estimated token count stays under max_tokens. A table larger than
+    max_tokens gets a chunk of its own. Input order is preserved.
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for table_index, markdown in tables:
+        tokens = estimate_tokens(markdown)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current = []
+            current_tokens = 0
+        current.append((table_index, markdown))
+        current_tokens += tokens
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+
+def recognize_po_tables_batch(tables: list[tuple[int, str]]) -> dict[int, dict]:
+    """
+    Classify several markdown tables of ONE document in a single LLM call.
+
+    Args:
+        tables: (table_index, markdown) pairs.
+
+    Returns:
+        {table_index: {"is_po", "reason", "med_col_idx"}} for every index the
+        model answered. Indices it skipped (or invented) are left out, so the
+        caller can fall back to recognize_po_table for them.
+    """
+    tables_text = "\n\n".join(
+        f"### Table {table_index}\n{markdown}" for table_index, markdown in tables
+    )
+
+    user_prompt = f"""
+        Below are {len(tables)} markdown tables extracted from the SAME Purchase Order document,
+        in document order. Each table is introduced by "### Table <index>".
+
+        Apply the PO table rules to EACH table independently and return exactly one
+        result per table, using the table's index from the input as table_index.
+
+        Tables that continue a PO item table from the previous page (same column layout,
+        medicine rows without a header) ARE PO tables; use the neighbouring tables to
+        recognise such continuations and to pick their medicine column.
+
+        For each table, med_col_idx is the index of the medicine name column within THAT table.
+
+        Return ONLY JSON in this format:
+
+        {IsPODataBatch.model_json_schema()}
+
+        Tables:
+        {tables_text}
+    """
+
+    parsed = parse_completion(
+        prompt_name="recognize_po_tables_batch",
+        prompt_version=BATCH_PROMPT_VERSION,
+        messages=[
+            {"role": "system", "content": PO_TABLE_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=0.1,
+        response_format=IsPODataBatch,
+    )
+
+    requested = {table_index for table_index, _ in tables}
+    results = {}
+
+    for item in parsed.tables:
+        if item.table_index in requested and item.table_index not in results:
+            results[item.table_index] = item.model_dump(exclude={"table_index"})
 
+    return results
@@ -37,13 +37,13 @@ def display_table_robust(table_data, render=True):
         return [], ""
 
 
-def adi_table_to_display_cells(po_table: dict):
+def adi_table_to_display_cells(po_table):
     cells = []
-    for cell in po_table.get("cells", []):
+    for row, col, _, content in po_table.iter_cells():
         cells.append({
-            "row_index": cell.get("row_index", 0),
-            "col_index": cell.get("column_index", 0),
-            "text": (cell.get("content") or "").strip(),
+            "row_index": row,
+            "col_index": col,
+            "text": (content or "").strip(),
         })
     return cells
 
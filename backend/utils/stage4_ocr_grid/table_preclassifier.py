@@ -0,0 +1,211 @@
+import re
+from dataclasses import dataclass, field
+
+from utils.stage4_ocr_grid.header_detection import (
+    HEADER_KEYWORDS,
+    detect_header_rows,
+    tokenize,
+)
+
+# ======================================================
+# Verdicts
+# ======================================================
+PO = "PO"
+NOT_PO = "NOT_PO"
+AMBIGUOUS = "AMBIGUOUS"     # escalate to recognize_po_table (LLM)
+
+RULE_REASON_PREFIX = "Rule-based"
+
+# Header words that name the medicine / item description column
+NAME_COLUMN_KEYWORDS = {
+    "item", "product", "description", "particulars",
+    "medicine", "drug", "name", "material",
+}
+
+# A header containing one of these is an id/code column, not the name column
+NOT_NAME_COLUMN_KEYWORDS = {
+    "code", "no", "hsn", "id", "sku", "qty", "quantity", "batch",
+}
+
+SERIAL_KEYWORDS = {"sl", "sno", "sr"}
+
+# Purchasing-context header words (qty / price / tax ...)
+PURCHASE_KEYWORDS = HEADER_KEYWORDS - NAME_COLUMN_KEYWORDS - SERIAL_KEYWORDS
+
+# Dosage forms / strengths (TAB, INJ, SYP, 500MG, 1.2G, 5%, TAB14387 ...)
+DOSAGE_PATTERN = re.compile(
+    r"\b(?:"
+    r"tabs?|tablets?|caps?|capsules?|inj|injections?|syp|syrups?|susp|suspension"
+    r"|cream|gel|oint|ointment|drops?|vial|amp|ampoule|lotion|spray|inhaler"
+    r"|respules|sachet|powder"
+    r")\b"
+    r"|\b(?:tab|cap|inj|syp)\d+"
+    r"|\d+(?:\.\d+)?\s*(?:mg|mcg|ml|gm|g|iu|%)(?![a-z])",
+    re.IGNORECASE,
+)
+
+NUMERIC_CELL_PATTERN = re.compile(r"^[\d\s,./%()+-]*\d[\d\s,./%()+-]*$")
+
+# Share of body cells that must be numeric for a "numeric column"
+NUMERIC_COLUMN_THRESHOLD = 0.6
+# Share of body rows whose name cell must carry a dosage token
+MED_COLUMN_DOSAGE_THRESHOLD = 0.5
+
+
+@dataclass
+class TablePreclassification:
+    verdict: str
+    reason: str
+    med_col_idx: int | None = None
+    header_rows: list[int] = field(default_factory=list)
+    features: dict = field(default_factory=dict)
+
+
+def has_dosage_token(text: str) -> bool:
+    return bool(text) and DOSAGE_PATTERN.search(text) is not None
+
+
+def is_numeric_cell(text: str) -> bool:
+    return bool(text) and NUMERIC_CELL_PATTERN.match(text.strip()) is not None
+
+
+def _column_text(grid: list[list[str]], rows: list[int], col: int) -> str:
+    return " ".join(
+        grid[r][col] for r in rows if col < len(grid[r]) and grid[r][col]
+    )
+
+
+def _column_cells(body: list[list[str]], col: int) -> list[str]:
+    return [
+        row[col].strip() for row in body
+        if col < len(row) and row[col] and row[col].strip()
+    ]
+
+
+def _dosage_ratio(cells: list[str]) -> float:
+    if not cells:
+        return 0.0
+    return sum(1 for c in cells if has_dosage_token(c)) / len(cells)
+
+
+def infer_med_col_idx(grid: list[list[str]], header_rows: list[int],
+                      body: list[list[str]]) -> int | None:
+    """
+    Medicine column from the header text: a column named like
+    Item / Product / Description that is not a code/qty column.
+    Ties are broken by the dosage-token share of the column body.
+    """
+    if not header_rows:
+        return None
+
+    num_cols = max(len(row) for row in grid)
+    candidates = []
+
+    for col in range(num_cols):
+        tokens = set(tokenize(_column_text(grid, header_rows, col)))
+        if tokens & NAME_COLUMN_KEYWORDS and not tokens & NOT_NAME_COLUMN_KEYWORDS:
+            candidates.append(col)
+
+    if not candidates:
+        return None
+
+    # max() keeps the left-most column on equal ratios
+    return max(candidates, key=lambda c: (_dosage_ratio(_column_cells(body, c)), -c))
+
+
+def preclassify_table(grid: list[list[str]]) -> TablePreclassification:
+    """
+    Cheap, deterministic PO / NOT_PO / AMBIGUOUS decision for one grid.
+
+    PO        : purchasing header + named item column whose values are
+                mostly dosage forms + at least one numeric column
+    NOT_PO    : no dosage tokens anywhere and no item column, and either a
+                real (non-item) header or no numeric columns at all
+                (tax summaries, address / signature blocks)
+    AMBIGUOUS : everything else
+    """
+    if not grid or not any(any(cell for cell in row) for row in grid):
+        return TablePreclassification(
+            verdict=NOT_PO, reason=f"{RULE_REASON_PREFIX}: empty table"
+        )
+
+    num_rows = len(grid)
+    num_cols = max(len(row) for row in grid)
+
+    header_rows = detect_header_rows(grid)
+    body_start = max(header_rows) + 1 if header_rows else 0
+    body = grid[body_start:]
+    body_rows = [row for row in body if any(cell and cell.strip() for cell in row)]
+
+    header_tokens = set()
+    for r in header_rows:
+        for cell in grid[r]:
+            if cell:
+                header_tokens.update(tokenize(cell))
+
+    numeric_cols = 0
+    for col in range(num_cols):
+        cells = _column_cells(body_rows, col)
+        if cells and sum(1 for c in cells if is_numeric_cell(c)) / len(cells) >= NUMERIC_COLUMN_THRESHOLD:
+            numeric_cols += 1
+
+    dosage_rows = sum(
+        1 for row in body_rows if any(has_dosage_token(cell) for cell in row if cell)
+    )
+
+    med_col_idx = infer_med_col_idx(grid, header_rows, body_rows)
+    med_col_dosage = (
+        _dosage_ratio(_column_cells(body_rows, med_col_idx))
+        if med_col_idx is not None else 0.0
+    )
+
+    features = {
+        "rows": num_rows,
+        "cols": num_cols,
+        "body_rows": len(body_rows),
+        "header_rows": header_rows,
+        "purchase_header_hits": len(header_tokens & PURCHASE_KEYWORDS),
+        "numeric_cols": numeric_cols,
+        "dosage_rows": dosage_rows,
+        "med_col_idx": med_col_idx,
+        "med_col_dosage_ratio": round(med_col_dosage, 2),
+    }
+
+    # ---------------- Confident PO ----------------
+    if (
+        med_col_idx is not None
+        and body_rows
+        and features["purchase_header_hits"] >= 1
+        and numeric_cols >= 1
+        and med_col_dosage >= MED_COLUMN_DOSAGE_THRESHOLD
+    ):
+        return TablePreclassification(
+            verdict=PO,
+            reason=(
+                f"{RULE_REASON_PREFIX}: purchase header, item column {med_col_idx} "
+                f"with {med_col_dosage:.0%} dosage-form rows, {numeric_cols} numeric columns"
+            ),
+            med_col_idx=med_col_idx,
+            header_rows=header_rows,
+            features=features,
+        )
+
+    # ---------------- Confident NOT PO ----------------
+    if dosage_rows == 0 and med_col_idx is None and (header_rows or numeric_cols == 0):
+        return TablePreclassification(
+            verdict=NOT_PO,
+            reason=(
+                f"{RULE_REASON_PREFIX}: no item column and no dosage-form tokens "
+                f"({num_rows}x{num_cols} table)"
+            ),
+            header_rows=header_rows,
+            features=features,
+        )
+
+    return TablePreclassification(
+        verdict=AMBIGUOUS,
+        reason=f"{RULE_REASON_PREFIX}: ambiguous",
+        med_col_idx=med_col_idx,
+        header_rows=header_rows,
+        features=features,
+    )
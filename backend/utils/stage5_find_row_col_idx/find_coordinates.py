@@ -174,6 +174,8 @@ from rapidfuzz import fuzz
 from typing import List, Set, Tuple
 import re
 
+from utils.stage0.ocr_table import OCRTable
+
 def log_match_attempt(
     grid_idx: int,
     row: int,
@@ -208,14 +210,14 @@ def normalize(text: str) -> str:
 
 def find_non_gsk_row_spans(
     po_grid: List[List[str]],
-    ocr_table: dict,
+    ocr_table: OCRTable,
     med_col_idx: int,
     grid_idx: int,
     non_gsk_med_list: List[str],   # ORDERED
 ) -> List[Tuple[int, int]]:
 
-    row_count = ocr_table["row_count"]
-    col_count = ocr_table["column_count"]
+    row_count = ocr_table.row_count
+    col_count = ocr_table.column_count
 
     # -----------------------------
     # Normalization
@@ -1,3 +1,6 @@
+from utils.stage0.ocr_table import OCRTable
+from utils.stage5_find_row_col_idx.table_geometry import TableGeometry
+
 # def get_table_x_bounds(table):
 #     all_X=[]
 #     for cell in table.cells:
@@ -5,16 +8,12 @@
 #             all_X.extend(regions.polygon[0::2])
 #     return min(all_X),max(all_X)
 
-def get_table_x_bounds(table: dict):
-    all_x = []
-
-    for cell in table.get("cells", []):
-        for region in cell.get("bounding_regions", []):
-            polygon = region.get("polygon", [])
-            # X coordinates are even indices
-            all_x.extend(polygon[0::2])
-
-    if not all_x:
-        raise ValueError("No X coordinates found in OCR table")
+def get_table_x_bounds(table: OCRTable, geometry: TableGeometry | None = None):
+    """
+    (min x, max x) over every polygon of the table.
+    Raises ValueError when the table has no coordinates.
+    """
+    if geometry is None:
+        geometry = TableGeometry(table)
 
-    return min(all_x), max(all_x)
+    return geometry.x_bounds
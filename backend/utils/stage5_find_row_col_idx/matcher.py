@@ -132,18 +132,29 @@
 
 #     return rows_to_redact
 from typing import List, Tuple
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+import numpy as np
 import re
 
+from utils.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Minimum fuzz.ratio for a combination to count as a non-GSK match
+MATCH_SCORE_CUTOFF = 80
+
+# Combination 4 = medicine cell + continuation row below it
+CONTINUATION_COMBINATION = 4
+
+_HSN_PATTERN = re.compile(r'(?i)\bhsn(?:\s*code)?\s*:?\s*\d+\b')
+_SEPARATOR_PATTERN = re.compile(r"[,\-_/]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
 
 def normalize(text: str) -> str:
-    text = re.sub(
-        r'(?i)\bhsn(?:\s*code)?\s*:?\s*\d+\b',
-        '',
-        text
-    )
-    text = re.sub(r"[,\-_/]", " ", text)
-    text = re.sub(r"\s+", " ", text)
+    text = _HSN_PATTERN.sub('', text)
+    text = _SEPARATOR_PATTERN.sub(" ", text)
+    text = _WHITESPACE_PATTERN.sub(" ", text)
     return text.strip().lower()
 
 def is_continuation_row(row):
@@ -166,27 +177,16 @@ def match(candidate: str, target: str) -> float:
 
 
 def batch_match(candidate: str, target_list: List[str]):
-    print(f"\n     Candidate being matched: '{candidate}'")
+    """Best (score, index) of candidate against target_list; ties go to the LAST target."""
     max_score = 0
     max_index = None
 
     for target_index, target in enumerate(target_list):
         score = match(candidate, target)
-
-        print(
-            f"         Compared with [{target_index}] '{target}' "
-            f"=> score = {score}"
-        )
-
         if score >= max_score:
             max_score = score
             max_index = target_index
 
-    print(
-        f"    Best match for candidate '{candidate}' "
-        f"=> index={max_index}, score={max_score}"
-    )
-
     return max_score, max_index
 
 
@@ -194,130 +194,149 @@ def find_best_combination(
     combinations: List[Tuple[int, str, int]],
     non_gsk_med_list: List[str]
 ):
-    print("\n   Evaluating combinations for current row")
-
     match_results_for_comb = []
 
     for comb_index, comb_text, row_idx in combinations:
-        print(
-            f"\n  Combination {comb_index} (row ref={row_idx}) "
-            f"Text: '{comb_text}'"
-        )
-
         max_score, max_index = batch_match(comb_text, non_gsk_med_list)
-
         match_results_for_comb.append(
             (comb_index, max_score, max_index, comb_text)
         )
 
-    print("\n   Summary of all combinations:")
-    for comb_index, score, idx, text in match_results_for_comb:
-        target = non_gsk_med_list[idx] if idx is not None else None
-        print(
-            f"      Combination {comb_index}: "
-            f"score={score}, matched='{target}', text='{text}'"
-        )
-
+    # Stable sort: on equal scores the earlier combination wins
     match_results_for_comb.sort(key=lambda x: x[1], reverse=True)
 
-    best = match_results_for_comb[0]
-    print(
-        f"\n   Best combination selected: "
-        f"Combination {best[0]} with score {best[1]}"
-    )
-
-    return best  # (comb_index, score, non_gsk_index, comb_text)
+    return match_results_for_comb[0]  # (comb_index, score, non_gsk_index, comb_text)
 
 
-def find_fragmented_match(
+def build_row_combinations(
     po_grid: List[List[str]],
     med_col_idx: int,
-    non_gsk_med_list: List[str],
-    header_rows: List[int] | None = None,
-):
+    start_row: int,
+) -> List[Tuple[int, int, str]]:
+    """
+    All candidate texts of the table as (row_index, comb_index, text),
+    grouped by row, combinations in order 1..4:
+
+        1: medicine cell
+        2: left cell + medicine cell
+        3: left + medicine + right cell
+        4: medicine cell + medicine cell of a continuation row below
+    """
     row_count = len(po_grid)
     col_count = len(po_grid[0])
-    # row_index = 0
-
-    # ----------------- DETERMINE START ROW -----------------
-
-    if header_rows:
-        start_row = max(header_rows) + 1
-    else:
-        start_row = 0
 
-    row_index = start_row
+    combinations = []
 
-    rows_to_redact: List[Tuple[int, int]] = []
-
-    while row_index < row_count:
+    for row_index in range(start_row, row_count):
         row = po_grid[row_index]
 
-        print("\n" + "=" * 80)
-        print(f" Checking row {row_index}: {row}")
-
-        combinations = []
-        combinations.append((1, row[med_col_idx], row_index))
+        combinations.append((row_index, 1, row[med_col_idx]))
 
         if med_col_idx - 1 >= 0:
             combinations.append(
-                (2, row[med_col_idx - 1] + " " + row[med_col_idx], row_index)
+                (row_index, 2, row[med_col_idx - 1] + " " + row[med_col_idx])
             )
 
         if med_col_idx - 1 >= 0 and med_col_idx + 1 < col_count:
             combinations.append(
                 (
+                    row_index,
                     3,
                     row[med_col_idx - 1]
                     + " "
                     + row[med_col_idx]
                     + " "
                     + row[med_col_idx + 1],
-                    row_index,
                 )
             )
 
-        # if row_index + 1 < row_count:
-        #     next_row = po_grid[row_index + 1]
-            
-        #     combinations.append(
-        #         (4, row[med_col_idx] + " " + next_row[med_col_idx], row_index + 1)
-        #     )
         if row_index + 1 < row_count:
             next_row = po_grid[row_index + 1]
             # added to solve next merging row issue-taking next item name and merging it with current row
-            if is_continuation_row(next_row):  
+            if is_continuation_row(next_row):
                 combinations.append(
-                (4, row[med_col_idx] + " " + next_row[med_col_idx], row_index + 1)
-            )
+                    (row_index, CONTINUATION_COMBINATION, row[med_col_idx] + " " + next_row[med_col_idx])
+                )
 
-        comb_index, max_score, non_gsk_index, comb_text = find_best_combination(
-            combinations, non_gsk_med_list
-        )
+    return combinations
+
+
+def find_fragmented_match(
+    po_grid: List[List[str]],
+    med_col_idx: int,
+    non_gsk_med_list: List[str],
+    header_rows: List[int] | None = None,
+):
+    """
+    Rows of po_grid whose medicine text matches a non-GSK medicine,
+    as (start_row, end_row) spans (end_row = row + 1 when the match
+    needed the continuation row below).
 
-        if max_score < 80:
-            print(
-                f"\n No valid match found (score={max_score} < 80)"
+    Every combination text and every target is normalized once, and the
+    whole candidate x target score matrix comes from one rapidfuzz cdist
+    call (scores below MATCH_SCORE_CUTOFF are reported as 0).
+    """
+
+    # ----------------- DETERMINE START ROW -----------------
+
+    if header_rows:
+        start_row = max(header_rows) + 1
+    else:
+        start_row = 0
+
+    combinations = build_row_combinations(po_grid, med_col_idx, start_row)
+
+    rows_to_redact: List[Tuple[int, int]] = []
+
+    if not combinations or not non_gsk_med_list:
+        return rows_to_redact
+
+    targets = [normalize(target) for target in non_gsk_med_list]
+    candidates = [normalize(text) for _, _, text in combinations]
+
+    # float64 so equal scores compare exactly like fuzz.ratio's own floats
+    scores = process.cdist(
+        candidates,
+        targets,
+        scorer=fuzz.ratio,
+        processor=None,
+        score_cutoff=MATCH_SCORE_CUTOFF,
+        dtype=np.float64,
+    )
+    best_scores = scores.max(axis=1)
+    best_targets = scores.argmax(axis=1)
+
+    # Combinations are grouped by row, in combination order
+    position = 0
+    while position < len(combinations):
+        row_index = combinations[position][0]
+        end = position
+        while end < len(combinations) and combinations[end][0] == row_index:
+            end += 1
+
+        row_scores = best_scores[position:end]
+        best = int(np.argmax(row_scores))      # first max = earliest combination
+        max_score = float(row_scores[best])
+
+        if max_score >= MATCH_SCORE_CUTOFF:
+            _, comb_index, comb_text = combinations[position + best]
+
+            logger.debug(
+                "Non-GSK match accepted | row=%d | combination=%d | text=%r | matched=%r | score=%.1f",
+                row_index,
+                comb_index,
+                comb_text,
+                non_gsk_med_list[int(best_targets[position + best])],
+                max_score
             )
-            row_index += 1
-            continue
-
-        print(
-            f"\n Match accepted:"
-            f"\n   Combination {comb_index}"
-            f"\n   Text: '{comb_text}'"
-            f"\n   Matched Non-GSK: '{non_gsk_med_list[non_gsk_index]}'"
-            f"\n   Score: {max_score}"
-        )
 
-        if comb_index == 4:
-            rows_to_redact.append((row_index, row_index + 1))
-        else:
-            rows_to_redact.append((row_index, row_index))
+            if comb_index == CONTINUATION_COMBINATION:
+                rows_to_redact.append((row_index, row_index + 1))
+            else:
+                rows_to_redact.append((row_index, row_index))
 
-        row_index += 1
+        position = end
 
-    print("\n" + "=" * 80)
-    print(" Final rows to redact:", rows_to_redact)
+    logger.debug("Final rows to redact: %s", rows_to_redact)
 
-    return rows_to_redact 
\ No newline at end of file
+    return rows_to_redact
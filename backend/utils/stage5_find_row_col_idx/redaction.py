@@ -49,77 +49,235 @@
 
 #     print("✅ Redacted PDF saved to:", output_pdf)
 
+import os
+import multiprocessing
 from io import BytesIO
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+
 import fitz
-import os
+from dotenv import load_dotenv
 from utils.logging.logger import get_logger
+
 logger = get_logger(__name__)
 
+load_dotenv()
+
 INCH_TO_PT = 72.0
 
+# Image handling inside redaction boxes: "pixels" (blank the covered
+# pixels), "remove" (drop every overlapping image) or "none" (keep images)
+REDACTION_IMAGES = os.getenv("REDACTION_IMAGES", "pixels").lower()
+# Only remove text under the boxes; images and line art stay untouched
+REDACTION_TEXT_ONLY = os.getenv("REDACTION_TEXT_ONLY", "false").lower() == "true"
+# Spans on the same page closer than this (inches) are drawn as one box
+REDACTION_MERGE_GAP_INCHES = float(os.getenv("REDACTION_MERGE_GAP_INCHES", "0"))
+
+# Documents with at least this many pages are redacted in worker processes
+REDACTION_PARALLEL_MIN_PAGES = int(os.getenv("REDACTION_PARALLEL_MIN_PAGES", "100"))
+REDACTION_WORKERS = int(os.getenv("REDACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# garbage>=3 drops objects no page references any more (e.g. the original
+# content streams of pages swapped out by the worker path), so the
+# redacted text cannot be recovered from the output file.
+_SAVE_OPTIONS = {"garbage": 3, "deflate": True}
+
+_IMAGE_MODES = {
+    "none": fitz.PDF_REDACT_IMAGE_NONE,
+    "remove": fitz.PDF_REDACT_IMAGE_REMOVE,
+    "pixels": fitz.PDF_REDACT_IMAGE_PIXELS,
+}
+
+
+@dataclass(frozen=True)
+class RedactionOptions:
+    images: str = REDACTION_IMAGES
+    text_only: bool = REDACTION_TEXT_ONLY
+    fill: tuple[float, float, float] = (0, 0, 0)
+    merge_gap: float = REDACTION_MERGE_GAP_INCHES
+
+    def apply_kwargs(self) -> dict:
+        """Keyword arguments for page.apply_redactions()."""
+        if self.text_only:
+            return {
+                "images": fitz.PDF_REDACT_IMAGE_NONE,
+                "graphics": fitz.PDF_REDACT_LINE_ART_NONE,
+            }
+        if self.images not in _IMAGE_MODES:
+            raise ValueError(f"Unknown redaction image mode '{self.images}'")
+        return {"images": _IMAGE_MODES[self.images]}
+
 
 # def get_redacted_filename(original_path: str):
 #     base, ext = os.path.splitext(original_path)
 #     return f"{base}_redacted{ext}"
 
 
+def merge_spans(y_spans, page_count: int, gap: float = 0.0) -> dict[int, list[tuple[float, float]]]:
+    """
+    Groups (page_no, y1, y2) spans by 0-based page and merges spans that
+    overlap or lie within `gap` inches of each other.
+    Spans on unknown pages or with a missing y are dropped.
+    """
+    by_page: dict[int, list[tuple[float, float]]] = {}
+
+    for page_no, y1, y2 in y_spans:
+        if page_no < 0 or page_no >= page_count:
+            continue
+        if y1 is None or y2 is None:
+            continue
+        by_page.setdefault(page_no, []).append((min(y1, y2), max(y1, y2)))
+
+    merged = {}
+    for page_no in sorted(by_page):
+        page_spans = []
+        for top, bottom in sorted(by_page[page_no]):
+            if page_spans and top <= page_spans[-1][1] + gap:
+                page_spans[-1] = (page_spans[-1][0], max(page_spans[-1][1], bottom))
+            else:
+                page_spans.append((top, bottom))
+        merged[page_no] = page_spans
+
+    return merged
+
+
+def _redact_page(page, spans, x1_pt: float, x2_pt: float, options: RedactionOptions):
+    for y1, y2 in spans:
+        rect = fitz.Rect(x1_pt, y1 * INCH_TO_PT, x2_pt, y2 * INCH_TO_PT)
+        page.add_redact_annot(rect, fill=options.fill)
+
+    page.apply_redactions(**options.apply_kwargs())
+
+
+def _redact_page_group(pdf_stream: bytes, page_spans: dict, x1_pt: float, x2_pt: float,
+                       options: RedactionOptions) -> bytes:
+    """
+    Worker-process entry point: redacts the given pages and returns a PDF
+    holding ONLY those pages, in ascending page order.
+    """
+    doc = fitz.open(stream=pdf_stream, filetype="pdf")
+    try:
+        pages = sorted(page_spans)
+        for page_no in pages:
+            _redact_page(doc[page_no], page_spans[page_no], x1_pt, x2_pt, options)
+
+        doc.select(pages)
+        return doc.tobytes(**_SAVE_OPTIONS)
+    finally:
+        doc.close()
+
+
+_process_pool = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that runs threads (uvicorn, job queue,
+        # connection pools) can deadlock the child on a held lock
+        _process_pool = ProcessPoolExecutor(
+            max_workers=REDACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def shutdown_redaction_workers():
+    """Stops the redaction worker processes (app shutdown)."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+
+def _split_page_groups(spans_by_page: dict, groups: int) -> list[dict]:
+    """Contiguous page ranges with roughly the same number of redacted pages."""
+    pages = sorted(spans_by_page)
+    size = -(-len(pages) // groups)
+    return [
+        {page_no: spans_by_page[page_no] for page_no in pages[i:i + size]}
+        for i in range(0, len(pages), size)
+    ]
+
+
+def _redact_in_workers(doc, pdf_stream: bytes, spans_by_page: dict,
+                       x1_pt: float, x2_pt: float, options: RedactionOptions):
+    """
+    Redacts page ranges in worker processes and swaps the redacted pages
+    into doc; pages without spans are never touched.
+    """
+    pool = _get_process_pool()
+    groups = _split_page_groups(spans_by_page, REDACTION_WORKERS)
+    futures = [
+        pool.submit(_redact_page_group, pdf_stream, group, x1_pt, x2_pt, options)
+        for group in groups
+    ]
+
+    # Swap pages in ascending order; each swap keeps the page count unchanged
+    for future, group in zip(futures, groups):
+        part = fitz.open(stream=future.result(), filetype="pdf")
+        try:
+            for i, page_no in enumerate(sorted(group)):
+                doc.insert_pdf(part, from_page=i, to_page=i, start_at=page_no)
+                doc.delete_page(page_no + 1)
+        finally:
+            part.close()
+
+
 def redact_pdf_from_stream_with_spans(
     pdf_stream: bytes,
     x1: float,
     x2: float,
-    y_spans: set
-):
-    # Create output folder if needed
-    # output_dir = os.path.dirname(output_pdf)
-    # if output_dir:
-    #     os.makedirs(output_dir, exist_ok=True)
-
-    # # Generate redacted filename
-    # output_pdf = get_redacted_filename(output_pdf)
+    y_spans: set,
+    options: RedactionOptions | None = None
+) -> bytes:
+    """
+    Blacks out x1..x2 (inches) for every (page_no, y1, y2) span and returns
+    the redacted PDF bytes.
+
+    Spans are merged per page first, and only pages that carry a span are
+    redacted, so the cost follows the number of redacted pages rather
+    than the page count. Large documents are redacted in worker processes.
+    """
+    options = options or RedactionOptions()
 
     # Open PDF from bytes
     doc = fitz.open(stream=pdf_stream, filetype="pdf")
 
-    x1_pt = x1 * INCH_TO_PT
-    x2_pt = x2 * INCH_TO_PT
+    try:
+        spans_by_page = merge_spans(y_spans, len(doc), gap=options.merge_gap)
 
-    for page_no, y1, y2 in y_spans:
-
-        if page_no < 0 or page_no >= len(doc):
-            continue
-        if y1 is None or y2 is None:
-            continue
+        x1_pt, x2_pt = sorted((x1 * INCH_TO_PT, x2 * INCH_TO_PT))
 
-        page = doc[page_no]
-
-        y1_pt = y1 * INCH_TO_PT
-        y2_pt = y2 * INCH_TO_PT
-
-        rect = fitz.Rect(
-            min(x1_pt, x2_pt),
-            min(y1_pt, y2_pt),
-            max(x1_pt, x2_pt),
-            max(y1_pt, y2_pt),
+        parallel = (
+            REDACTION_WORKERS > 1
+            and len(doc) >= REDACTION_PARALLEL_MIN_PAGES
+            and len(spans_by_page) > 1
         )
 
-        page.add_redact_annot(rect, fill=(0, 0, 0))
+        if parallel:
+            _redact_in_workers(doc, pdf_stream, spans_by_page, x1_pt, x2_pt, options)
+        else:
+            for page_no, spans in spans_by_page.items():
+                _redact_page(doc[page_no], spans, x1_pt, x2_pt, options)
 
-    # Apply all redactions
-    for page in doc:
-        page.apply_redactions()
-
-    # Save redacted PDF
-    output_buffer = BytesIO()  # Create an in-memory PDF
-    doc.save(output_buffer)
-    doc.close()
+        # Save redacted PDF
+        output_buffer = BytesIO()  # Create an in-memory PDF
+        doc.save(output_buffer, **_SAVE_OPTIONS)
+    finally:
+        doc.close()
 
     redacted_bytes = output_buffer.getvalue()
 
     logger.info(
         "PDF redaction completed successfully (bytes)",
-        extra={"output_size": len(redacted_bytes)},
+        extra={
+            "output_size": len(redacted_bytes),
+            "input_spans": len(y_spans),
+            "redacted_pages": len(spans_by_page),
+            "redaction_boxes": sum(len(s) for s in spans_by_page.values()),
+            "parallel": parallel,
+        },
     )
 
     return redacted_bytes
-
- 
\ No newline at end of file
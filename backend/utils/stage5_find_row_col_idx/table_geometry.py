@@ -0,0 +1,87 @@
+import numpy as np
+
+from utils.stage0.ocr_table import OCRTable
+
+
+class TableGeometry:
+    """
+    Row geometry of ONE OCR table, computed with array operations over
+    its columnar cell / polygon buffers.
+
+    row_min_y / row_max_y : per row_index, min / max y of the FIRST bounding
+                            region of every cell in the row (NaN = no cell)
+    row_page              : per row_index, page of the first such region (-1 = none)
+    x_min / x_max         : x-extent over ALL regions of all cells
+    page_number           : page of the table's first region (None = none)
+
+    Span lookups are O(1) and give exactly the values of the
+    former cell-scanning get_y1_y2_from_ocr / get_table_x_bounds.
+    """
+
+    __slots__ = ("row_min_y", "row_max_y", "row_page", "x_min", "x_max", "page_number")
+
+    def __init__(self, table: OCRTable):
+        row_count = int(table.row_index.max()) + 1 if len(table) else 0
+
+        self.row_min_y = np.full(row_count, np.nan)
+        self.row_max_y = np.full(row_count, np.nan)
+        self.row_page = np.full(row_count, -1, dtype=np.int64)
+        self.page_number = table.page_number
+
+        xs = table.xs
+        self.x_min = float(xs.min()) if len(xs) else None
+        self.x_max = float(xs.max()) if len(xs) else None
+
+        first = table.first_region
+        has_region = first >= 0
+        if not has_region.any():
+            return
+
+        # Row y-bounds come from the first region's four corners,
+        # gathered from the polygon buffer in one fancy-index
+        rows = table.row_index[has_region]
+        regions = first[has_region]
+        starts = table.polygon_offsets[regions]
+        ys = table.polygons[starts[:, None] + np.array([1, 3, 5, 7])].astype(np.float64)
+
+        row_min = np.full(row_count, np.inf)
+        row_max = np.full(row_count, -np.inf)
+        np.minimum.at(row_min, rows, ys.min(axis=1))
+        np.maximum.at(row_max, rows, ys.max(axis=1))
+
+        filled = np.isfinite(row_min)
+        self.row_min_y[filled] = row_min[filled]
+        self.row_max_y[filled] = row_max[filled]
+
+        # Page of the first cell (in cell order) of every row
+        unique_rows, first_cell = np.unique(rows, return_index=True)
+        self.row_page[unique_rows] = table.region_page[regions[first_cell]]
+
+    def _row_value(self, values: np.ndarray, row: int) -> float | None:
+        if row < 0 or row >= len(values) or np.isnan(values[row]):
+            return None
+        return float(values[row])
+
+    def y_span(self, start_row: int, end_row: int) -> tuple[float | None, float | None]:
+        """(top of start_row, bottom of end_row); None where the row has no cells."""
+        return (
+            self._row_value(self.row_min_y, start_row),
+            self._row_value(self.row_max_y, end_row),
+        )
+
+    def page_of_row(self, row: int) -> int | None:
+        if row < 0 or row >= len(self.row_page) or self.row_page[row] < 0:
+            return None
+        return int(self.row_page[row])
+
+    @property
+    def x_bounds(self) -> tuple[float, float]:
+        if self.x_min is None:
+            raise ValueError("No X coordinates found in OCR table")
+        return self.x_min, self.x_max
+
+
+def build_table_geometries(ocr_tables: list[OCRTable], table_indices=None) -> dict[int, TableGeometry]:
+    """Geometry index per OCR table (optionally only for table_indices)."""
+    indices = range(len(ocr_tables)) if table_indices is None else table_indices
+    return {idx: TableGeometry(ocr_tables[idx]) for idx in indices}